@@ -3,79 +3,171 @@
 import time
 import random
 import os
+import tempfile
 import soundfile as sf
 import numpy as np
 
 import librosa
-from sklearn.preprocessing import StandardScaler
 
 import speech_recognition as sr
 import threading
 
-from gtts import gTTS
 from playsound import playsound
 
-import google.generativeai as genai
-
 from . import config
+from . import cry_classifier
+from . import cry_detection
+from . import stt_backends
+from . import tts_cache
+from .intent_router import IntentRouter
+from .llm_client import LLMClient, create_llm_backend
+from .speech_queue import PRIORITY_ALERT, PRIORITY_CHATTER, SpeechQueue
+from .audio_bus import DROP_OLDEST, QueueWorker
+from .audio_stream import MicrophoneStream
 from .utils import log_event
 
-genai.configure(api_key=config.GEMINI_API_KEY)
-gemini_model_instance = genai.GenerativeModel(config.GEMINI_MODEL_NAME)
-
-recognized_speech_text = None
+recognized_speech_text = None # (text, time heard) of the newest phrase, until the main loop takes it
 speech_lock = threading.Lock()
 stop_listening_thread = False
 
 current_detected_objects = "" # Will be a comma-separated string of object labels
+_detected_objects_lock = threading.Lock()
 
 _last_cry_alert_time = 0
 
-def speak_text(text_data, filename=config.AI_SPEECH_FILENAME):
+audio_bus = None # Set while the background listener owns the microphone
+
+_phrase_cache = None
+_phrase_cache_lock = threading.Lock()
+
+_speech_queue = None
+_speech_queue_lock = threading.Lock()
+
+_llm_client = None
+_llm_client_lock = threading.Lock()
+
+intent_router = IntentRouter() # Local answers from KEYWORD_RESPONSES, checked before the LLM
+
+def set_detected_objects(labels):
+    """
+    Publishes the current set of object labels (called by the object detection worker).
+    """
+    global current_detected_objects
+    with _detected_objects_lock:
+        current_detected_objects = ", ".join(sorted(labels))
+
+def get_detected_objects():
+    """
+    Returns a consistent snapshot of the comma-separated object labels.
+    """
+    with _detected_objects_lock:
+        return current_detected_objects
+
+def get_phrase_cache():
+    """
+    The shared TTS phrase cache, or None if caching is disabled.
+    """
+    global _phrase_cache
+    if not config.TTS_CACHE_ENABLED:
+        return None
+    with _phrase_cache_lock:
+        if _phrase_cache is None:
+            _phrase_cache = tts_cache.PhraseCache()
+        return _phrase_cache
+
+def prewarm_speech_cache():
+    """
+    Synthesizes all fixed phrases into the cache in a background thread.
+    """
+    cache = get_phrase_cache()
+    if cache is not None and config.TTS_CACHE_PREWARM:
+        cache.prewarm(tts_cache.fixed_phrases())
+
+def _phrase_parts(text_data, lang=None):
     if isinstance(text_data, dict):
-        text = text_data['text']
-        lang = text_data['lang']
-    else:
-        text = text_data
-        lang = config.AI_SPEECH_LANG
+        return text_data['text'], text_data['lang']
+    return text_data, lang or config.AI_SPEECH_LANG
 
-    print(f"[{time.strftime('%H:%M:%S')}] AI is synthesizing: '{text}' (lang: {lang})...")
+def _speak_now(text, lang):
+    """
+    Synthesizes (or fetches from the cache) and plays one phrase, returning
+    once playback has finished. Returns the synthesis time in seconds, or None on error.
+    """
+    path = None
+    temporary = False
     try:
-        tts = gTTS(text=text, lang=lang, slow=False)
-        tts.save(filename)
-        playsound(filename, block=False)
+        started = time.perf_counter()
+        cache = get_phrase_cache()
+        if cache is not None:
+            # Cached files belong to the cache, so playback never races a delete.
+            path, cached = cache.get(text, lang)
+            if not cached:
+                print(f"[{time.strftime('%H:%M:%S')}] AI synthesized: '{text}' (lang: {lang})")
+        else:
+            # A unique temp file per phrase, removed after its own playback.
+            print(f"[{time.strftime('%H:%M:%S')}] AI is synthesizing: '{text}' (lang: {lang})...")
+            fd, path = tempfile.mkstemp(suffix=".mp3", prefix="nuba_ai_speech_")
+            os.close(fd)
+            temporary = True
+            tts_cache.synthesize_to_file(text, lang, config.AI_SPEECH_VOICE, path)
+        synthesis_time = time.perf_counter() - started
+
         print(f"[{time.strftime('%H:%M:%S')}] AI is speaking...")
         log_event("AI_Speech", config.current_nuba_state, f"'{text}' (lang: {lang})")
+        playsound(path, block=True)
+        return synthesis_time
     except Exception as e:
         print(f"[{time.strftime('%H:%M:%S')}] Error during AI speech generation or playback: {e}")
         log_event("AI_Speech_Error", config.current_nuba_state, f"'{text}' (lang: {lang}) - {e}")
+        return None
     finally:
-        if os.path.exists(filename):
-            os.remove(filename)
+        if temporary and os.path.exists(path):
+            os.remove(path)
 
-def analyze_audio_for_cry(audio_file_path):
-    try:
-        y, sr = librosa.load(audio_file_path, sr=None)
+def _get_speech_queue():
+    global _speech_queue
+    if _speech_queue is not None and _speech_queue.is_running():
+        return _speech_queue
+    with _speech_queue_lock:
+        if _speech_queue is None or not _speech_queue.is_running():
+            _speech_queue = SpeechQueue(_speak_now)
+            _speech_queue.start()
+        return _speech_queue
 
-        rms = librosa.feature.rms(y=y)[0]
-        avg_rms = np.mean(rms)
+def enqueue_speech(text_data, priority=PRIORITY_CHATTER, lang=None):
+    """
+    Queues a phrase ({"text", "lang"} dict or plain text) for the speech output
+    worker and returns immediately. Returns False if it was not queued
+    (an identical phrase is already waiting, or the queue is full).
+    """
+    text, lang = _phrase_parts(text_data, lang)
+    return _get_speech_queue().enqueue(text, lang, priority)
 
-        cent = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-        avg_cent = np.mean(cent)
+def speak_text(text_data, lang=None):
+    """
+    Synchronous speech: returns after playback. Callers on the video, audio or
+    GUI threads should use enqueue_speech instead.
+    """
+    _speak_now(*_phrase_parts(text_data, lang))
 
-        f0, voiced_flag, voiced_probs = librosa.pyin(y=y, sr=sr, fmin=librosa.note_to_hz('C2'), fmax=librosa.note_to_hz('C7'))
-        f0 = f0[voiced_flag]
-        
-        pitch_variance = 0
-        if len(f0) > 1:
-            f0_semitones = 12 * np.log2(f0 / 100.0 + 1e-10)
-            pitch_variance = np.var(f0_semitones)
+def get_speech_stats():
+    """
+    Speech output queue counters plus queue-wait and synthesis latency.
+    """
+    return _speech_queue.get_stats() if _speech_queue is not None else {}
 
-        print(f"[{time.strftime('%H:%M:%S')}] Audio analysis: RMS={avg_rms:.4f}, Centroid={avg_cent:.1f}Hz, PitchVar={pitch_variance:.1f}")
+def stop_speech_output():
+    if _speech_queue is not None:
+        _speech_queue.stop()
 
-        is_cry = (avg_rms > config.CRY_RMS_THRESHOLD and
-                  avg_cent > config.CRY_SPECTRAL_CENTROID_THRESHOLD and
-                  pitch_variance > config.CRY_PITCH_VARIANCE_THRESHOLD)
+def analyze_audio_for_cry(audio_file_path):
+    """
+    Cry decision for an audio file (the live listener analyzes the microphone
+    stream in memory through cry_detection.StreamingCryDetector instead).
+    """
+    try:
+        y, sr = librosa.load(audio_file_path, sr=None)
+        is_cry = cry_detection.analyze_samples_for_cry(y, sr)
         
         if is_cry:
             print(f"[{time.strftime('%H:%M:%S')}] Detected potential cry based on audio features.")
@@ -86,99 +178,176 @@ def analyze_audio_for_cry(audio_file_path):
         print(f"[{time.strftime('%H:%M:%S')}] Error during audio cry analysis: {e}")
         return False
 
-def listen_in_background(recognizer):
-    global recognized_speech_text, stop_listening_thread, _last_cry_alert_time
+def _on_cry_detected():
+    global _last_cry_alert_time
+
+    current_time = time.time()
+    if (current_time - _last_cry_alert_time) > config.CRY_ALERT_COOLDOWN_SECONDS:
+        print(f"[{time.strftime('%H:%M:%S')}] !!! CRY DETECTED !!!")
+        log_event("Cry_Detected", config.current_nuba_state, "Likely crying detected by audio analysis")
+        enqueue_speech(config.CRY_ALERT_PHRASE, priority=PRIORITY_ALERT)
+        _last_cry_alert_time = current_time
+    else:
+        print(f"[{time.strftime('%H:%M:%S')}] Cry detected, but still in cooldown.")
+
+def _recognize_phrase(backend, audio_data):
+    """
+    STT worker: turns one captured phrase into text for the main loop.
+    """
+    global recognized_speech_text
+    try:
+        text = backend.transcribe(audio_data)
 
+        with speech_lock:
+            recognized_speech_text = (text, time.time())
+        print(f"[{time.strftime('%H:%M:%S')}] Background listener heard (for STT): \"{text}\"")
+
+    except sr.UnknownValueError:
+        print(f"[{time.strftime('%H:%M:%S')}] Background listener: Could not understand audio for STT.")
+    except sr.RequestError as e:
+        print(f"[{time.strftime('%H:%M:%S')}] Background listener: Could not request results from {backend.name} STT backend; {e}")
+
+def take_recognized_speech(max_age=config.STT_RESULT_MAX_AGE_SECONDS):
+    """
+    Returns the newest recognized phrase and clears the slot, or None if there
+    is none. Phrases older than max_age are dropped instead of being answered late.
+    """
+    global recognized_speech_text
+    with speech_lock:
+        result, recognized_speech_text = recognized_speech_text, None
+    if result is None:
+        return None
+    text, heard_at = result
+    if time.time() - heard_at > max_age:
+        print(f"[{time.strftime('%H:%M:%S')}] Dropping stale recognized speech: \"{text}\"")
+        return None
+    return text
+
+def get_audio_stats():
+    """
+    Per-consumer audio bus counters: {name: {received, dropped, queue_depth, avg_ms, ...}}.
+    """
+    bus = audio_bus
+    return bus.get_stats() if bus is not None else {}
+
+def listen_in_background(recognizer, scheduler=None):
+    """
+    Owns the microphone for the lifetime of the app. The capture thread only
+    publishes chunks on the audio bus; the streaming cry detector and the
+    speech-to-text pipeline consume them on their own workers:
+
+      capture -> bus -> "cry" worker (StreamingCryDetector)
+                     -> "stt-listen" queue -> this thread (phrase segmentation)
+                                           -> "stt" worker (STT backend)
+
+    so recognition, TTS or cry analysis being slow never stops audio capture.
+    With a scheduler, phrases are only sent for recognition when the "stt"
+    analyzer is due (e.g. not while Nuba sleeps in a still room); cry
+    detection is never gated.
+    """
+    global audio_bus, stop_listening_thread
+
+    mic_stream = MicrophoneStream()
+    mic_stream.start()
+    if not mic_stream.is_running():
+        print(f"[{time.strftime('%H:%M:%S')}] Background listener: could not start audio capture.")
+        return
+    audio_bus = mic_stream.bus
+
+    cry_detector = cry_detection.StreamingCryDetector(mic_stream.sample_rate, _on_cry_detected,
+                                                      classifier=cry_classifier.load_cry_classifier())
+    cry_detector.start(audio_bus)
+
+    # The backend (and any local model) is created once and reused for every phrase.
+    # Phrases waiting for recognition; if the STT engine is slow the oldest phrase is dropped.
+    stt_backend = stt_backends.create_stt_backend(recognizer=recognizer)
+    def recognize(audio_data):
+        # Charged by thread CPU time: a network backend mostly waits.
+        started = time.thread_time()
+        _recognize_phrase(stt_backend, audio_data)
+        if scheduler is not None:
+            scheduler.record("stt", time.thread_time() - started)
+
+    stt_worker = QueueWorker("stt", recognize,
+                             maxsize=config.STT_QUEUE_SIZE, drop_policy=DROP_OLDEST)
+    stt_worker.start()
+
+    source = mic_stream.audio_source()
     print(f"[{time.strftime('%H:%M:%S')}] Background listener: Adjusting for ambient noise...")
-    with sr.Microphone() as source:
-        recognizer.adjust_for_ambient_noise(source, duration=1)
+    recognizer.adjust_for_ambient_noise(source, duration=1)
     print(f"[{time.strftime('%H:%M:%S')}] Background listener: Microphone calibrated.")
 
-    while not stop_listening_thread:
-        with sr.Microphone() as source:
-            current_time = time.time()
-            with speech_lock:
-                recognized_speech_text = None
-                
+    try:
+        while not stop_listening_thread and mic_stream.is_running():
             try:
                 audio_data = recognizer.listen(source, timeout=config.AI_LISTEN_DURATION, phrase_time_limit=config.AI_LISTEN_DURATION)
-                
-                with open(config.CRY_AUDIO_TEMP_FILE, "wb") as f:
-                    f.write(audio_data.get_wav_data())
-
-                is_cry = analyze_audio_for_cry(config.CRY_AUDIO_TEMP_FILE)
-                if is_cry:
-                    if (current_time - _last_cry_alert_time) > config.CRY_ALERT_COOLDOWN_SECONDS:
-                        print(f"[{time.strftime('%H:%M:%S')}] !!! CRY DETECTED !!!")
-                        log_event("Cry_Detected", config.current_nuba_state, "Likely crying detected by audio analysis")
-                        speak_text({"text": "Oh, Nuba is crying! Mama is coming!", "lang": "en"})
-                        _last_cry_alert_time = current_time
-                    else:
-                        print(f"[{time.strftime('%H:%M:%S')}] Cry detected, but still in cooldown.")
-                
-                text = recognizer.recognize_google(audio_data, language="en-US")
-                
-                with speech_lock:
-                    recognized_speech_text = text
-                print(f"[{time.strftime('%H:%M:%S')}] Background listener heard (for STT): \"{text}\"")
+                if scheduler is None or scheduler.should_run("stt"):
+                    stt_worker.submit(audio_data)
 
             except sr.WaitTimeoutError:
                 pass
-            except sr.UnknownValueError:
-                print(f"[{time.strftime('%H:%M:%S')}] Background listener: Could not understand audio for STT.")
-            except sr.RequestError as e:
-                print(f"[{time.strftime('%H:%M:%S')}] Background listener: Could not request results from Google SR service; {e}")
             except Exception as e:
                 print(f"[{time.strftime('%H:%M:%S')}] Background listener: An unexpected error occurred: {e}")
-            finally:
-                if os.path.exists(config.CRY_AUDIO_TEMP_FILE):
-                    os.remove(config.CRY_AUDIO_TEMP_FILE)
-                
-            time.sleep(1)
+    finally:
+        stt_worker.stop()
+        cry_detector.stop()
+        mic_stream.stop()
+        audio_bus = None
 
-# --- MODIFIED: get_gemini_response for object_context (Day 24) ---
-def get_gemini_response(prompt_text, object_context=""):
-    # Removed 'global' keyword from here:
-    # global config.LAST_GEMINI_CALL_TIME # Access global from config 
+def get_llm_client():
+    """
+    The shared LLM client (and its event loop thread), created on first use.
+    """
+    global _llm_client
+    with _llm_client_lock:
+        if _llm_client is None:
+            _llm_client = LLMClient(create_llm_backend())
+        return _llm_client
 
-    current_time = time.time()
-    if (current_time - config.LAST_GEMINI_CALL_TIME) < config.GEMINI_COOLDOWN_SECONDS:
-        print(f"[{time.strftime('%H:%M:%S')}] Gemini cooldown active. Skipping API call.")
-        return "I need a little rest, Nuba! Let's talk soon."
+def request_gemini_response(prompt_text, on_response, object_context=None):
+    """
+    Non-blocking: on_response(text) is called from the LLM client's thread
+    once the (possibly cached or coalesced) response is ready.
+    """
+    if object_context is None:
+        object_context = get_detected_objects()
+    future = get_llm_client().submit(prompt_text, config.current_nuba_state, object_context)
 
-    try:
-        context_instruction = ""
-        if object_context:
-            context_instruction = f"I see the following objects nearby: {object_context}. "
-        
-        system_instruction = (
-            f"You are 'NubaGuard', a kind, gentle, and very playful AI friend for an 8-month-old baby named Nuba. "
-            f"Your goal is to engage and comfort her. "
-            f"Your responses MUST be extremely short (1-5 words maximum), simple, and very positive. "
-            f"Use simple baby-friendly vocabulary. "
-            f"If Nuba babbles or makes unclear sounds, respond with gentle encouragement, a playful sound (like 'coo' or 'boop'), or a simple question. "
-            f"Never ask complex questions or give long explanations. "
-            f"If Nuba's speech appears to be English, respond in English. If it appears to be Bengali (like 'Ma', 'Baba', or common Bengali babbling), respond in simple Bengali. "
-            f"You can refer to Nuba directly. Current Nuba's state is {config.current_nuba_state}. "
-            f"{context_instruction}" # <-- Inject object context here
-            f"Always prioritize Nuba's happiness and safety."
-        )
-
-        chat_session = gemini_model_instance.start_chat(history=[])
-        
-        response = chat_session.send_message(f"System: {system_instruction}\nUser: {prompt_text}")
-        
-        config.LAST_GEMINI_CALL_TIME = current_time # Update last call time upon successful request
+    def deliver(done):
+        try:
+            on_response(done.result())
+        except Exception as e:
+            print(f"[{time.strftime('%H:%M:%S')}] Error delivering Gemini response: {e}")
 
-        if response and response.text:
-            return response.text
-        else:
-            print(f"[{time.strftime('%H:%M:%S')}] Gemini response was empty or malformed.")
-            return "Hmm, I'm not sure what to say, Nuba."
+    future.add_done_callback(deliver)
+    return future
 
-    except genai.types.BlockedPromptException as e:
-        print(f"[{time.strftime('%H:%M:%S')}] Gemini blocked prompt: {e.response.prompt_feedback}")
-        return "I can't respond to that right now, Nuba."
-    except Exception as e:
-        print(f"[{time.strftime('%H:%M:%S')}] Error getting Gemini response: {e}")
-        return "Oops, something went wrong, Nuba."
\ No newline at end of file
+# --- MODIFIED: get_gemini_response for object_context (Day 24) ---
+def get_gemini_response(prompt_text, object_context=None):
+    """
+    Blocking variant of request_gemini_response.
+    """
+    if object_context is None:
+        object_context = get_detected_objects()
+    return get_llm_client().get_response(prompt_text, config.current_nuba_state, object_context)
+
+def get_llm_stats():
+    return _llm_client.get_stats() if _llm_client is not None else {}
+
+def respond_to_utterance(prompt_text, on_response):
+    """
+    Local keyword/intent match first; only unmatched utterances go to Gemini.
+    on_response gets a {"text", "lang"} dict for local answers (called right
+    away) or the Gemini text (called later from the LLM client's thread).
+    Returns True if it was answered locally.
+    """
+    local_response = intent_router.route(prompt_text)
+    if local_response is not None:
+        print(f"[{time.strftime('%H:%M:%S')}] Answered locally: '{local_response['text']}'")
+        on_response(local_response)
+        return True
+    request_gemini_response(prompt_text, on_response)
+    return False
+
+def get_router_stats():
+    return intent_router.get_stats()
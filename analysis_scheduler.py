@@ -0,0 +1,138 @@
+# analysis_scheduler.py
+
+import threading
+import time
+
+from . import config
+from .video_pipeline import StageStats
+
+ACTIVITY_SLEEPING_STATIC = "sleeping_static"
+ACTIVITY_SLEEPING_MOTION = "sleeping_motion"
+ACTIVITY_AWAKE = "awake"
+
+class AnalysisScheduler:
+    """
+    Decides how often each analyzer (motion, faces, objects, stt) runs.
+
+    Target rates come from config.ANALYSIS_RATES_HZ per activity level:
+    asleep with a static scene, asleep with recent motion (held for
+    motion_hold seconds after the last motion), or awake. Callers ask
+    should_run(name) before doing the work and report its cost with
+    record(name, seconds).
+
+    The measured cost (moving average) times the target rate is the load
+    each analyzer would put on the CPU. Rates are granted in `priority`
+    order until cpu_budget (in cores) is used up; an analyzer never drops
+    below its sleeping_static rate, so motion keeps being checked and
+    wake-ups are not missed when the budget is tight.
+    """
+    def __init__(self, rates=config.ANALYSIS_RATES_HZ, cpu_budget=config.ANALYSIS_CPU_BUDGET,
+                 motion_hold=config.ANALYSIS_MOTION_HOLD_SECONDS, priority=config.ANALYSIS_PRIORITY):
+        self.rates = rates
+        self.cpu_budget = cpu_budget
+        self.motion_hold = motion_hold
+        self.priority = [name for name in priority if name in rates] + [name for name in rates if name not in priority]
+
+        self._lock = threading.Lock()
+        self.activity = ACTIVITY_AWAKE
+        self._last_motion = 0.0
+        self._cost = {name: 0.0 for name in rates}      # Moving average seconds per run
+        self._granted = {name: rates[name][ACTIVITY_AWAKE] for name in rates}
+        self._last_run = {name: 0.0 for name in rates}
+        self._skipped = {name: 0 for name in rates}
+        self._stats = {name: StageStats(name) for name in rates}
+
+        self._cpu_sample = (time.monotonic(), time.process_time())
+        self.cpu_percent = 0.0
+
+    def update(self, nuba_state, motion=None, now=None):
+        """
+        Called once per analyzed frame with Nuba's state and, if motion
+        detection ran on it, whether significant motion was found.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            if motion:
+                self._last_motion = now
+            if nuba_state != "sleeping":
+                self.activity = ACTIVITY_AWAKE
+            elif now - self._last_motion < self.motion_hold:
+                self.activity = ACTIVITY_SLEEPING_MOTION
+            else:
+                self.activity = ACTIVITY_SLEEPING_STATIC
+            self._allocate()
+
+    def _allocate(self):
+        remaining = self.cpu_budget
+        for name in self.priority:
+            target = self.rates[name][self.activity]
+            floor = min(target, self.rates[name][ACTIVITY_SLEEPING_STATIC])
+            cost = self._cost[name]
+            rate = target if cost <= 0 else max(floor, min(target, remaining / cost))
+            remaining = max(0.0, remaining - rate * cost)
+            self._granted[name] = rate
+
+    def should_run(self, name, now=None):
+        """
+        True if `name` is due at its current rate; the run is counted as started.
+        Unknown analyzers always run.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            rate = self._granted.get(name)
+            if rate is None:
+                return True
+            if rate > 0:
+                interval = 1.0 / rate
+                due = self._last_run[name] + interval
+                if now >= due:
+                    # Keep the cadence when frames arrive slightly early or late.
+                    self._last_run[name] = due if now - due < interval else now
+                    return True
+            self._skipped[name] += 1
+            return False
+
+    def record(self, name, seconds):
+        """
+        Reports how long one run of `name` took (its CPU cost estimate).
+        """
+        stats = self._stats.get(name)
+        if stats is None:
+            return
+        stats.record(seconds)
+        with self._lock:
+            previous = self._cost[name]
+            self._cost[name] = seconds if previous <= 0 else previous * 0.8 + seconds * 0.2
+
+    def target_rate(self, name):
+        with self._lock:
+            return self._granted.get(name)
+
+    def _sample_cpu(self):
+        wall, cpu = time.monotonic(), time.process_time()
+        elapsed = wall - self._cpu_sample[0]
+        if elapsed >= 1.0:
+            self.cpu_percent = (cpu - self._cpu_sample[1]) / elapsed * 100
+            self._cpu_sample = (wall, cpu)
+
+    def get_stats(self):
+        """
+        Activity level, process CPU usage (percent of one core, this process
+        only) and, per analyzer, granted/actual rate, cost and skipped runs.
+        """
+        with self._lock:
+            self._sample_cpu()
+            analyzers = {}
+            load = 0.0
+            for name in self.priority:
+                load += self._granted[name] * self._cost[name]
+                analyzers[name] = dict(self._stats[name].snapshot(),
+                                       target_hz=round(self._granted[name], 2),
+                                       skipped=self._skipped[name])
+            return {
+                "activity": self.activity,
+                "cpu_percent": round(self.cpu_percent, 1),
+                "scheduled_load": round(load, 3),
+                "cpu_budget": self.cpu_budget,
+                "analyzers": analyzers,
+            }
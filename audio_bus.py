@@ -0,0 +1,209 @@
+# audio_bus.py
+
+import threading
+import time
+from collections import deque, namedtuple
+
+from . import config
+from .video_pipeline import StageStats
+
+# pcm: raw int16 bytes as read from the microphone, samples: the same audio as float32 in [-1, 1)
+AudioChunk = namedtuple("AudioChunk", ["seq", "timestamp", "pcm", "samples"])
+
+DROP_OLDEST = "drop_oldest" # Keep the newest audio (analyzers that only care about "now")
+DROP_NEWEST = "drop_newest" # Keep what is queued, refuse new chunks (consumers that need contiguous audio)
+
+class ChunkQueue:
+    """
+    Bounded queue with a drop policy for when the consumer falls behind.
+    Items are stored with their enqueue time so consumers can report queue wait.
+    """
+    def __init__(self, name, maxsize, drop_policy=DROP_OLDEST):
+        self.name = name
+        self._items = deque()
+        self._maxsize = max(1, maxsize)
+        self._drop_policy = drop_policy
+        self._cond = threading.Condition()
+        self._closed = False
+        self.received = 0
+        self.dropped = 0
+        self.wait_stats = StageStats(name)
+
+    def put(self, item):
+        """
+        Never blocks. Returns False if an item had to be dropped.
+        """
+        with self._cond:
+            self.received += 1
+            accepted = True
+            if len(self._items) >= self._maxsize:
+                self.dropped += 1
+                accepted = False
+                if self._drop_policy == DROP_NEWEST:
+                    return False
+                self._items.popleft()
+            self._items.append((time.perf_counter(), item))
+            self._cond.notify()
+            return accepted
+
+    def get_with_time(self, timeout=None):
+        """
+        Returns (enqueue_time, item), or None if nothing arrived within timeout or the queue is closed.
+        """
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            enqueued_at, item = self._items.popleft()
+        self.wait_stats.record(time.perf_counter() - enqueued_at)
+        return enqueued_at, item
+
+    def get(self, timeout=None):
+        entry = self.get_with_time(timeout)
+        return None if entry is None else entry[1]
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def depth(self):
+        with self._cond:
+            return len(self._items)
+
+    def get_stats(self):
+        stats = self.wait_stats.snapshot()
+        stats.update({"received": self.received, "dropped": self.dropped, "queue_depth": self.depth()})
+        return stats
+
+
+class QueueWorker:
+    """
+    A single thread draining its own ChunkQueue into handler(item).
+    latency in get_stats() is enqueue-to-handled, i.e. queue wait plus processing.
+    """
+    def __init__(self, name, handler, maxsize=config.AUDIO_SUBSCRIBER_QUEUE_CHUNKS, drop_policy=DROP_OLDEST):
+        self.name = name
+        self.handler = handler
+        self.queue = ChunkQueue(name, maxsize, drop_policy)
+        self.latency_stats = StageStats(name)
+        self.errors = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=f"audio-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        self.queue.close()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def submit(self, item):
+        return self.queue.put(item)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            entry = self.queue.get_with_time(timeout=0.1)
+            if entry is None:
+                continue
+            enqueued_at, item = entry
+            try:
+                self.handler(item)
+            except Exception as e:
+                self.errors += 1
+                print(f"[{time.strftime('%H:%M:%S')}] Error in audio consumer '{self.name}': {e}")
+            self.latency_stats.record(time.perf_counter() - enqueued_at)
+
+    def get_stats(self):
+        queue_stats = self.queue.get_stats()
+        stats = self.latency_stats.snapshot()
+        stats.update({"received": queue_stats["received"], "dropped": queue_stats["dropped"],
+                      "queue_depth": queue_stats["queue_depth"], "wait_avg_ms": queue_stats["avg_ms"],
+                      "errors": self.errors})
+        return stats
+
+
+class AudioBus:
+    """
+    Fan-out of captured audio chunks. publish() only appends to each
+    subscriber's bounded queue, so the capture thread never waits on a consumer;
+    a slow consumer loses chunks according to its own drop policy instead.
+
+    Consumers are either workers (add_consumer: a handler run on its own
+    thread) or pull subscriptions (subscribe: a ChunkQueue the caller reads).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queues = []
+        self._workers = []
+        self._seq = 0
+        self.published = 0
+
+    def subscribe(self, name, maxsize=config.AUDIO_SUBSCRIBER_QUEUE_CHUNKS, drop_policy=DROP_OLDEST):
+        chunk_queue = ChunkQueue(name, maxsize, drop_policy)
+        with self._lock:
+            self._queues.append(chunk_queue)
+        return chunk_queue
+
+    def add_consumer(self, name, handler, maxsize=config.AUDIO_SUBSCRIBER_QUEUE_CHUNKS, drop_policy=DROP_OLDEST):
+        worker = QueueWorker(name, handler, maxsize, drop_policy)
+        worker.start()
+        with self._lock:
+            self._queues.append(worker.queue)
+            self._workers.append(worker)
+        return worker
+
+    def remove(self, consumer):
+        """
+        Detaches a pull subscription or worker (the worker is stopped).
+        """
+        chunk_queue = consumer.queue if isinstance(consumer, QueueWorker) else consumer
+        with self._lock:
+            if chunk_queue in self._queues:
+                self._queues.remove(chunk_queue)
+            if consumer in self._workers:
+                self._workers.remove(consumer)
+        if isinstance(consumer, QueueWorker):
+            consumer.stop()
+        else:
+            consumer.close()
+
+    def publish(self, pcm, samples):
+        with self._lock:
+            self._seq += 1
+            chunk = AudioChunk(self._seq, time.time(), pcm, samples)
+            queues = list(self._queues)
+        for chunk_queue in queues:
+            chunk_queue.put(chunk)
+        self.published += 1
+        return chunk
+
+    def close(self):
+        with self._lock:
+            queues, workers = list(self._queues), list(self._workers)
+            self._queues, self._workers = [], []
+        for worker in workers:
+            worker.stop()
+        for chunk_queue in queues:
+            chunk_queue.close()
+
+    def get_stats(self):
+        """
+        Returns {consumer_name: {received, dropped, queue_depth, avg_ms, max_ms, ...}}.
+        For workers the *_ms values are enqueue-to-handled latency, for pull
+        subscriptions they are time spent waiting in the queue.
+        """
+        with self._lock:
+            queues, workers = list(self._queues), list(self._workers)
+        worker_queues = {id(worker.queue) for worker in workers}
+        stats = {worker.name: worker.get_stats() for worker in workers}
+        for chunk_queue in queues:
+            if id(chunk_queue) not in worker_queues:
+                stats[chunk_queue.name] = chunk_queue.get_stats()
+        return stats
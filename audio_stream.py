@@ -0,0 +1,104 @@
+# audio_stream.py
+
+import threading
+import time
+
+import numpy as np
+import speech_recognition as sr
+
+from . import config
+from .audio_bus import AudioBus
+
+class _QueueStream:
+    """
+    Minimal stand-in for a PyAudio stream: read() hands out captured chunks.
+    """
+    def __init__(self, chunks, stopped):
+        self._chunks = chunks
+        self._stopped = stopped
+
+    def read(self, size):
+        while not self._stopped.is_set():
+            chunk = self._chunks.get(timeout=0.1)
+            if chunk is not None:
+                return chunk.pcm
+        return b"" # Tells recognizer.listen the stream has ended
+
+
+class BufferedAudioSource(sr.AudioSource):
+    """
+    speech_recognition AudioSource fed from MicrophoneStream, so the recognizer
+    can keep using listen()/adjust_for_ambient_noise() while the microphone
+    itself is owned by the continuous capture thread.
+    """
+    def __init__(self, chunks, sample_rate, sample_width, chunk_size, stopped):
+        self.SAMPLE_RATE = sample_rate
+        self.SAMPLE_WIDTH = sample_width
+        self.CHUNK = chunk_size
+        self.stream = _QueueStream(chunks, stopped)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+class MicrophoneStream:
+    """
+    Continuously reads the microphone on its own thread. The capture thread
+    only converts each chunk to float32 samples and publishes it on an
+    AudioBus; analysis runs in the bus consumers (each with its own bounded
+    queue), so a slow consumer (STT, TTS, cry analysis) never stalls the
+    microphone.
+    """
+    def __init__(self, sample_rate=config.AUDIO_SAMPLE_RATE, chunk_size=config.AUDIO_CHUNK_SIZE):
+        self.sample_rate = sample_rate
+        self.chunk_size = chunk_size
+        self.sample_width = 2 # 16-bit PCM
+        self.bus = AudioBus()
+
+        self._stop_event = threading.Event()
+        self._started_event = threading.Event()
+        self._thread = None
+        self.error = None
+
+    def audio_source(self, name="stt-listen", maxsize=config.AUDIO_SUBSCRIBER_QUEUE_CHUNKS):
+        """
+        Returns a new speech_recognition AudioSource that receives the live audio.
+        """
+        return BufferedAudioSource(self.bus.subscribe(name, maxsize), self.sample_rate, self.sample_width,
+                                   self.chunk_size, self._stop_event)
+
+    def start(self, timeout=5.0):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._capture_loop, name="audio-capture", daemon=True)
+        self._thread.start()
+        self._started_event.wait(timeout)
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        self.bus.close()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _capture_loop(self):
+        try:
+            with sr.Microphone(sample_rate=self.sample_rate, chunk_size=self.chunk_size) as source:
+                self.sample_width = source.SAMPLE_WIDTH
+                self._started_event.set()
+                print(f"[{time.strftime('%H:%M:%S')}] Audio capture started at {self.sample_rate} Hz.")
+                while not self._stop_event.is_set():
+                    data = source.stream.read(self.chunk_size)
+                    samples = np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
+                    self.bus.publish(data, samples)
+        except Exception as e:
+            self.error = e
+            print(f"[{time.strftime('%H:%M:%S')}] Audio capture error: {e}")
+        finally:
+            self._started_event.set()
+            self._stop_event.set()
@@ -0,0 +1,4 @@
+# benchmarks/__init__.py
+#
+# Offline CPU benchmarks. Run from the directory containing the package, e.g.:
+#   python -m NubaGuard_AI.benchmarks.face_tracking_benchmark recorded_clip.mp4
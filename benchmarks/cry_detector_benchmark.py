@@ -0,0 +1,77 @@
+# benchmarks/cry_detector_benchmark.py
+#
+# CPU time and decision accuracy of the staged "fast" cry detector against the
+# original pyin-based decision, over a folder of labelled WAV clips:
+#
+#   clips/
+#     cry/*.wav
+#     not_cry/*.wav      (any other sub-folder name counts as "not cry")
+#
+#   python -m NubaGuard_AI.benchmarks.cry_detector_benchmark clips/ --window 3
+
+import argparse
+import os
+import time
+
+import librosa
+
+from .. import config
+from .. import cry_detection
+
+def load_labelled_clips(clips_dir, window_seconds):
+    clips = []
+    for label in sorted(os.listdir(clips_dir)):
+        label_dir = os.path.join(clips_dir, label)
+        if not os.path.isdir(label_dir):
+            continue
+        for filename in sorted(os.listdir(label_dir)):
+            if filename.lower().endswith(".wav"):
+                y, sr = librosa.load(os.path.join(label_dir, filename), sr=config.AUDIO_SAMPLE_RATE,
+                                     duration=window_seconds)
+                clips.append((filename, label == "cry", y, sr))
+    return clips
+
+def evaluate(clips, method):
+    decisions = []
+    start = time.process_time()
+    for _, _, y, sr in clips:
+        avg_rms, avg_cent, pitch_variance = cry_detection.summarize_features(
+            *cry_detection.compute_frame_features(y, sr, method=method))
+        decisions.append(cry_detection.is_cry(avg_rms, avg_cent, pitch_variance, method=method))
+    cpu_seconds = time.process_time() - start
+    return decisions, cpu_seconds
+
+def main():
+    parser = argparse.ArgumentParser(description="Fast vs pyin cry detector benchmark.")
+    parser.add_argument("clips_dir")
+    parser.add_argument("--window", type=float, default=config.CRY_WINDOW_SECONDS, help="Seconds of each clip to analyze")
+    args = parser.parse_args()
+
+    clips = load_labelled_clips(args.clips_dir, args.window)
+    if not clips:
+        print(f"Error: no labelled .wav clips found under {args.clips_dir}")
+        return
+    labels = [label for _, label, _, _ in clips]
+    print(f"{len(clips)} clips ({sum(labels)} cry, {len(labels) - sum(labels)} not cry), {args.window}s windows")
+
+    # Warm up librosa/numba so JIT compilation isn't counted against pyin.
+    cry_detection.compute_frame_features(clips[0][2], clips[0][3], method="pyin")
+
+    pyin_decisions, pyin_cpu = evaluate(clips, "pyin")
+    fast_decisions, fast_cpu = evaluate(clips, "fast")
+
+    def accuracy(decisions):
+        return sum(d == l for d, l in zip(decisions, labels)) / len(labels) * 100
+
+    agreement = sum(a == b for a, b in zip(pyin_decisions, fast_decisions)) / len(clips) * 100
+    print(f"{'method':<6} {'CPU ms/clip':>12} {'accuracy':>9}")
+    print(f"{'pyin':<6} {pyin_cpu * 1000 / len(clips):>12.1f} {accuracy(pyin_decisions):>8.1f}%")
+    print(f"{'fast':<6} {fast_cpu * 1000 / len(clips):>12.1f} {accuracy(fast_decisions):>8.1f}%")
+    print(f"CPU reduction: {pyin_cpu / max(fast_cpu, 1e-9):.1f}x, decision agreement with pyin: {agreement:.1f}%")
+
+    disagreements = [name for (name, _, _, _), a, b in zip(clips, pyin_decisions, fast_decisions) if a != b]
+    if disagreements:
+        print("Clips where the detectors disagree: " + ", ".join(disagreements))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# benchmarks/face_detection_benchmark.py
+#
+# Latency vs. recall of face detection at several detection scales, over the
+# reference photos in known_faces/ (each photo is expected to contain a face).
+#
+#   python -m NubaGuard_AI.benchmarks.face_detection_benchmark --scales 1.0 0.5 0.25 --model hog --upsample 1
+
+import argparse
+import os
+import time
+
+import face_recognition
+
+from .. import config
+from ..face_recognition_module import detect_face_locations
+
+def list_gallery_images(faces_dir):
+    image_paths = []
+    for person_name in sorted(os.listdir(faces_dir)):
+        person_dir = os.path.join(faces_dir, person_name)
+        if os.path.isdir(person_dir):
+            for filename in sorted(os.listdir(person_dir)):
+                if filename.lower().endswith(('.png', '.jpg', '.jpeg')):
+                    image_paths.append(os.path.join(person_dir, filename))
+    return image_paths
+
+def main():
+    parser = argparse.ArgumentParser(description="Face detection latency vs. recall per scale.")
+    parser.add_argument("--faces-dir", default=config.KNOWN_FACES_DIR)
+    parser.add_argument("--scales", type=float, nargs="+", default=[1.0, 0.75, 0.5, 0.25])
+    parser.add_argument("--model", default=config.FACE_DETECTION_MODEL, choices=["hog", "cnn"])
+    parser.add_argument("--upsample", type=int, default=config.FACE_DETECTION_UPSAMPLE)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    image_paths = list_gallery_images(args.faces_dir)
+    if not image_paths:
+        print(f"Error: no images found under {args.faces_dir}")
+        return
+    images = [face_recognition.load_image_file(path) for path in image_paths]
+    print(f"{len(images)} images, model={args.model}, upsample={args.upsample}, repeats={args.repeats}")
+    print(f"{'scale':>6} {'avg ms':>9} {'p95 ms':>9} {'recall':>8}")
+
+    for scale in args.scales:
+        latencies = []
+        found = 0
+        for image in images:
+            for repeat in range(args.repeats):
+                start = time.perf_counter()
+                locations = detect_face_locations(image, scale=scale, model=args.model, upsample=args.upsample)
+                latencies.append(time.perf_counter() - start)
+            if locations:
+                found += 1
+
+        latencies.sort()
+        avg_ms = sum(latencies) / len(latencies) * 1000
+        p95_ms = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+        print(f"{scale:>6.2f} {avg_ms:>9.1f} {p95_ms:>9.1f} {found / len(images) * 100:>7.1f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/face_tracking_benchmark.py
+#
+# Compares per-frame face recognition against the detect-once/track-between
+# FaceTracker on a recorded clip: frames/sec for each path, and identity
+# accuracy of the tracked path using the per-frame results as ground truth.
+#
+#   python -m NubaGuard_AI.benchmarks.face_tracking_benchmark clip.mp4 --detect-every 10 --tracker KCF
+
+import argparse
+import time
+
+import cv2
+
+from .. import config
+from .. import face_recognition_module
+from ..face_tracking import FaceTracker
+
+def load_frames(video_path, max_frames):
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    cap.release()
+    return frames
+
+def _iou(loc_a, loc_b):
+    top_a, right_a, bottom_a, left_a = loc_a
+    top_b, right_b, bottom_b, left_b = loc_b
+    inter_w = max(0, min(right_a, right_b) - max(left_a, left_b))
+    inter_h = max(0, min(bottom_a, bottom_b) - max(top_a, top_b))
+    inter = inter_w * inter_h
+    area_a = (right_a - left_a) * (bottom_a - top_a)
+    area_b = (right_b - left_b) * (bottom_b - top_b)
+    union = area_a + area_b - inter
+    return inter / union if union > 0 else 0.0
+
+def identity_accuracy(reference_results, tracked_results, min_iou=0.3):
+    """
+    Fraction of reference faces that the tracked path reports at roughly the
+    same place (IoU >= min_iou) with the same name.
+    """
+    total = 0
+    correct = 0
+    for reference, tracked in zip(reference_results, tracked_results):
+        for ref_location, ref_name in reference:
+            total += 1
+            best = max(tracked, key=lambda item: _iou(ref_location, item[0]), default=None)
+            if best is not None and _iou(ref_location, best[0]) >= min_iou and best[1] == ref_name:
+                correct += 1
+    return (correct / total) if total else 1.0
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-frame vs tracked face recognition benchmark.")
+    parser.add_argument("video", help="Recorded clip to replay")
+    parser.add_argument("--max-frames", type=int, default=300)
+    parser.add_argument("--detect-every", type=int, default=config.FACE_DETECT_EVERY_N_FRAMES)
+    parser.add_argument("--tracker", default=config.FACE_TRACKER_TYPE, help="KCF, CSRT, MOSSE or MIL")
+    args = parser.parse_args()
+
+    face_recognition_module.load_known_faces()
+    frames = load_frames(args.video, args.max_frames)
+    if not frames:
+        print(f"Error: no frames could be read from {args.video}")
+        return
+    print(f"Loaded {len(frames)} frames from {args.video}")
+
+    start = time.perf_counter()
+    reference_results = [face_recognition_module.detect_and_match_faces(frame) for frame in frames]
+    per_frame_seconds = time.perf_counter() - start
+
+    tracker = FaceTracker(detect_every_n=args.detect_every, tracker_type=args.tracker)
+    start = time.perf_counter()
+    tracked_results = [tracker.update(frame) for frame in frames]
+    tracked_seconds = time.perf_counter() - start
+
+    accuracy = identity_accuracy(reference_results, tracked_results)
+
+    print(f"Per-frame path : {len(frames) / per_frame_seconds:7.2f} fps ({per_frame_seconds * 1000 / len(frames):.1f} ms/frame)")
+    print(f"Tracked path   : {len(frames) / tracked_seconds:7.2f} fps ({tracked_seconds * 1000 / len(frames):.1f} ms/frame)")
+    print(f"Speed-up       : {per_frame_seconds / tracked_seconds:.2f}x")
+    print(f"Identity acc.  : {accuracy * 100:.1f}% (tracked vs per-frame reference)")
+    print(f"Tracker stats  : {tracker.get_stats()}")
+
+if __name__ == "__main__":
+    main()
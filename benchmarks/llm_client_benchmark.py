@@ -0,0 +1,86 @@
+# benchmarks/llm_client_benchmark.py
+#
+# Caller-side latency of LLM requests under load, using the local stub
+# backend (no network). Several "GUI" threads fire utterances drawn from a
+# small vocabulary, as a babbling baby would; compares:
+#   blocking  - one backend call per utterance on the caller's thread (old behaviour)
+#   client    - LLMClient.submit(): cache + coalescing + token bucket on the loop thread
+#
+#   python -m NubaGuard_AI.benchmarks.llm_client_benchmark --requests 200 --threads 4 --latency 0.3
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+
+import numpy as np
+
+from ..llm_client import LLMClient, StubLLMBackend, build_prompt
+
+UTTERANCES = ["mama", "Mama!", "dada", "baba", "ba ba ba", "play", "মা", "yes", "no no", "goo goo"]
+
+def run_threads(num_threads, requests_per_thread, fire):
+    caller_latencies = []
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        local = []
+        for _ in range(requests_per_thread):
+            utterance = rng.choice(UTTERANCES)
+            started = time.perf_counter()
+            fire(utterance)
+            local.append(time.perf_counter() - started)
+        with lock:
+            caller_latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(num_threads)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return np.array(caller_latencies) * 1000, time.perf_counter() - started
+
+def report(name, latencies_ms, wall_seconds, extra=""):
+    print(f"{name:<9} caller mean {latencies_ms.mean():9.3f} ms  p95 {np.percentile(latencies_ms, 95):9.3f} ms  "
+          f"max {latencies_ms.max():9.3f} ms  wall {wall_seconds:6.2f} s {extra}")
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM client latency benchmark with the stub backend.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.3, help="Simulated backend latency (s)")
+    parser.add_argument("--rate", type=float, default=600, help="Token bucket rate per minute")
+    args = parser.parse_args()
+    per_thread = max(1, args.requests // args.threads)
+
+    # Old behaviour: the calling thread waits for every backend call.
+    blocking_backend = StubLLMBackend(latency=args.latency)
+    fire_blocking = lambda u: asyncio.run(blocking_backend.generate(build_prompt(u, "awake/moving", "")))
+    latencies, wall = run_threads(args.threads, max(1, per_thread // 10), fire_blocking)
+    report("blocking", latencies, wall, f"({blocking_backend.calls} backend calls, 1/10 of the requests)")
+
+    client_backend = StubLLMBackend(latency=args.latency)
+    client = LLMClient(client_backend, rate_per_minute=args.rate, burst=5)
+    futures = []
+    futures_lock = threading.Lock()
+
+    def fire_client(utterance):
+        future = client.submit(utterance, "awake/moving", "teddy bear")
+        with futures_lock:
+            futures.append(future)
+
+    latencies, wall = run_threads(args.threads, per_thread, fire_client)
+    done_started = time.perf_counter()
+    for future in futures:
+        future.result()
+    stats = client.get_stats()
+    report("client", latencies, wall + (time.perf_counter() - done_started),
+           f"({stats['backend_calls']} backend calls, {stats['cache_hits']} cache hits, "
+           f"{stats['coalesced']} coalesced, response avg {stats['avg_ms']} ms)")
+    client.close()
+
+if __name__ == "__main__":
+    main()
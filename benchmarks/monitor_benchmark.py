@@ -0,0 +1,84 @@
+# benchmarks/monitor_benchmark.py
+#
+# Runs the headless monitoring core (NubaGuardMonitor: capture, analysis,
+# scheduler, state machine; no Tk, no rendering, no microphone) on a clip
+# played back at camera rate, and reports process CPU usage, analysis
+# throughput and per-analyzer rates. Pin Nuba's state to compare e.g. an
+# overnight static scene against an awake one.
+#
+#   python -m NubaGuard_AI.benchmarks.monitor_benchmark --video crib.mp4 --seconds 60 --state sleeping
+
+import argparse
+import time
+
+from .. import config
+from ..monitor import NubaGuardMonitor
+from .motion_detection_benchmark import load_frames
+
+class ClipCapture:
+    """
+    cv2.VideoCapture stand-in that loops over preloaded frames at a fixed rate.
+    """
+    def __init__(self, frames, fps):
+        self.frames = frames
+        self.interval = 1.0 / fps
+        self.index = 0
+        self._next = time.perf_counter()
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        delay = self._next - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self._next = max(self._next + self.interval, time.perf_counter() - self.interval)
+        frame = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        return True, frame
+
+    def release(self):
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless monitoring core CPU benchmark.")
+    parser.add_argument("--video", help="Recorded clip; a synthetic clip is used if omitted")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--fps", type=float, default=30.0, help="Camera rate the clip is played back at")
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--state", choices=["sleeping", "awake/moving"], help="Initial Nuba state")
+    parser.add_argument("--no-models", action="store_true", help="Skip loading known faces and YOLO")
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames, args.width, args.height)
+    if args.state:
+        config.current_nuba_state = args.state
+    config.TTS_CACHE_PREWARM = False
+
+    monitor = NubaGuardMonitor(capture=ClipCapture(frames, args.fps), render=False, listen=False,
+                               load_models=not args.no_models)
+    if not monitor.start():
+        return
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    try:
+        time.sleep(args.seconds)
+    finally:
+        cpu = time.process_time() - cpu_start
+        wall = time.perf_counter() - wall_start
+        stats = monitor.get_stats()
+        monitor.stop()
+
+    analysis = stats["pipeline"]["analysis"]
+    print(f"{len(frames)} frames of {frames[0].shape[1]}x{frames[0].shape[0]} at {args.fps:g} fps for {wall:.1f} s")
+    print(f"CPU {cpu / wall * 100:.1f}% of one core (this process), final state {stats['state']}, "
+          f"activity {stats['schedule']['activity']}")
+    print(f"Analysis {analysis['count']} frames, {analysis['avg_ms']} ms avg, dropped {analysis['dropped']}")
+    print(f"{'analyzer':<10} {'target Hz':>10} {'runs':>8} {'avg ms':>8} {'skipped':>8}")
+    for name, analyzer in stats["schedule"]["analyzers"].items():
+        print(f"{name:<10} {analyzer['target_hz']:>10g} {analyzer['count']:>8} {analyzer['avg_ms']:>8} {analyzer['skipped']:>8}")
+
+if __name__ == "__main__":
+    main()
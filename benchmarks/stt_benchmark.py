@@ -0,0 +1,87 @@
+# benchmarks/stt_benchmark.py
+#
+# Latency of each STT backend over recorded WAV fixtures. An optional
+# transcript next to a fixture (same name, .txt) is compared with the result.
+# Backends are created once, so "load" is the one-off model load and the
+# per-utterance numbers are what the listener pays for every phrase.
+#
+#   python -m NubaGuard_AI.benchmarks.stt_benchmark fixtures/ --backends fake vosk google
+
+import argparse
+import os
+import time
+
+import numpy as np
+import speech_recognition as sr
+
+from .. import stt_backends
+
+def load_fixtures(fixtures_dir):
+    recognizer = sr.Recognizer()
+    fixtures = []
+    for filename in sorted(os.listdir(fixtures_dir)):
+        if not filename.lower().endswith(".wav"):
+            continue
+        path = os.path.join(fixtures_dir, filename)
+        with sr.AudioFile(path) as source:
+            audio_data = recognizer.record(source)
+        expected = None
+        transcript_path = os.path.splitext(path)[0] + ".txt"
+        if os.path.exists(transcript_path):
+            with open(transcript_path, encoding="utf-8") as f:
+                expected = f.read().strip().lower()
+        fixtures.append((filename, audio_data, expected))
+    return fixtures
+
+def benchmark_backend(backend_name, fixtures, repeat):
+    started = time.perf_counter()
+    backend = stt_backends.create_stt_backend(backend_name)
+    load_ms = (time.perf_counter() - started) * 1000
+    if backend.name != backend_name:
+        print(f"{backend_name}: not available, skipped")
+        return
+
+    latencies = []
+    failures = 0
+    matches = 0
+    with_transcript = 0
+    for _ in range(repeat):
+        for _, audio_data, expected in fixtures:
+            started = time.perf_counter()
+            try:
+                text = backend.transcribe(audio_data)
+            except (sr.UnknownValueError, sr.RequestError):
+                text = None
+                failures += 1
+            latencies.append(time.perf_counter() - started)
+            if expected is not None:
+                with_transcript += 1
+                matches += int(text is not None and text.strip().lower() == expected)
+
+    latencies_ms = np.array(latencies) * 1000
+    line = (f"{backend_name:<8} load {load_ms:8.1f} ms | mean {latencies_ms.mean():8.1f} ms "
+            f"p50 {np.percentile(latencies_ms, 50):8.1f} ms p95 {np.percentile(latencies_ms, 95):8.1f} ms | "
+            f"no result {failures}/{len(latencies)}")
+    if with_transcript:
+        line += f" | exact transcript {matches}/{with_transcript}"
+    print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="STT backend latency benchmark.")
+    parser.add_argument("fixtures_dir", help="Folder of .wav utterances (optional .txt transcripts)")
+    parser.add_argument("--backends", nargs="+", default=["fake", "vosk"], choices=["fake", "vosk", "google"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures_dir)
+    if not fixtures:
+        print(f"Error: no .wav fixtures found in {args.fixtures_dir}")
+        return
+    total_seconds = sum(len(a.frame_data) / (a.sample_rate * a.sample_width) for _, a, _ in fixtures)
+    print(f"{len(fixtures)} fixtures, {total_seconds:.1f} s of audio, {args.repeat} passes")
+
+    for backend_name in args.backends:
+        benchmark_backend(backend_name, fixtures, args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/yolo_backend_benchmark.py
+#
+# CPU benchmark of the YOLO detector across backends, input sizes and batch
+# sizes. Reports per-frame latency and throughput for each configuration.
+#
+#   python -m NubaGuard_AI.benchmarks.yolo_backend_benchmark --backends opencv onnxruntime \
+#       --sizes 320 416 608 --batches 1 4 --threads 4 --video clip.mp4
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from .. import config
+from ..object_detection_module import create_detector
+
+def load_frames(video_path, count):
+    if video_path:
+        cap = cv2.VideoCapture(video_path)
+        frames = []
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+        if frames:
+            return frames
+        print(f"Warning: could not read {video_path}, using synthetic frames.")
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(count)]
+
+def run_configuration(detector, frames, batch_size, warmup=2):
+    batches = [frames[i:i + batch_size] for i in range(0, len(frames), batch_size)]
+    for batch in batches[:warmup]:
+        detector.detect_batch(batch)
+
+    start = time.perf_counter()
+    for batch in batches:
+        detector.detect_batch(batch)
+    elapsed = time.perf_counter() - start
+    return elapsed * 1000 / len(frames), len(frames) / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="YOLO backend / input size / batch benchmark.")
+    parser.add_argument("--backends", nargs="+", default=["opencv"], choices=["opencv", "onnxruntime"])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[320, 416, 608])
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--threads", type=int, default=config.YOLO_NUM_THREADS)
+    parser.add_argument("--target", default=config.YOLO_OPENCV_TARGET)
+    parser.add_argument("--video", help="Clip to take frames from (random frames if omitted)")
+    parser.add_argument("--frames", type=int, default=32)
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames)
+    print(f"{len(frames)} frames, threads={args.threads or 'default'}")
+    print(f"{'backend':<12} {'size':>5} {'batch':>6} {'ms/frame':>10} {'frames/s':>10}")
+
+    for backend_name in args.backends:
+        for size in args.sizes:
+            try:
+                detector = create_detector(backend_name, input_size=size, target=args.target, num_threads=args.threads)
+            except Exception as e:
+                print(f"{backend_name:<12} {size:>5}  unavailable: {e}")
+                continue
+            for batch_size in args.batches:
+                ms_per_frame, fps = run_configuration(detector, frames, batch_size)
+                print(f"{backend_name:<12} {size:>5} {batch_size:>6} {ms_per_frame:>10.1f} {fps:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/yolo_decode_benchmark.py
+#
+# Micro-benchmark of YOLO post-processing: the original per-row Python loop vs
+# the batched decode_yolo_outputs, on recorded network outputs.
+#
+# Record outputs once from a real frame (needs the YOLO weights):
+#   python -m NubaGuard_AI.benchmarks.yolo_decode_benchmark --record frame.jpg outs.npz
+# Then benchmark the decode stage on them:
+#   python -m NubaGuard_AI.benchmarks.yolo_decode_benchmark outs.npz
+# Without an outputs file, synthetic yolov3-tiny shaped outputs (2535 rows) are used.
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from .. import config
+from .. import object_detection_module
+from ..object_detection_module import decode_yolo_outputs
+
+def legacy_decode(outs, width, height):
+    """
+    The original per-row decode loop, kept here as the reference implementation.
+    """
+    class_ids = []
+    confidences = []
+    boxes = []
+
+    for out in outs:
+        for detection in out:
+            scores = detection[5:]
+            class_id = np.argmax(scores)
+            confidence = scores[class_id]
+            if confidence > config.YOLO_CONFIDENCE_THRESHOLD:
+                center_x = int(detection[0] * width)
+                center_y = int(detection[1] * height)
+                w = int(detection[2] * width)
+                h = int(detection[3] * height)
+                x = int(center_x - w / 2)
+                y = int(center_y - h / 2)
+                boxes.append([x, y, w, h])
+                confidences.append(float(confidence))
+                class_ids.append(class_id)
+    return boxes, confidences, class_ids
+
+def record_outputs(image_path, output_path):
+    object_detection_module.load_yolo_model()
+    if object_detection_module.detector is None:
+        return
+    frame = cv2.imread(image_path)
+    outs = object_detection_module.detector.forward_batch([frame])[0]
+    height, width = frame.shape[:2]
+    np.savez(output_path, width=width, height=height, **{f"out{i}": out for i, out in enumerate(outs)})
+    print(f"Recorded {len(outs)} output layers ({sum(len(o) for o in outs)} rows) to {output_path}")
+
+def synthetic_outputs(rng, num_classes=80):
+    outs = []
+    for grid in (13, 26): # yolov3-tiny: 3 anchors per cell on two scales
+        rows = grid * grid * 3
+        out = rng.random((rows, 5 + num_classes), dtype=np.float32) * 0.4
+        hot = rng.choice(rows, size=rows // 100, replace=False)
+        out[hot, 5 + rng.integers(0, num_classes, size=len(hot))] = rng.uniform(0.5, 1.0, size=len(hot))
+        outs.append(out)
+    return outs
+
+def time_decode(decode, outs, width, height, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        decode(outs, width, height)
+    return (time.perf_counter() - start) / repeats
+
+def main():
+    parser = argparse.ArgumentParser(description="YOLO decode micro-benchmark.")
+    parser.add_argument("outputs", nargs="?", help=".npz of recorded output layers")
+    parser.add_argument("--record", nargs=2, metavar=("IMAGE", "OUTPUT_NPZ"))
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.record:
+        record_outputs(*args.record)
+        return
+
+    if args.outputs:
+        with np.load(args.outputs) as data:
+            width, height = int(data["width"]), int(data["height"])
+            outs = [data[key] for key in sorted(k for k in data.files if k.startswith("out"))]
+    else:
+        width, height = 640, 480
+        outs = synthetic_outputs(np.random.default_rng(0))
+
+    reference = legacy_decode(outs, width, height)
+    vectorized = decode_yolo_outputs(outs, width, height)
+    same = (reference[0] == vectorized[0] and reference[1] == vectorized[1]
+            and [int(c) for c in reference[2]] == vectorized[2])
+
+    legacy_s = time_decode(legacy_decode, outs, width, height, args.repeats)
+    vectorized_s = time_decode(decode_yolo_outputs, outs, width, height, args.repeats)
+
+    print(f"Rows: {sum(len(o) for o in outs)}, candidates above threshold: {len(reference[0])}")
+    print(f"Legacy loop : {legacy_s * 1000:8.3f} ms")
+    print(f"Vectorized  : {vectorized_s * 1000:8.3f} ms")
+    print(f"Speed-up    : {legacy_s / vectorized_s:.1f}x")
+    print(f"Identical output: {same}")
+
+if __name__ == "__main__":
+    main()
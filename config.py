@@ -7,17 +7,38 @@ import time
 GEMINI_API_KEY = "Your API Key" # Your actual API key
 GEMINI_MODEL_NAME = 'models/gemini-1.5-pro' # As per your successful debug
 
+GEMINI_BACKEND = "gemini" # "gemini", or "stub" (local canned replies for tests and benchmarks)
+
 # --- Global Variables for Cooldowns (shared across modules) ---
 LAST_GEMINI_CALL_TIME = 0
-GEMINI_COOLDOWN_SECONDS = 5 # Reduced cooldown as billing is active
+# Token bucket instead of a hard cooldown: bursts wait briefly for a token.
+GEMINI_RATE_PER_MINUTE = 12       # Sustained API calls per minute (same as the old 5 s cooldown)
+GEMINI_RATE_BURST = 3             # Calls that may go out back to back
+GEMINI_RATE_MAX_WAIT_SECONDS = 10 # Longer waits answer with a canned line instead
+GEMINI_REQUEST_TIMEOUT_SECONDS = 20
+GEMINI_CACHE_TTL_SECONDS = 300    # Responses are reused for the same utterance, state and objects
+GEMINI_CACHE_MAX_ENTRIES = 256
 
 # --- Configuration for Alerts ---
 ALERT_SOUND_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alert_chime.wav")
 MOTION_DURATION_THRESHOLD = 2.0 # Can be adjusted after debugging
 
 # --- Configuration for AI Voice ---
-AI_SPEECH_FILENAME = "nuba_ai_speech.mp3" # Temporary file for AI's speech
 AI_SPEECH_LANG = 'en' # Default language for AI's speech
+AI_SPEECH_VOICE = 'com' # gTTS top-level domain, selects the accent ('com', 'co.uk', 'com.au', ...)
+
+# --- TTS Phrase Cache ---
+# Synthesized speech is stored by hash of (text, lang, voice); repeated phrases play
+# without calling gTTS. Least recently used files are evicted above the size limit.
+TTS_CACHE_ENABLED = True
+TTS_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tts_cache")
+TTS_CACHE_MAX_BYTES = 50 * 1024 * 1024
+TTS_CACHE_PREWARM = True # Synthesize the fixed phrases below in the background at startup
+
+# --- Speech Output Queue ---
+SPEECH_QUEUE_MAX_SIZE = 8           # Phrases waiting to be spoken
+SPEECH_MAX_QUEUE_AGE_SECONDS = 15   # Phrases that waited longer are dropped instead of spoken late
+SPEECH_ALERT_CLEARS_CHATTER = True  # A cry/alert phrase cancels play chatter still waiting in the queue
 
 NUBA_PLAY_PHRASES = [
     {"text": "Hello Nuba. Are you awake now?", "lang": "en"},
@@ -38,9 +59,31 @@ NUBA_PLAY_PHRASES = [
 ]
 AI_SPEAK_INTERVAL = 10
 
+# GUI quick-speech buttons: (button label, phrase)
+GUI_SPEECH_BUTTONS = [
+    ("Say Hello (EN)", {"text": "Hello Nuba!", "lang": "en"}),
+    ("Suggest Play (EN)", {"text": "Want to play, Nuba?", "lang": "en"}),
+    ("কেমন আছো নূবা? (BN)", {"text": "কেমন আছো নূবা?", "lang": "bn"}),
+    ("কান্না কেন? (BN)", {"text": "নূবা, কান্না করছো কেন?", "lang": "bn"}),
+    ("Hello Anmona (EN)", {"text": "Hello Anmona! How are you?", "lang": "en"}),
+    ("Hello Dada (EN)", {"text": "Hello Dada! Nuba is so happy you are here.", "lang": "en"}),
+]
+
+# Greetings for recognized faces (one is picked at random)
+FACE_GREETING_PHRASES = {
+    "nuba": ["Hello, Nuba!", "Is that Nuba?", "Hi, sweet Nuba!"],
+    "anmona": ["Hello, Anmona!", "Welcome, Anmona!", "Hi there, Anmona!"],
+    "dada": ["Hello, Dada!", "Good to see you, Dada!", "Hi, Dada!"],
+}
+
+CRY_ALERT_PHRASE = {"text": "Oh, Nuba is crying! Mama is coming!", "lang": "en"}
+GOODNIGHT_PHRASE = {"text": "Good night, Nuba. Sweet dreams.", "lang": "en"}
+NO_RESPONSE_PHRASE = {"text": "I'm not sure what to say, Nuba!", "lang": "en"}
+
 # --- Configuration for AI Listening ---
 AI_LISTEN_INTERVAL = 15
 AI_LISTEN_DURATION = 3
+STT_RESULT_MAX_AGE_SECONDS = AI_LISTEN_DURATION + 5 # Recognized phrases not answered within this are dropped
 
 # --- Keyword Responses (Mostly replaced by Gemini, but can be a fallback/direct trigger) ---
 KEYWORD_RESPONSES = {
@@ -52,28 +95,129 @@ KEYWORD_RESPONSES = {
     "love": {"text": "I love you too, Nuba!", "lang": "en"},
     "baby": {"text": "Yes, you are my sweet little baby!", "lang": "en"},
     "smile": {"text": "I hope you are smiling, Nuba!", "lang": "en"},
-    "মা": {"text": "হ্যাঁ নূবা, মা তোমার পাশেই আছে।", "lang": "bn"}
+    "মা": {"text": "হ্যাঁ নূবা, মা তোমার পাশেই আছে।", "lang": "bn"},
+    "বাবা": {"text": "বাবা তোমার কথা ভাবছে, নূবা!", "lang": "bn"},
+    "খেলা": {"text": "চলো নূবা, আমরা খেলি!", "lang": "bn"},
+    "ভালোবাসি": {"text": "আমিও তোমাকে অনেক ভালোবাসি, নূবা!", "lang": "bn"},
+    "হ্যাঁ": {"text": "খুব ভালো! আরও বলো।", "lang": "bn"}
+}
+
+# Only utterances of at most this many words are answered from KEYWORD_RESPONSES. In a longer
+# sentence the keyword is rarely the point ("the baby is not sleeping"), so it goes to the LLM.
+KEYWORD_MAX_UTTERANCE_WORDS = 3
+
+# Other words/phrases answered like a KEYWORD_RESPONSES key. Bengali words map to a
+# Bengali key so the reply stays in the language Nuba was spoken to in. There is no
+# Bengali "no": "না" is also the everyday negation and would fire on most sentences.
+KEYWORD_ALIASES = {
+    "mommy": "mama", "mom": "mama", "mummy": "mama", "ammu": "mama", "আম্মা": "মা", "আম্মু": "মা", "মামনি": "মা",
+    "daddy": "dada", "dad": "dada", "papa": "dada", "baba": "dada", "আব্বু": "বাবা",
+    "playtime": "play", "let's play": "play", "খেলবো": "খেলা",
+    "i love you": "love",
+    "yeah": "yes",
+    "nope": "no",
 }
 
 # --- Configuration for Sleep Detection ---
 INACTIVITY_SLEEP_THRESHOLD = 15
 SLEEP_SOUND_FILE = "good_night_nuba.mp3" # Or use a gTTS phrase
 
+# --- Motion Detection Configuration ---
+MOTION_DETECTION_SCALE = 0.5      # Frames are diffed at this fraction of the camera resolution
+MOTION_DIFF_THRESHOLD = 25        # Gray-level change that counts as a moving pixel
+MOTION_MIN_AREA = 800             # Minimum contour area (full-resolution pixels) for significant motion
+MOTION_BACKGROUND_MODEL = "frame" # "frame" (previous frame), "running_average" or "mog2" (robust to lighting drift)
+MOTION_BACKGROUND_ALPHA = 0.05    # Learning rate of the running-average / MOG2 background
+MOTION_STATIC_PIXEL_RATIO = 0.05  # Skip contour analysis if fewer changed pixels than this fraction of MOTION_MIN_AREA
+# Crib regions to watch, as polygons in normalized (0..1) frame coordinates; None watches the whole frame.
+# e.g. [[(0.2, 0.3), (0.8, 0.3), (0.8, 1.0), (0.2, 1.0)]]
+MOTION_ROI = None
+
 # --- Configuration for Data Logging ---
 LOG_FILE = "nuba_activity_log.csv"
 LOG_HEADERS = ["Timestamp", "Event_Type", "Nuba_State", "Details"]
+LOG_FLUSH_BATCH_SIZE = 50         # Write as soon as this many events are queued...
+LOG_FLUSH_INTERVAL_SECONDS = 2.0  # ...or at least this often
+LOG_ROTATE_DAILY = True           # Start a new CSV segment when the date changes...
+LOG_MAX_BYTES = 5 * 1024 * 1024   # ...or when the current one reaches this size
+LOG_COMPRESS_SEGMENTS = True      # gzip closed segments
+LOG_SQLITE_ENABLED = True         # Also keep an indexed SQLite (WAL) copy for fast queries
+LOG_DB_FILE = "nuba_activity_log.db"
+NIGHT_START_HOUR = 19             # Window used by the "wake-ups per night" query
+NIGHT_END_HOUR = 7
+LOG_FSYNC_EVENTS = {               # Written and fsynced immediately
+    "System_Start", "System_Stop", "System_Error",
+    "Nuba_Woke_Up", "Nuba_Asleep", "Cry_Detected",
+}
+# Coalesced into one span row (count, start/end, peak value) per burst instead of one row per occurrence.
+EVENT_AGGREGATION = {
+    "Motion_Detected": {
+        "gap_seconds": 3.0,     # A burst ends after this long without the event...
+        "window_seconds": 60.0, # ...or when it has lasted this long
+        "value_label": "peak_area",
+    },
+}
+EVENT_RATE_LIMITS = {              # (rows per minute, burst); extra events are dropped and counted
+    "Motion_Start": (6, 3),
+    "Alert_Sound_Error": (1, 1),
+}
 
 # --- Face Recognition Configuration ---
 _current_dir = os.path.dirname(os.path.abspath(__file__))
 KNOWN_FACES_DIR = os.path.join(_current_dir, "known_faces")
 RECOGNITION_COOLDOWN_SECONDS = 15
+FACE_MATCH_TOLERANCE = 0.6 # Max embedding distance for a match (face_recognition default)
+FACE_MATCH_MODE = "all"    # "all" encodings, or one "centroid"/"medoid" per person
+FACE_ENCODING_CACHE_ENABLED = True
+FACE_ENCODING_CACHE_FILE = os.path.join(_current_dir, "known_faces_cache.npz")
+FACE_DETECTION_SCALE = 0.5   # Detect on a downscaled frame; boxes are mapped back to full resolution
+FACE_DETECTION_MODEL = "hog" # "hog" (CPU) or "cnn" (much slower without CUDA)
+FACE_DETECTION_UPSAMPLE = 1  # number_of_times_to_upsample passed to face_locations
+FACE_RECOGNITION_USE_PROCESS_POOL = True # Run dlib detection/encoding in worker processes
+FACE_RECOGNITION_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+FACE_RECOGNITION_START_METHOD = "spawn" # Or "forkserver"; forking while the camera/audio threads run can deadlock the workers
+
+# Detect-once, track-between mode (takes precedence over the process pool when enabled)
+FACE_TRACKING_ENABLED = False
+FACE_DETECT_EVERY_N_FRAMES = 10   # Full detection + encoding every N tracked frames...
+FACE_DETECT_MAX_INTERVAL_SECONDS = 2.0 # ...and at least this often, however slowly faces are scheduled
+FACE_TRACK_MAX_GAP_SECONDS = 0.5  # Longer gaps between updates re-detect instead of stepping the trackers
+FACE_TRACKER_TYPE = "KCF"         # KCF, CSRT, MOSSE (opencv-contrib) or MIL
+FACE_SCENE_CHANGE_THRESHOLD = 12  # Mean gray-level change of a 32x24 thumbnail that forces re-detection
+FACE_TRACK_DRIFT_THRESHOLD = 0.35 # Relative box size/position change that triggers a re-encode
+
+# --- Audio Capture Configuration ---
+AUDIO_SAMPLE_RATE = 16000         # Shared by cry detection and speech-to-text
+AUDIO_CHUNK_SIZE = 1024           # Frames per microphone read
+AUDIO_SUBSCRIBER_QUEUE_CHUNKS = 200 # ~13 s of chunks per consumer before the oldest are dropped
+STT_QUEUE_SIZE = 3                # Captured phrases waiting for recognition before the oldest is dropped
+
+# --- Speech-to-Text Backend Configuration ---
+STT_BACKEND = "google"            # "google" (network), "vosk" (local CPU model) or "fake" (deterministic, for tests)
+STT_LANGUAGE = "en-US"
+STT_VOSK_MODEL_DIR = os.path.join(_current_dir, "model_data", "vosk-model-small-en-us-0.15")
 
 # --- Cry Detection Configuration ---
-CRY_AUDIO_TEMP_FILE = os.path.join(_current_dir, "temp_cry_audio.wav")
+CRY_WINDOW_SECONDS = 3            # Decision window (same length as the old listen chunk)
+CRY_HOP_SECONDS = 1               # New window every hop; features are computed once per hop
 CRY_SPECTRAL_CENTROID_THRESHOLD = 2500
 CRY_RMS_THRESHOLD = 0.02
 CRY_PITCH_VARIANCE_THRESHOLD = 150
 CRY_ALERT_COOLDOWN_SECONDS = 30
+# "pyin" (original), or "fast" (staged detector, far less CPU). Switch to "fast" only after calibrating
+# CRY_FAST_PITCH_VARIANCE_THRESHOLD on labelled clips and recording the result below.
+CRY_PITCH_METHOD = "pyin"
+CRY_ENERGY_GATE = 0.01            # Blocks/frames quieter than this skip spectral and pitch analysis
+CRY_PITCH_FMIN = 250              # Infant cry F0 band searched by the fast pitch estimator (Hz)
+CRY_PITCH_FMAX = 1000
+CRY_VOICING_THRESHOLD = 0.6       # Normalized autocorrelation peak needed to call a frame voiced
+CRY_FAST_PITCH_VARIANCE_THRESHOLD = 4.0 # Semitone variance threshold for the fast estimator (the band spans
+                                        # only 24 semitones). Not yet calibrated: no accuracy or pyin agreement
+                                        # measured. Calibrate with benchmarks/cry_detector_benchmark.py.
+CRY_CLASSIFIER_ENABLED = True     # Use the trained model when CRY_CLASSIFIER_FILE exists, thresholds otherwise
+CRY_CLASSIFIER_FILE = os.path.join(_current_dir, "model_data", "cry_classifier.joblib")
+CRY_CLASSIFIER_THRESHOLD = 0.5    # P(cry) needed to raise an alert
+CRY_MFCC_COUNT = 13               # MFCCs summarized (mean/std) in the classifier features
 
 # --- Object Detection Configuration (New for Day 23) ---
 MODEL_DATA_DIR = os.path.join(_current_dir, "model_data")
@@ -81,9 +225,22 @@ YOLO_WEIGHTS = os.path.join(MODEL_DATA_DIR, "yolov3-tiny.weights")
 YOLO_CONFIG = os.path.join(MODEL_DATA_DIR, "yolov3-tiny.cfg")
 COCO_NAMES = os.path.join(MODEL_DATA_DIR, "coco.names")
 
+YOLO_ONNX_MODEL = os.path.join(MODEL_DATA_DIR, "yolov3-tiny.onnx") # Raw-head export, used by the onnxruntime backend
+
+YOLO_BACKEND = "opencv"      # "opencv" (cv2.dnn) or "onnxruntime" (CPU execution provider)
+YOLO_OPENCV_TARGET = "cpu"   # cv2.dnn target: "cpu", "opencl" or "opencl_fp16"
+YOLO_NUM_THREADS = 0         # Inference threads; 0 keeps the library default
+YOLO_INPUT_SIZE = 416        # Network input size: 320 (fastest), 416 or 608 (most accurate)
+
 YOLO_CONFIDENCE_THRESHOLD = 0.5 # Minimum confidence to detect an object
 YOLO_NMS_THRESHOLD = 0.3      # Non-maximum suppression threshold
 
+# Background object detection worker
+OBJECT_DETECTION_RATE_HZ = 1.0     # How often YOLO runs on the latest frame
+OBJECT_LABEL_DECAY_SECONDS = 10.0  # Time constant of the per-label score decay
+OBJECT_LABEL_MIN_SCORE = 1.5       # Score needed before a label is published (about 2 recent sightings)
+OBJECT_LABEL_DROP_SCORE = 0.5      # Labels decaying below this are withdrawn
+
 # Pre-load YOLO classes
 YOLO_CLASSES = []
 if os.path.exists(COCO_NAMES):
@@ -93,6 +250,41 @@ else:
     print(f"[{time.strftime('%H:%M:%S')}] Warning: {COCO_NAMES} not found. Object detection class names will be missing.")
     YOLO_CLASSES = [f"Class {i}" for i in range(80)] # Fallback names
 
+# --- Video Pipeline Configuration ---
+VIDEO_DISPLAY_FPS = 30          # Rate at which finished frames are handed to the GUI
+VIDEO_FRAME_QUEUE_SIZE = 2      # Bounded capture->analysis queue; oldest frame is dropped when full
+VIDEO_ANALYSIS_WORKERS = 1      # Analysis worker threads (motion/state logic stays serialized)
+VIDEO_READ_RETRY_SECONDS = 0.01     # First retry after a failed camera read; doubles while the reads keep failing...
+VIDEO_READ_MAX_RETRY_SECONDS = 2.0  # ...up to this. One System_Error is logged per outage, not per read.
+
+# --- Live View Server ---
+# MJPEG stream of the annotated video plus state/events over WebSocket (needs aiohttp).
+# There is no authentication: keep it on the home network.
+LIVE_VIEW_ENABLED = False
+LIVE_VIEW_HOST = "0.0.0.0"             # "127.0.0.1" to only allow viewers on this machine
+LIVE_VIEW_PORT = 8080
+LIVE_VIEW_FPS = 10                     # Frames sampled for streaming; each is JPEG-encoded once per width
+LIVE_VIEW_WIDTHS = (640, 320)          # Output widths offered (?width=); other requests snap to the nearest
+LIVE_VIEW_JPEG_QUALITY = 75
+LIVE_VIEW_WRITE_BUFFER_BYTES = 256 * 1024 # Unsent data per client before it waits; slow clients skip frames
+LIVE_VIEW_STATE_INTERVAL_SECONDS = 2.0 # How often WebSocket clients get a state/stats update
+LIVE_VIEW_EVENT_QUEUE_SIZE = 50        # Events buffered per WebSocket client before the oldest are dropped
+
+# --- Adaptive Analysis Scheduling ---
+# Target runs per second of each analyzer by activity: asleep with a static scene,
+# asleep with recent motion, or awake. "stt" limits phrases sent for recognition
+# (cry detection always runs). The sleeping_static rate is also each analyzer's floor.
+ANALYSIS_RATES_HZ = {
+    "motion":  {"sleeping_static": 2.0,  "sleeping_motion": 15.0, "awake": 15.0},
+    "faces":   {"sleeping_static": 0.2,  "sleeping_motion": 5.0,  "awake": 5.0},
+    "objects": {"sleeping_static": 0.05, "sleeping_motion": 0.5,  "awake": 1.0},
+    "stt":     {"sleeping_static": 0.0,  "sleeping_motion": 1.0,  "awake": 1.0},
+}
+ANALYSIS_PRIORITY = ("motion", "stt", "faces", "objects") # Order in which the CPU budget is granted
+ANALYSIS_CPU_BUDGET = 0.5            # CPU cores the scheduled analyzers may use together
+ANALYSIS_MOTION_HOLD_SECONDS = 10.0  # Keep the "sleeping_motion" rates this long after the last motion
+VIDEO_STATS_INTERVAL_MS = 1000  # How often the GUI refreshes the pipeline stats label
+
 # --- Global variable for Nuba's state (managed in GUI, but accessible globally) ---
 current_nuba_state = "sleeping"
 
@@ -0,0 +1,276 @@
+# cry_classifier.py
+#
+# Trainable cry classifier: MFCC statistics plus the hand-made cry features
+# (RMS, spectral centroid, pitch variance), a StandardScaler and a linear or
+# gradient-boosted model, persisted with joblib and used in-process by the
+# streaming cry detector.
+#
+# Training data is a folder of labelled clips (any other sub-folder name
+# counts as "not cry"); clips are cut into CRY_WINDOW_SECONDS windows:
+#
+#   clips/
+#     cry/*.wav
+#     not_cry/*.wav
+#
+#   python -m NubaGuard_AI.cry_classifier train clips/ --model logistic --workers 8
+#   python -m NubaGuard_AI.cry_classifier evaluate clips/
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import librosa
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from . import config
+from . import cry_detection
+
+BASE_FEATURE_NAMES = ["rms", "spectral_centroid", "pitch_variance"]
+
+def feature_names(n_mfcc=config.CRY_MFCC_COUNT):
+    return ([f"mfcc{i}_mean" for i in range(n_mfcc)] +
+            [f"mfcc{i}_std" for i in range(n_mfcc)] +
+            BASE_FEATURE_NAMES)
+
+def hop_features(y, sr, n_mfcc=config.CRY_MFCC_COUNT):
+    """
+    Frame-level features of one block of samples: (rms, centroid, voiced f0, mfcc),
+    with mfcc shaped (n_mfcc, frames). Blocks can be concatenated before summarizing.
+    """
+    rms, cent, f0 = cry_detection.compute_frame_features(y, sr, method="fast")
+    mfcc = librosa.feature.mfcc(y=np.asarray(y, dtype=np.float32), sr=sr, n_mfcc=n_mfcc,
+                                n_fft=cry_detection.FRAME_LENGTH, hop_length=cry_detection.HOP_LENGTH)
+    return rms, cent, f0, mfcc
+
+def feature_vector(hops):
+    """
+    Summarizes a window made of one or more hop_features() tuples into a 1-D vector
+    laid out as feature_names().
+    """
+    rms = np.concatenate([h[0] for h in hops])
+    cent = np.concatenate([h[1] for h in hops])
+    f0 = np.concatenate([h[2] for h in hops])
+    mfcc = np.concatenate([h[3] for h in hops], axis=1)
+    avg_rms, avg_cent, pitch_variance = cry_detection.summarize_features(rms, cent, f0)
+    return np.concatenate((mfcc.mean(axis=1), mfcc.std(axis=1),
+                           [avg_rms, avg_cent, pitch_variance])).astype(np.float32)
+
+def extract_features(y, sr, hop_seconds=config.CRY_HOP_SECONDS):
+    """
+    Feature vector of one window, computed hop by hop exactly as the streaming
+    detector does (frames never straddle a hop boundary), so training and
+    serving see the same features.
+    """
+    return feature_vector([hop_features(hop, sr) for hop in split_windows(y, int(hop_seconds * sr))])
+
+def extract_feature_matrix(windows, sr):
+    """
+    Feature matrix (n_windows, n_features) for a batch of sample blocks.
+    """
+    if not windows:
+        return np.zeros((0, len(feature_names())), dtype=np.float32)
+    return np.vstack([extract_features(y, sr) for y in windows])
+
+def split_windows(y, window_samples):
+    """
+    Cuts a clip into consecutive windows; a clip shorter than one window is kept whole.
+    """
+    if len(y) <= window_samples:
+        return [y]
+    return [y[start:start + window_samples] for start in range(0, len(y) - window_samples + 1, window_samples)]
+
+
+class CryClassifier:
+    """
+    StandardScaler + classifier. For linear models the scaler is folded into
+    the weights once, so predict_proba is a single dot product and sigmoid with
+    no per-call sklearn overhead; other models go through sklearn.
+    """
+    def __init__(self, scaler, model, names=None, sample_rate=config.AUDIO_SAMPLE_RATE):
+        self.scaler = scaler
+        self.model = model
+        self.feature_names = names or feature_names()
+        self.sample_rate = sample_rate
+
+        self._weights = None
+        self._bias = 0.0
+        coef = getattr(model, "coef_", None)
+        if coef is not None and coef.shape[0] == 1 and hasattr(model, "predict_proba"):
+            positive = list(model.classes_).index(1)
+            sign = 1.0 if positive == 1 else -1.0
+            w = sign * coef[0] / scaler.scale_
+            self._weights = w.astype(np.float64)
+            self._bias = float(sign * model.intercept_[0] - np.dot(w, scaler.mean_))
+
+    @classmethod
+    def load(cls, path=config.CRY_CLASSIFIER_FILE):
+        data = joblib.load(path)
+        return cls(data["scaler"], data["model"], data.get("feature_names"), data.get("sample_rate", config.AUDIO_SAMPLE_RATE))
+
+    def save(self, path=config.CRY_CLASSIFIER_FILE):
+        joblib.dump({
+            "scaler": self.scaler,
+            "model": self.model,
+            "feature_names": self.feature_names,
+            "sample_rate": self.sample_rate,
+        }, path)
+
+    def predict_proba(self, features):
+        """
+        P(cry) for one feature vector (returns a float) or a feature matrix (returns an array).
+        """
+        features = np.asarray(features, dtype=np.float64)
+        single = features.ndim == 1
+        matrix = features.reshape(1, -1) if single else features
+
+        if self._weights is not None:
+            probabilities = 1.0 / (1.0 + np.exp(-(matrix @ self._weights + self._bias)))
+        else:
+            scaled = self.scaler.transform(matrix)
+            probabilities = self.model.predict_proba(scaled)[:, list(self.model.classes_).index(1)]
+        return float(probabilities[0]) if single else probabilities
+
+    # Interface used by cry_detection.StreamingCryDetector.
+    def hop_features(self, hop, sr):
+        return hop_features(hop, sr)
+
+    def window_probability(self, hops):
+        return self.predict_proba(feature_vector(hops))
+
+
+def load_cry_classifier(path=config.CRY_CLASSIFIER_FILE):
+    """
+    Loads the trained classifier, or returns None (threshold detector is used) if
+    it is disabled or hasn't been trained yet.
+    """
+    if not config.CRY_CLASSIFIER_ENABLED:
+        return None
+    if not os.path.exists(path):
+        print(f"[{time.strftime('%H:%M:%S')}] No cry classifier at {path}; using threshold cry detection.")
+        return None
+    try:
+        classifier = CryClassifier.load(path)
+        print(f"[{time.strftime('%H:%M:%S')}] Cry classifier loaded from {path} ({type(classifier.model).__name__}).")
+        return classifier
+    except Exception as e:
+        print(f"[{time.strftime('%H:%M:%S')}] Error loading cry classifier: {e}")
+        return None
+
+# --- Offline training ---
+
+def find_labelled_clips(clips_dir):
+    """
+    Returns [(path, label)] with label 1 for clips under a "cry" folder, else 0.
+    """
+    clips = []
+    for label_name in sorted(os.listdir(clips_dir)):
+        label_dir = os.path.join(clips_dir, label_name)
+        if not os.path.isdir(label_dir):
+            continue
+        for root, _, filenames in os.walk(label_dir):
+            for filename in sorted(filenames):
+                if filename.lower().endswith((".wav", ".flac", ".ogg", ".mp3")):
+                    clips.append((os.path.join(root, filename), 1 if label_name == "cry" else 0))
+    return clips
+
+def _clip_feature_rows(args):
+    # Runs in a worker process: one clip -> feature rows for each of its windows.
+    path, sample_rate, window_seconds = args
+    try:
+        y, sr = librosa.load(path, sr=sample_rate)
+        return extract_feature_matrix(split_windows(y, int(window_seconds * sr)), sr), None
+    except Exception as e:
+        return None, f"{path}: {e}"
+
+def build_dataset(clips, workers=None, sample_rate=config.AUDIO_SAMPLE_RATE,
+                  window_seconds=config.CRY_WINDOW_SECONDS):
+    """
+    Extracts features for all clips on a process pool.
+    Returns (X, y) with one row per window.
+    """
+    workers = workers or os.cpu_count() or 1
+    jobs = [(path, sample_rate, window_seconds) for path, _ in clips]
+    rows, labels = [], []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(jobs) // (workers * 8))
+        for (path, label), (features, error) in zip(clips, pool.map(_clip_feature_rows, jobs, chunksize=chunksize)):
+            if error:
+                print(f"Skipping {error}")
+                continue
+            rows.append(features)
+            labels.append(np.full(len(features), label, dtype=np.int64))
+    if not rows:
+        return np.zeros((0, len(feature_names())), dtype=np.float32), np.zeros(0, dtype=np.int64)
+    return np.vstack(rows), np.concatenate(labels)
+
+def create_model(model_type):
+    if model_type == "gbdt":
+        return HistGradientBoostingClassifier(max_iter=200, learning_rate=0.1)
+    return LogisticRegression(max_iter=1000, class_weight="balanced")
+
+def train_classifier(X, y, model_type="logistic"):
+    scaler = StandardScaler().fit(X)
+    model = create_model(model_type).fit(scaler.transform(X), y)
+    return CryClassifier(scaler, model)
+
+def _report(classifier, X, y, threshold=config.CRY_CLASSIFIER_THRESHOLD):
+    started = time.perf_counter()
+    probabilities = classifier.predict_proba(X)
+    elapsed = time.perf_counter() - started
+    predicted = probabilities >= threshold
+    positives = y == 1
+    accuracy = np.mean(predicted == positives) * 100
+    recall = np.mean(predicted[positives]) * 100 if positives.any() else 0.0
+    false_alarms = np.mean(predicted[~positives]) * 100 if (~positives).any() else 0.0
+    print(f"windows={len(y)} accuracy={accuracy:.1f}% cry recall={recall:.1f}% false alarms={false_alarms:.1f}% "
+          f"predict={elapsed / max(len(y), 1) * 1e6:.1f} us/window")
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and evaluate the NubaGuard cry classifier.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    train_parser = sub.add_parser("train", help="Extract features from labelled clips and fit a model")
+    train_parser.add_argument("clips_dir")
+    train_parser.add_argument("--model", choices=["logistic", "gbdt"], default="logistic")
+    train_parser.add_argument("--workers", type=int, default=None)
+    train_parser.add_argument("--test-fraction", type=float, default=0.2)
+    train_parser.add_argument("--output", default=config.CRY_CLASSIFIER_FILE)
+
+    eval_parser = sub.add_parser("evaluate", help="Score a trained model on labelled clips")
+    eval_parser.add_argument("clips_dir")
+    eval_parser.add_argument("--workers", type=int, default=None)
+    eval_parser.add_argument("--model-file", default=config.CRY_CLASSIFIER_FILE)
+
+    args = parser.parse_args()
+    clips = find_labelled_clips(args.clips_dir)
+    if not clips:
+        print(f"Error: no labelled clips found under {args.clips_dir}")
+        return
+
+    started = time.perf_counter()
+    X, y = build_dataset(clips, workers=args.workers)
+    print(f"Extracted {X.shape[1]} features from {len(clips)} clips ({len(y)} windows, {int(y.sum())} cry) "
+          f"in {time.perf_counter() - started:.1f} s")
+
+    if args.command == "evaluate":
+        _report(CryClassifier.load(args.model_file), X, y)
+        return
+
+    if 0 < args.test_fraction < 1 and len(np.unique(y)) == 2:
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=args.test_fraction, stratify=y, random_state=0)
+        print("Held-out evaluation:")
+        _report(train_classifier(X_train, y_train, args.model), X_test, y_test)
+
+    classifier = train_classifier(X, y, args.model)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    classifier.save(args.output)
+    print(f"Saved {args.model} cry classifier to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+# cry_detection.py
+
+import time
+from collections import deque
+
+import librosa
+import numpy as np
+
+from . import config
+from .audio_bus import DROP_OLDEST
+
+FRAME_LENGTH = 2048
+HOP_LENGTH = 512
+
+def _frames(y):
+    # Centered, zero-padded frames, laid out like librosa's rms/stft defaults.
+    y = np.pad(np.asarray(y, dtype=np.float32), FRAME_LENGTH // 2)
+    if len(y) < FRAME_LENGTH:
+        y = np.pad(y, (0, FRAME_LENGTH - len(y)))
+    return np.lib.stride_tricks.sliding_window_view(y, FRAME_LENGTH)[::HOP_LENGTH]
+
+def frame_rms(frames):
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+def frame_spectral_centroid(frames, sr):
+    magnitude = np.abs(np.fft.rfft(frames * np.hanning(FRAME_LENGTH).astype(np.float32), axis=1))
+    freqs = np.fft.rfftfreq(FRAME_LENGTH, 1.0 / sr)
+    total = magnitude.sum(axis=1)
+    return (magnitude @ freqs) / np.maximum(total, 1e-10)
+
+def frame_pitch(frames, sr, fmin=config.CRY_PITCH_FMIN, fmax=config.CRY_PITCH_FMAX,
+                voicing_threshold=config.CRY_VOICING_THRESHOLD):
+    """
+    Autocorrelation pitch estimate restricted to the infant-cry F0 band.
+    All frames are processed at once with FFT autocorrelation; returns the f0
+    (Hz) of frames whose normalized autocorrelation peak clears voicing_threshold.
+    """
+    if len(frames) == 0:
+        return np.zeros(0, dtype=np.float32)
+    min_lag = max(1, int(sr / fmax))
+    max_lag = min(FRAME_LENGTH - 1, int(np.ceil(sr / fmin)))
+
+    centered = frames - frames.mean(axis=1, keepdims=True)
+    spectrum = np.fft.rfft(centered, n=2 * FRAME_LENGTH, axis=1)
+    acf = np.fft.irfft(spectrum.real ** 2 + spectrum.imag ** 2, axis=1)[:, :max_lag + 2]
+    acf /= np.maximum(acf[:, :1], 1e-10)
+
+    band = acf[:, min_lag:max_lag + 1]
+    peak = np.argmax(band, axis=1)
+    lag = peak + min_lag
+    voiced = band[np.arange(len(band)), peak] > voicing_threshold
+
+    # Parabolic interpolation around the peak for sub-sample lag resolution.
+    rows = np.arange(len(acf))
+    left = acf[rows, lag - 1]
+    center = acf[rows, lag]
+    right = acf[rows, lag + 1]
+    denom = left - 2 * center + right
+    offset = np.where(np.abs(denom) > 1e-10, 0.5 * (left - right) / denom, 0.0)
+    f0 = sr / (lag + np.clip(offset, -1, 1))
+    return f0[voiced].astype(np.float32)
+
+def compute_frame_features(y, sr, method=None):
+    """
+    Frame-level cry features for a block of float32 samples:
+    (rms per frame, spectral centroid per frame, voiced f0 values in Hz).
+
+    method "pyin" (default, config.CRY_PITCH_METHOD) is the original librosa
+    implementation. method "fast" is staged: blocks whose energy is below
+    CRY_ENERGY_GATE stop after the RMS pass (their centroids are reported as 0,
+    one per frame, so window averages weight every frame alike), and the
+    autocorrelation pitch estimator only sees frames above the gate.
+    """
+    method = method or config.CRY_PITCH_METHOD
+    if method == "pyin":
+        rms = librosa.feature.rms(y=y)[0]
+        cent = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
+        f0, voiced_flag, voiced_probs = librosa.pyin(y=y, sr=sr, fmin=librosa.note_to_hz('C2'), fmax=librosa.note_to_hz('C7'))
+        return rms, cent, f0[voiced_flag]
+
+    # Stage 1: energy gate (near free).
+    frames = _frames(y)
+    rms = frame_rms(frames)
+    if float(np.mean(rms)) < config.CRY_ENERGY_GATE:
+        return rms, np.zeros(len(rms), dtype=np.float32), np.zeros(0, dtype=np.float32)
+
+    # Stage 2: vectorized spectral centroid.
+    cent = frame_spectral_centroid(frames, sr)
+
+    # Stage 3: pitch only on frames loud enough to be part of a cry.
+    f0 = frame_pitch(frames[rms >= config.CRY_ENERGY_GATE], sr)
+    return rms, cent, f0
+
+def summarize_features(rms, cent, f0):
+    """
+    Aggregates frame-level features into (avg_rms, avg_centroid, pitch_variance).
+    """
+    avg_rms = float(np.mean(rms)) if len(rms) else 0.0
+    avg_cent = float(np.mean(cent)) if len(cent) else 0.0
+
+    pitch_variance = 0
+    if len(f0) > 1:
+        f0_semitones = 12 * np.log2(f0 / 100.0 + 1e-10)
+        pitch_variance = float(np.var(f0_semitones))
+    return avg_rms, avg_cent, pitch_variance
+
+def is_cry(avg_rms, avg_cent, pitch_variance, method=None):
+    # pyin searches C2-C7, the fast estimator only the cry band, so their pitch
+    # variances live on different scales and each has its own threshold.
+    method = method or config.CRY_PITCH_METHOD
+    pitch_threshold = config.CRY_PITCH_VARIANCE_THRESHOLD if method == "pyin" else config.CRY_FAST_PITCH_VARIANCE_THRESHOLD
+    return (avg_rms > config.CRY_RMS_THRESHOLD and
+            avg_cent > config.CRY_SPECTRAL_CENTROID_THRESHOLD and
+            pitch_variance > pitch_threshold)
+
+def analyze_samples_for_cry(y, sr, method=None):
+    """
+    Cry decision for an in-memory block of samples. Each stage exits early
+    as soon as the decision can no longer be positive.
+    """
+    method = method or config.CRY_PITCH_METHOD
+    if method == "pyin":
+        avg_rms, avg_cent, pitch_variance = summarize_features(*compute_frame_features(y, sr, method="pyin"))
+    else:
+        frames = _frames(y)
+        rms = frame_rms(frames)
+        avg_rms, avg_cent, pitch_variance = float(np.mean(rms)), 0.0, 0
+        if avg_rms > config.CRY_RMS_THRESHOLD:
+            avg_cent = float(np.mean(frame_spectral_centroid(frames, sr)))
+            if avg_cent > config.CRY_SPECTRAL_CENTROID_THRESHOLD:
+                f0 = frame_pitch(frames[rms >= config.CRY_ENERGY_GATE], sr)
+                avg_rms, avg_cent, pitch_variance = summarize_features(rms, [avg_cent], f0)
+
+    print(f"[{time.strftime('%H:%M:%S')}] Audio analysis: RMS={avg_rms:.4f}, Centroid={avg_cent:.1f}Hz, PitchVar={pitch_variance:.1f}")
+    return is_cry(avg_rms, avg_cent, pitch_variance, method=method)
+
+
+class StreamingCryDetector:
+    """
+    Runs cry detection continuously as a consumer of the audio bus.
+
+    Every CRY_HOP_SECONDS the newly captured hop is turned into frame-level
+    features once; the decision is taken over the last CRY_WINDOW_SECONDS
+    worth of hops, so overlapping windows never recompute features and
+    detection latency is about one hop instead of "end of phrase plus file load".
+
+    With a trained classifier (cry_classifier.CryClassifier) the decision is
+    P(cry) >= CRY_CLASSIFIER_THRESHOLD instead of the fixed thresholds.
+    """
+    def __init__(self, sample_rate, on_cry,
+                 window_seconds=config.CRY_WINDOW_SECONDS, hop_seconds=config.CRY_HOP_SECONDS,
+                 classifier=None):
+        self.sample_rate = sample_rate
+        self.on_cry = on_cry
+        self.classifier = classifier
+        self.hop_samples = int(hop_seconds * sample_rate)
+        self.hops_per_window = max(1, int(round(window_seconds / hop_seconds)))
+
+        self._hop_features = deque(maxlen=self.hops_per_window)
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._bus = None
+        self._consumer = None
+
+        self.windows_analyzed = 0
+        self.last_latency = 0.0
+        self.last_probability = None
+
+    def start(self, bus, maxsize=config.AUDIO_SUBSCRIBER_QUEUE_CHUNKS):
+        """
+        Subscribes to an audio_bus.AudioBus; chunks are analyzed on the consumer's own thread.
+        When analysis falls behind, the oldest chunks are dropped so alerts stay current.
+        """
+        self._bus = bus
+        self._consumer = bus.add_consumer("cry", self._on_chunk, maxsize=maxsize, drop_policy=DROP_OLDEST)
+
+    def stop(self):
+        if self._consumer is not None:
+            self._bus.remove(self._consumer)
+            self._consumer = None
+
+    def get_stats(self):
+        return self._consumer.get_stats() if self._consumer is not None else {}
+
+    def process_hop(self, hop):
+        """
+        Adds one hop of samples and returns the decision over the current window.
+        """
+        started = time.perf_counter()
+        if self.classifier is not None:
+            self._hop_features.append(self.classifier.hop_features(hop, self.sample_rate))
+            self.last_probability = self.classifier.window_probability(list(self._hop_features))
+            decision = self.last_probability >= config.CRY_CLASSIFIER_THRESHOLD
+        else:
+            self._hop_features.append(compute_frame_features(hop, self.sample_rate))
+            rms = np.concatenate([f[0] for f in self._hop_features])
+            cent = np.concatenate([f[1] for f in self._hop_features])
+            f0 = np.concatenate([f[2] for f in self._hop_features])
+            decision = is_cry(*summarize_features(rms, cent, f0))
+        self.windows_analyzed += 1
+        self.last_latency = time.perf_counter() - started
+        return decision
+
+    def feed(self, samples):
+        """
+        Appends float32 samples and analyzes every hop they complete.
+        """
+        self._pending = np.concatenate((self._pending, samples))
+        while len(self._pending) >= self.hop_samples:
+            hop = self._pending[:self.hop_samples]
+            self._pending = self._pending[self.hop_samples:]
+            if self.process_hop(hop):
+                # Start the next window fresh so one cry isn't reported once per hop.
+                self._hop_features.clear()
+                self.on_cry()
+
+    def _on_chunk(self, chunk):
+        self.feed(chunk.samples)
@@ -0,0 +1,132 @@
+# event_aggregator.py
+
+import threading
+import time
+
+from . import config
+from .utils import TokenBucket, log_event
+
+class _Span:
+    __slots__ = ("state", "start", "end", "count", "peak", "stillness")
+
+    def __init__(self, state, now, stillness):
+        self.state = state
+        self.start = now
+        self.end = now
+        self.count = 0
+        self.peak = None
+        self.stillness = stillness # Seconds since the previous span of this type ended, if any
+
+class EventAggregator:
+    """
+    Sits between high-frequency producers and log_event.
+
+    Event types in `aggregation` (e.g. Motion_Detected, fired on every frame
+    with motion) are coalesced into one span row per burst: count, start/end,
+    duration and the peak value (e.g. contour area). A span is written when
+    no event arrived for gap_seconds, when it has lasted window_seconds, when
+    Nuba's state differs from the span's, or on flush().
+
+    Other event types in `rate_limits` ((per_minute, burst)) go through a
+    token bucket each; events over the limit are dropped and counted, and the
+    count is appended to the next row of that type that is written.
+    Anything else is passed straight to log_event.
+    """
+    def __init__(self, emit=log_event, aggregation=config.EVENT_AGGREGATION,
+                 rate_limits=config.EVENT_RATE_LIMITS):
+        self.emit = emit
+        self.aggregation = aggregation
+        self._buckets = {event_type: TokenBucket(per_minute / 60.0, burst)
+                         for event_type, (per_minute, burst) in rate_limits.items()}
+
+        self._lock = threading.Lock()
+        self._spans = {}         # event_type -> open _Span
+        self._last_span_end = {} # event_type -> end time of the last written span
+        self._suppressed = {}    # event_type -> events dropped since the last written row
+        self.recorded = 0
+        self.emitted = 0
+        self.suppressed = 0
+
+    def record(self, event_type, nuba_state, details="", value=None, now=None):
+        """
+        Reports one occurrence of event_type. `value` is tracked as the span's
+        peak for aggregated types; `details` is used for the other types.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self.recorded += 1
+            rule = self.aggregation.get(event_type)
+            if rule is None:
+                self._emit_limited(event_type, nuba_state, details)
+                return
+
+            span = self._spans.get(event_type)
+            if span is not None and (span.state != nuba_state or now - span.end > rule["gap_seconds"]
+                                     or now - span.start >= rule["window_seconds"]):
+                self._close(event_type)
+                span = None
+            if span is None:
+                last_end = self._last_span_end.get(event_type)
+                span = _Span(nuba_state, now, None if last_end is None else now - last_end)
+                self._spans[event_type] = span
+
+            span.count += 1
+            span.end = now
+            if value is not None and (span.peak is None or value > span.peak):
+                span.peak = value
+
+    def tick(self, nuba_state, now=None):
+        """
+        Writes spans that ended (gap elapsed, window full or state changed)
+        without a further event arriving. Call regularly, e.g. once per frame.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            for event_type, span in list(self._spans.items()):
+                rule = self.aggregation[event_type]
+                if (span.state != nuba_state or now - span.end > rule["gap_seconds"]
+                        or now - span.start >= rule["window_seconds"]):
+                    self._close(event_type)
+
+    def flush(self):
+        """
+        Writes all open spans, e.g. before a state transition is logged or on shutdown.
+        """
+        with self._lock:
+            for event_type in list(self._spans):
+                self._close(event_type)
+
+    def _close(self, event_type):
+        span = self._spans.pop(event_type)
+        label = self.aggregation[event_type].get("value_label", "peak")
+        details = (f"count={span.count} start={time.strftime('%H:%M:%S', time.localtime(span.start))} "
+                   f"end={time.strftime('%H:%M:%S', time.localtime(span.end))} "
+                   f"duration={span.end - span.start:.1f}s")
+        if span.peak is not None:
+            details += f" {label}={span.peak:.0f}"
+        if span.stillness is not None:
+            details += f" after_quiet={span.stillness:.1f}s"
+        self._last_span_end[event_type] = span.end
+        self.emitted += 1
+        self.emit(event_type, span.state, details)
+
+    def _emit_limited(self, event_type, nuba_state, details):
+        bucket = self._buckets.get(event_type)
+        if bucket is not None and not bucket.try_acquire():
+            self._suppressed[event_type] = self._suppressed.get(event_type, 0) + 1
+            self.suppressed += 1
+            return
+        dropped = self._suppressed.pop(event_type, 0)
+        if dropped:
+            details = f"{details} (+{dropped} suppressed)"
+        self.emitted += 1
+        self.emit(event_type, nuba_state, details)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "recorded": self.recorded,
+                "emitted": self.emitted,
+                "suppressed": self.suppressed,
+                "open_spans": len(self._spans),
+            }
@@ -0,0 +1,36 @@
+# face_detection.py
+#
+# Face detection only, with no speech/logging imports, so the face
+# recognition worker processes can use it without loading the rest of the app.
+
+import cv2
+import face_recognition
+
+from . import config
+
+def detect_face_locations(rgb_frame, scale=None, model=None, upsample=None):
+    """
+    Runs face detection on a downscaled copy of the frame and maps the boxes
+    back to full-resolution (top, right, bottom, left) coordinates.
+    Defaults come from config.FACE_DETECTION_SCALE / _MODEL / _UPSAMPLE.
+    """
+    scale = config.FACE_DETECTION_SCALE if scale is None else scale
+    model = config.FACE_DETECTION_MODEL if model is None else model
+    upsample = config.FACE_DETECTION_UPSAMPLE if upsample is None else upsample
+
+    if scale >= 1.0:
+        return face_recognition.face_locations(rgb_frame, number_of_times_to_upsample=upsample, model=model)
+
+    height, width = rgb_frame.shape[:2]
+    small_frame = cv2.resize(rgb_frame, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    small_locations = face_recognition.face_locations(small_frame, number_of_times_to_upsample=upsample, model=model)
+
+    face_locations = []
+    for top, right, bottom, left in small_locations:
+        face_locations.append((
+            max(0, int(top / scale)),
+            min(width, int(right / scale)),
+            min(height, int(bottom / scale)),
+            max(0, int(left / scale)),
+        ))
+    return face_locations
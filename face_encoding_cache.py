@@ -0,0 +1,97 @@
+# face_encoding_cache.py
+
+import hashlib
+import os
+import time
+
+import numpy as np
+
+ENCODING_SIZE = 128 # face_recognition / dlib embedding length
+
+def hash_file(path, chunk_size=1 << 20):
+    """
+    SHA-1 of the file contents.
+    """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_encoding_cache(cache_path):
+    """
+    Loads the on-disk cache. Returns {relative_path: entry} where entry is a dict
+    with name, mtime, size, sha1 and encoding (float32 array, or None if the
+    image had no face). A missing or unreadable cache just returns {}.
+    """
+    if not os.path.exists(cache_path):
+        return {}
+
+    try:
+        with np.load(cache_path, allow_pickle=False) as data:
+            paths = data["paths"]
+            names = data["names"]
+            mtimes = data["mtimes"]
+            sizes = data["sizes"]
+            hashes = data["hashes"]
+            has_face = data["has_face"]
+            encodings = data["encodings"]
+    except Exception as e:
+        print(f"[{time.strftime('%H:%M:%S')}] Warning: could not read face encoding cache '{cache_path}': {e}. Rebuilding.")
+        return {}
+
+    entries = {}
+    for i, rel_path in enumerate(paths):
+        entries[str(rel_path)] = {
+            "name": str(names[i]),
+            "mtime": float(mtimes[i]),
+            "size": int(sizes[i]),
+            "sha1": str(hashes[i]),
+            "encoding": encodings[i] if has_face[i] else None,
+        }
+    return entries
+
+def save_encoding_cache(cache_path, entries):
+    """
+    Writes the cache as a compact .npz (float32 encoding matrix + index arrays).
+    The file is written next to the target and renamed so a crash never leaves
+    a half-written cache behind.
+    """
+    rel_paths = sorted(entries)
+    encodings = np.zeros((len(rel_paths), ENCODING_SIZE), dtype=np.float32)
+    has_face = np.zeros(len(rel_paths), dtype=bool)
+    for i, rel_path in enumerate(rel_paths):
+        encoding = entries[rel_path]["encoding"]
+        if encoding is not None:
+            encodings[i] = encoding
+            has_face[i] = True
+
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(
+            f,
+            paths=np.array(rel_paths, dtype=str),
+            names=np.array([entries[p]["name"] for p in rel_paths], dtype=str),
+            mtimes=np.array([entries[p]["mtime"] for p in rel_paths], dtype=np.float64),
+            sizes=np.array([entries[p]["size"] for p in rel_paths], dtype=np.int64),
+            hashes=np.array([entries[p]["sha1"] for p in rel_paths], dtype=str),
+            has_face=has_face,
+            encodings=encodings,
+        )
+    os.replace(tmp_path, cache_path)
+
+def lookup(entries, rel_path, image_path, stat_result):
+    """
+    Returns the cached entry for an image if it is still valid, else None.
+    mtime and size are checked first; only when they differ is the content
+    hashed, so touched-but-unchanged files are not re-encoded either.
+    """
+    entry = entries.get(rel_path)
+    if entry is None:
+        return None
+    if entry["mtime"] == stat_result.st_mtime and entry["size"] == stat_result.st_size:
+        return entry
+    if entry["size"] == stat_result.st_size and entry["sha1"] == hash_file(image_path):
+        entry["mtime"] = stat_result.st_mtime
+        return entry
+    return None
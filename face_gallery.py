@@ -0,0 +1,175 @@
+# face_gallery.py
+
+import threading
+
+import numpy as np
+
+class FaceGallery:
+    """
+    Matching index over known face encodings.
+
+    Encodings live in one contiguous float32 matrix (grown by doubling) with
+    their squared norms precomputed, so all faces in a frame are matched with
+    a single matrix product instead of per-face compare_faces/face_distance
+    list scans. Identities can be added or removed while the app is running.
+    """
+    def __init__(self, encoding_size=128, initial_capacity=64):
+        self.encoding_size = encoding_size
+        self._lock = threading.RLock()
+        self._matrix = np.zeros((initial_capacity, encoding_size), dtype=np.float32)
+        self._sq_norms = np.zeros(initial_capacity, dtype=np.float32)
+        self._names = []
+        self._count = 0
+        self._summary_cache = {}
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def names(self):
+        with self._lock:
+            return list(self._names)
+
+    @property
+    def encodings(self):
+        """
+        Read-only view of the (N, encoding_size) encoding matrix.
+        """
+        with self._lock:
+            view = self._matrix[:self._count]
+            view.flags.writeable = False
+            return view
+
+    def clear(self):
+        with self._lock:
+            self._names = []
+            self._count = 0
+            self._summary_cache = {}
+
+    def _grow(self, needed):
+        capacity = self._matrix.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        matrix = np.zeros((capacity, self.encoding_size), dtype=np.float32)
+        matrix[:self._count] = self._matrix[:self._count]
+        sq_norms = np.zeros(capacity, dtype=np.float32)
+        sq_norms[:self._count] = self._sq_norms[:self._count]
+        self._matrix = matrix
+        self._sq_norms = sq_norms
+
+    def add(self, name, encodings):
+        """
+        Adds one encoding or an (M, encoding_size) batch of encodings for a person.
+        """
+        encodings = np.asarray(encodings, dtype=np.float32).reshape(-1, self.encoding_size)
+        with self._lock:
+            start = self._count
+            end = start + len(encodings)
+            self._grow(end)
+            self._matrix[start:end] = encodings
+            self._sq_norms[start:end] = np.einsum('ij,ij->i', encodings, encodings)
+            self._names.extend([name] * len(encodings))
+            self._count = end
+            self._summary_cache = {}
+
+    def remove(self, name):
+        """
+        Removes every encoding of a person. Returns how many were removed.
+        """
+        with self._lock:
+            keep = [i for i, n in enumerate(self._names) if n != name]
+            removed = self._count - len(keep)
+            if removed:
+                self._matrix[:len(keep)] = self._matrix[keep]
+                self._sq_norms[:len(keep)] = self._sq_norms[keep]
+                self._names = [self._names[i] for i in keep]
+                self._count = len(keep)
+                self._summary_cache = {}
+            return removed
+
+    @staticmethod
+    def _distances(queries, matrix, sq_norms):
+        # ||q - k||^2 = ||q||^2 + ||k||^2 - 2 q.k, computed for all pairs at once.
+        q_sq = np.einsum('ij,ij->i', queries, queries)[:, None]
+        sq = q_sq + sq_norms[None, :] - 2.0 * (queries @ matrix.T)
+        np.maximum(sq, 0, out=sq)
+        return np.sqrt(sq)
+
+    def _summaries(self, kind):
+        """
+        Per-person centroid (mean) or medoid (the member encoding closest to
+        all others). Returns (names, matrix, sq_norms); cached until the gallery changes.
+        """
+        cached = self._summary_cache.get(kind)
+        if cached is not None:
+            return cached
+
+        names = sorted(set(self._names))
+        name_array = np.array(self._names)
+        rows = []
+        for name in names:
+            members = self._matrix[:self._count][name_array == name]
+            if kind == "centroid":
+                rows.append(members.mean(axis=0))
+            else:
+                member_sq = np.einsum('ij,ij->i', members, members)
+                pairwise = self._distances(members, members, member_sq)
+                rows.append(members[np.argmin(pairwise.sum(axis=1))])
+        matrix = np.array(rows, dtype=np.float32).reshape(-1, self.encoding_size)
+        result = (names, matrix, np.einsum('ij,ij->i', matrix, matrix))
+        self._summary_cache[kind] = result
+        return result
+
+    def summaries(self, kind="centroid"):
+        """
+        Returns (names, matrix) with one summary encoding per person.
+        kind is "centroid" or "medoid".
+        """
+        with self._lock:
+            names, matrix, _ = self._summaries(kind)
+            return list(names), matrix.copy()
+
+    def distances(self, face_encodings, mode="all"):
+        """
+        Returns (names, distance matrix of shape (num_faces, len(names))).
+        mode "all" compares against every stored encoding; "centroid" or
+        "medoid" against one summary per person.
+        """
+        queries = np.asarray(face_encodings, dtype=np.float32).reshape(-1, self.encoding_size)
+        with self._lock:
+            if mode == "all":
+                names = list(self._names)
+                matrix = self._matrix[:self._count]
+                sq_norms = self._sq_norms[:self._count]
+            else:
+                names, matrix, sq_norms = self._summaries(mode)
+            if len(names) == 0 or len(queries) == 0:
+                return list(names), np.empty((len(queries), len(names)), dtype=np.float32)
+            return list(names), self._distances(queries, matrix, sq_norms)
+
+    def match(self, face_encodings, tolerance=0.6, mode="all"):
+        """
+        Matches every face in a frame in one batched distance computation.
+        Returns one name per face ("Unknown" if the nearest entry is beyond tolerance).
+        """
+        names, dist = self.distances(face_encodings, mode=mode)
+        if not names:
+            return ["Unknown"] * dist.shape[0]
+        best = np.argmin(dist, axis=1)
+        best_dist = dist[np.arange(dist.shape[0]), best]
+        return [names[i] if d <= tolerance else "Unknown" for i, d in zip(best, best_dist)]
+
+    def top_k(self, face_encoding, k=3, mode="all"):
+        """
+        Returns the k nearest (name, distance) pairs for a single face.
+        """
+        names, dist = self.distances(face_encoding, mode=mode)
+        if not names:
+            return []
+        row = dist[0]
+        k = min(k, len(row))
+        nearest = np.argpartition(row, k - 1)[:k]
+        nearest = nearest[np.argsort(row[nearest])]
+        return [(names[i], float(row[i])) for i in nearest]
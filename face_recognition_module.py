@@ -9,91 +9,180 @@ import numpy as np # For argmin
 # Import shared configurations and utilities
 from . import config
 from .utils import log_event
-from .ai_core import speak_text # To trigger AI greetings from this module
+from . import face_encoding_cache
+from .face_gallery import FaceGallery
+from .face_detection import detect_face_locations
+from .ai_core import enqueue_speech # To trigger AI greetings from this module
 
-# Global lists to store known face encodings and their corresponding names
-known_face_encodings = []
-known_face_names = []
+# Index of known face encodings and their corresponding names
+known_faces_gallery = FaceGallery()
 
 # Global variables for recognition cooldown
 _last_recognized_person = "None"
 _last_recognition_time = 0
 
+def _encode_reference_image(image_path):
+    """
+    Returns the first face encoding in a reference photo as float32, or None if no face was found.
+    """
+    image = face_recognition.load_image_file(image_path)
+    face_locations = face_recognition.face_locations(image)
+    if len(face_locations) == 0:
+        return None
+    return face_recognition.face_encodings(image, known_face_locations=face_locations)[0].astype(np.float32)
+
 def load_known_faces():
     """
     Loads images from the KNOWN_FACES_DIR, encodes faces, and stores them.
+    Encodings are kept in config.FACE_ENCODING_CACHE_FILE; only new or changed
+    images are re-encoded and images that no longer exist are evicted.
     """
-    global known_face_encodings, known_face_names # Declare globals
     print(f"[{time.strftime('%H:%M:%S')}] Loading known faces from '{config.KNOWN_FACES_DIR}'...")
     if not os.path.exists(config.KNOWN_FACES_DIR):
         print(f"[{time.strftime('%H:%M:%S')}] Warning: '{config.KNOWN_FACES_DIR}' directory not found. Face recognition will not work.")
         return
 
-    for person_name in os.listdir(config.KNOWN_FACES_DIR):
+    cached_entries = face_encoding_cache.load_encoding_cache(config.FACE_ENCODING_CACHE_FILE) if config.FACE_ENCODING_CACHE_ENABLED else {}
+    entries = {}
+    cache_dirty = False
+    cache_hits = 0
+
+    loaded_names = []
+    loaded_encodings = []
+
+    for person_name in sorted(os.listdir(config.KNOWN_FACES_DIR)):
         person_dir = os.path.join(config.KNOWN_FACES_DIR, person_name)
         if os.path.isdir(person_dir):
-            for filename in os.listdir(person_dir):
+            for filename in sorted(os.listdir(person_dir)):
                 if filename.lower().endswith(('.png', '.jpg', '.jpeg')):
                     image_path = os.path.join(person_dir, filename)
+                    rel_path = f"{person_name}/{filename}"
                     try:
-                        image = face_recognition.load_image_file(image_path)
-                        face_locations = face_recognition.face_locations(image)
-                        if len(face_locations) > 0:
-                            face_encoding = face_recognition.face_encodings(image, known_face_locations=face_locations)[0]
-                            known_face_encodings.append(face_encoding)
-                            known_face_names.append(person_name)
+                        stat_result = os.stat(image_path)
+                        previous_mtime = cached_entries.get(rel_path, {}).get("mtime")
+                        entry = face_encoding_cache.lookup(cached_entries, rel_path, image_path, stat_result)
+                        if entry is not None and entry["name"] == person_name:
+                            cache_hits += 1
+                            cache_dirty = cache_dirty or entry["mtime"] != previous_mtime
+                        else:
+                            entry = {
+                                "name": person_name,
+                                "mtime": stat_result.st_mtime,
+                                "size": stat_result.st_size,
+                                "sha1": face_encoding_cache.hash_file(image_path),
+                                "encoding": _encode_reference_image(image_path),
+                            }
+                            cache_dirty = True
+                        entries[rel_path] = entry
+
+                        if entry["encoding"] is not None:
+                            loaded_encodings.append(entry["encoding"])
+                            loaded_names.append(person_name)
                             print(f"[{time.strftime('%H:%M:%S')}] Loaded face: {person_name} from {filename}")
                         else:
                             print(f"[{time.strftime('%H:%M:%S')}] Warning: No face found in {filename} for {person_name}. Skipping.")
                     except Exception as e:
                         print(f"[{time.strftime('%H:%M:%S')}] Error loading or encoding face from {image_path}: {e}")
-    print(f"[{time.strftime('%H:%M:%S')}] Finished loading known faces. Total: {len(known_face_names)} faces.")
 
-def recognize_faces_in_frame(rgb_frame):
-    """
-    Detects and recognizes faces in an RGB frame.
-    Returns a list of (face_location, name) tuples.
-    """
-    global _last_recognized_person, _last_recognition_time
+    known_faces_gallery.clear()
+    for name, encoding in zip(loaded_names, loaded_encodings):
+        known_faces_gallery.add(name, encoding)
 
-    face_locations = face_recognition.face_locations(rgb_frame)
-    face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
+    evicted = len(set(cached_entries) - set(entries))
+    if config.FACE_ENCODING_CACHE_ENABLED and (cache_dirty or evicted):
+        try:
+            face_encoding_cache.save_encoding_cache(config.FACE_ENCODING_CACHE_FILE, entries)
+        except Exception as e:
+            print(f"[{time.strftime('%H:%M:%S')}] Warning: could not write face encoding cache: {e}")
 
-    recognized_data = [] # List to store (face_location, name) for drawing
+    print(f"[{time.strftime('%H:%M:%S')}] Finished loading known faces. Total: {len(known_faces_gallery)} faces "
+          f"({cache_hits} from cache, {len(entries) - cache_hits} encoded, {evicted} evicted).")
 
-    current_time = time.time() # Get current time for cooldown checks
+def add_known_face(name, face_encoding):
+    """
+    Adds a reference encoding for a person at runtime (no restart needed).
+    """
+    known_faces_gallery.add(name, face_encoding)
+    log_event("Known_Face_Added", config.current_nuba_state, f"Added reference encoding for {name}")
 
-    for (top, right, bottom, left), face_encoding in zip(face_locations, face_encodings):
-        name = "Unknown"
+def remove_known_person(name):
+    """
+    Removes every reference encoding of a person at runtime.
+    """
+    removed = known_faces_gallery.remove(name)
+    if removed:
+        log_event("Known_Face_Removed", config.current_nuba_state, f"Removed {removed} reference encoding(s) for {name}")
+    return removed
 
-        # Only attempt to match if there are known faces loaded
-        if known_face_encodings:
-            matches = face_recognition.compare_faces(known_face_encodings, face_encoding, tolerance=0.6)
-            face_distances = face_recognition.face_distance(known_face_encodings, face_encoding)
+def match_face_encodings(face_encodings):
+    """
+    Returns the best known match ("Unknown" if none within tolerance) for each
+    encoding, matched in a single batched distance computation.
+    """
+    if len(face_encodings) == 0:
+        return []
+    return known_faces_gallery.match(face_encodings, tolerance=config.FACE_MATCH_TOLERANCE, mode=config.FACE_MATCH_MODE)
 
-            best_match_index = np.argmin(face_distances) # Find the index of the best match
-            if matches[best_match_index]: # If the best match is actually a 'match' (within tolerance)
-                name = known_face_names[best_match_index]
+def match_face_encoding(face_encoding):
+    """
+    Returns the name of the best known match for a single face encoding, or "Unknown".
+    """
+    return match_face_encodings([face_encoding])[0]
+
+def greet_recognized_faces(recognized_data):
+    """
+    Speaks a personalized greeting for newly recognized people, honouring the
+    recognition cooldown. recognized_data is a list of (face_location, name) tuples.
+    """
+    global _last_recognized_person, _last_recognition_time
 
-        recognized_data.append(((top, right, bottom, left), name))
+    current_time = time.time() # Get current time for cooldown checks
 
+    for _, name in recognized_data:
         # --- AI greeting based on recognized person ---
         if name != "Unknown" and name != _last_recognized_person and \
            (current_time - _last_recognition_time) > config.RECOGNITION_COOLDOWN_SECONDS:
 
             greeting_phrase_data = None
-            if name == "nuba":
-                greeting_phrase_data = {"text": random.choice(["Hello, Nuba!", "Is that Nuba?", "Hi, sweet Nuba!"]), "lang": "en"}
-            elif name == "anmona":
-                greeting_phrase_data = {"text": random.choice(["Hello, Anmona!", "Welcome, Anmona!", "Hi there, Anmona!"]), "lang": "en"}
-            elif name == "dada":
-                greeting_phrase_data = {"text": random.choice(["Hello, Dada!", "Good to see you, Dada!", "Hi, Dada!"]), "lang": "en"}
+            if name in config.FACE_GREETING_PHRASES:
+                greeting_phrase_data = {"text": random.choice(config.FACE_GREETING_PHRASES[name]), "lang": "en"}
 
             if greeting_phrase_data:
-                speak_text(greeting_phrase_data) # Call speak_text from ai_core
+                enqueue_speech(greeting_phrase_data) # Queued; the speech worker synthesizes and plays it
                 log_event("Face_Recognition_Greeting", config.current_nuba_state, f"Greeted {name}: '{greeting_phrase_data['text']}' (Auto)")
                 _last_recognized_person = name
                 _last_recognition_time = current_time
         # --- End AI greeting ---
 
-    return recognized_data
\ No newline at end of file
+def detect_and_match_faces(rgb_frame, face_locations=None):
+    """
+    Full detection + encoding + matching pass, without any greeting side effects.
+    Detection runs at config.FACE_DETECTION_SCALE; encodings are always computed
+    on the full-resolution frame for the detected boxes only.
+    If face_locations is given, detection is skipped and only those boxes are encoded.
+    Returns a list of (face_location, name) tuples.
+    """
+    if face_locations is None:
+        face_locations = detect_face_locations(rgb_frame)
+    face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
+
+    # List of (face_location, name) for drawing
+    recognized_data = list(zip(face_locations, match_face_encodings(face_encodings)))
+
+    return recognized_data
+
+def recognize_faces_in_frame(rgb_frame, tracker=None):
+    """
+    Detects and recognizes faces in an RGB frame.
+    If a face_tracking.FaceTracker is given, full detection only runs on its
+    keyframes and identities are carried forward by the tracker in between.
+    Returns a list of (face_location, name) tuples.
+    """
+    if tracker is not None:
+        recognized_data = tracker.update(rgb_frame)
+    else:
+        recognized_data = detect_and_match_faces(rgb_frame)
+
+    greet_recognized_faces(recognized_data)
+
+    return recognized_data
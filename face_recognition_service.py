@@ -0,0 +1,227 @@
+# face_recognition_service.py
+
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from . import config
+from . import face_recognition_module
+from .face_recognition_worker import detect_and_encode
+
+class FaceRecognitionService:
+    """
+    Face detection/encoding on a process pool.
+
+    Frames are copied into one of a fixed set of shared memory slots (one per
+    worker) instead of being pickled. A slot stays reserved until its task has
+    finished, so at most one task per worker is ever outstanding. submit()
+    never blocks: if every slot is still busy the frame is skipped, so workers
+    always pick up fresh frames rather than a growing backlog. Matching and
+    greetings happen back in this process when a result arrives; results are
+    tagged with the frame sequence number and anything older than the newest
+    delivered result is discarded.
+
+    Workers are started with `start_method` (spawn by default): this process
+    runs capture, audio and logging threads, and a forked child can inherit
+    one of their locks held. If a worker process dies, the executor fails all
+    of its pending tasks, which frees their slots, and the pool is restarted
+    on the next submit().
+    """
+    def __init__(self, num_workers=config.FACE_RECOGNITION_WORKERS, on_result=None,
+                 start_method=config.FACE_RECOGNITION_START_METHOD):
+        self.num_workers = max(1, num_workers)
+        self.on_result = on_result
+        self.start_method = start_method
+
+        self._pool = None
+        self._pool_broken = False
+        self._lock = threading.Lock()
+        self._slots = []         # SharedMemory segments
+        self._free_slots = []
+        self._frame_shape = None
+        self._frame_dtype = None
+        self._next_seq = 0
+
+        self._latest_seq = -1
+        self._latest_result = []
+
+        self.submitted = 0
+        self.skipped = 0
+        self.stale = 0
+        self.completed = 0
+        self.restarts = 0
+        self._total_latency = 0.0
+        self._in_flight = {}     # seq -> (slot, submit time)
+
+    def _create_pool(self):
+        return ProcessPoolExecutor(max_workers=self.num_workers,
+                                   mp_context=multiprocessing.get_context(self.start_method))
+
+    def start(self):
+        if self._pool is not None:
+            return
+        self._pool = self._create_pool()
+        print(f"[{time.strftime('%H:%M:%S')}] Face recognition service started with {self.num_workers} worker process(es).")
+
+    def stop(self):
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            pool.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            self._release_slots()
+        print(f"[{time.strftime('%H:%M:%S')}] Face recognition service stopped.")
+
+    def _release_slots(self):
+        for segment in self._slots:
+            try:
+                segment.close()
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+        self._slots = []
+        self._free_slots = []
+        self._in_flight = {}
+        self._frame_shape = None
+        self._frame_dtype = None
+
+    def _finish(self, seq):
+        # Called with the lock held. Frees the frame's slot; returns False if the
+        # slots were released (service stopped) in the meantime.
+        entry = self._in_flight.pop(seq, None)
+        if entry is None:
+            return False
+        slot, started = entry
+        self._free_slots.append(slot)
+        self._total_latency += time.perf_counter() - started
+        self.completed += 1
+        return True
+
+    def _allocate_slots(self, frame):
+        self._release_slots()
+        self._slots = [shared_memory.SharedMemory(create=True, size=frame.nbytes) for _ in range(self.num_workers)]
+        self._free_slots = list(range(self.num_workers))
+        self._frame_shape = frame.shape
+        self._frame_dtype = frame.dtype
+
+    def submit(self, rgb_frame, seq=None):
+        """
+        Queues an RGB frame for recognition. Returns the frame's sequence number,
+        or None if it was skipped because all workers are busy.
+        """
+        if self._pool is None:
+            return None
+
+        with self._lock:
+            if self._pool_broken:
+                # A worker died; every task of that pool has failed by the time
+                # nothing is in flight, then a fresh pool takes over.
+                if self._in_flight:
+                    self.skipped += 1
+                    return None
+                self._pool.shutdown(wait=False)
+                self._pool = self._create_pool()
+                self._pool_broken = False
+                self.restarts += 1
+                print(f"[{time.strftime('%H:%M:%S')}] Face recognition worker died; pool restarted.")
+            if rgb_frame.shape != self._frame_shape or rgb_frame.dtype != self._frame_dtype:
+                # Resolution changed (or first frame): only re-allocate once nothing is in flight.
+                if self._in_flight:
+                    self.skipped += 1
+                    return None
+                self._allocate_slots(rgb_frame)
+
+            if not self._free_slots:
+                self.skipped += 1
+                return None
+
+            slot = self._free_slots.pop()
+            if seq is None:
+                seq = self._next_seq
+            self._next_seq = seq + 1
+
+            segment = self._slots[slot]
+            np.copyto(np.ndarray(self._frame_shape, dtype=self._frame_dtype, buffer=segment.buf), rgb_frame)
+            self._in_flight[seq] = (slot, time.perf_counter())
+            self.submitted += 1
+            live_names = tuple(s.name for s in self._slots)
+            pool = self._pool
+
+        # Outside the lock: the callback runs right here if the task has already failed.
+        try:
+            future = pool.submit(detect_and_encode, seq, slot, segment.name, self._frame_shape,
+                                 self._frame_dtype.str, live_names)
+        except (BrokenProcessPool, RuntimeError) as e:
+            self._handle_error(seq, e)
+            return None
+        future.add_done_callback(partial(self._handle_done, seq))
+        return seq
+
+    def _handle_done(self, seq, future):
+        # Runs on the executor's management thread in this process.
+        if future.cancelled():
+            with self._lock:
+                self._finish(seq)
+            return
+        error = future.exception()
+        if error is not None:
+            self._handle_error(seq, error)
+        else:
+            self._handle_result(future.result())
+
+    def _handle_result(self, result):
+        seq, slot, face_locations, face_encodings, error = result
+        if error:
+            print(f"[{time.strftime('%H:%M:%S')}] Error in face recognition worker: {error}")
+
+        with self._lock:
+            if not self._finish(seq) or seq < self._latest_seq:
+                self.stale += 1
+                return
+
+        recognized_data = list(zip(face_locations, face_recognition_module.match_face_encodings(face_encodings)))
+
+        with self._lock:
+            if seq < self._latest_seq:
+                self.stale += 1
+                return
+            self._latest_seq = seq
+            self._latest_result = recognized_data
+
+        face_recognition_module.greet_recognized_faces(recognized_data)
+        if self.on_result is not None:
+            self.on_result(seq, recognized_data)
+
+    def _handle_error(self, seq, error):
+        # The task is over (a dead worker breaks the whole pool), so the slot is free again.
+        print(f"[{time.strftime('%H:%M:%S')}] Error dispatching frame to face recognition worker: {error}")
+        with self._lock:
+            self._finish(seq)
+            if isinstance(error, BrokenProcessPool):
+                self._pool_broken = True
+
+    def get_latest_result(self):
+        """
+        Non-blocking. Returns (seq, [(face_location, name), ...]) for the newest finished frame.
+        """
+        with self._lock:
+            return self._latest_seq, list(self._latest_result)
+
+    def get_stats(self):
+        with self._lock:
+            avg = (self._total_latency / self.completed) if self.completed else 0.0
+            return {
+                "workers": self.num_workers,
+                "in_flight": len(self._in_flight),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "skipped": self.skipped,
+                "stale": self.stale,
+                "restarts": self.restarts,
+                "avg_ms": round(avg * 1000, 2),
+            }
@@ -0,0 +1,53 @@
+# face_recognition_worker.py
+#
+# Worker process side of face_recognition_service. Kept apart so spawned
+# workers only import face_recognition, config and face detection, not the
+# speech/LLM/logging modules the service needs in the main process.
+
+from multiprocessing import shared_memory
+
+import face_recognition
+import numpy as np
+
+from .face_detection import detect_face_locations
+
+# Shared memory segments this worker has already attached to, keyed by name.
+_worker_segments = {}
+
+def _attach_segment(shm_name):
+    segment = _worker_segments.get(shm_name)
+    if segment is None:
+        try:
+            # Python 3.13+: the parent owns the segment, don't let this process unlink it.
+            segment = shared_memory.SharedMemory(name=shm_name, track=False)
+        except TypeError:
+            # Older Pythons register every attach with the resource tracker. Spawned
+            # workers share the parent's tracker, where the segment is already
+            # registered, so this is a no-op; unregistering here would drop the
+            # parent's registration instead.
+            segment = shared_memory.SharedMemory(name=shm_name)
+        _worker_segments[shm_name] = segment
+    return segment
+
+def _release_stale_segments(live_names):
+    # The parent re-allocates its slots when the frame size changes; unmap the old ones.
+    for name in [name for name in _worker_segments if name not in live_names]:
+        _worker_segments.pop(name).close()
+
+def detect_and_encode(seq, slot, shm_name, shape, dtype, live_names):
+    """
+    Runs in a pool worker. Reads the frame straight out of shared memory and
+    returns (seq, slot, face_locations, face_encodings, error). Errors are
+    returned rather than raised so the parent can always reclaim the slot.
+    live_names are the parent's current slot segments.
+    """
+    try:
+        _release_stale_segments(live_names)
+        segment = _attach_segment(shm_name)
+        rgb_frame = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+
+        face_locations = detect_face_locations(rgb_frame)
+        face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
+        return seq, slot, face_locations, face_encodings, None
+    except Exception as e:
+        return seq, slot, [], [], str(e)
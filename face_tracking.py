@@ -0,0 +1,173 @@
+# face_tracking.py
+
+import time
+
+import cv2
+import numpy as np
+
+from . import config
+from . import face_recognition_module
+
+_TRACKER_FACTORIES = {
+    "KCF": "TrackerKCF_create",
+    "CSRT": "TrackerCSRT_create",
+    "MOSSE": "TrackerMOSSE_create",
+    "MIL": "TrackerMIL_create",
+}
+
+def create_tracker(tracker_type=config.FACE_TRACKER_TYPE):
+    """
+    Creates an OpenCV single-object tracker. KCF/CSRT/MOSSE live in
+    opencv-contrib (and under cv2.legacy on newer builds); falls back to MIL,
+    which ships with the base opencv-python package.
+    """
+    factory_name = _TRACKER_FACTORIES.get(tracker_type.upper(), _TRACKER_FACTORIES["KCF"])
+    for namespace in (cv2, getattr(cv2, "legacy", None)):
+        if namespace is not None and hasattr(namespace, factory_name):
+            return getattr(namespace, factory_name)()
+
+    if not getattr(create_tracker, "warned_about_fallback", False):
+        print(f"[{time.strftime('%H:%M:%S')}] Warning: OpenCV tracker '{tracker_type}' not available (needs opencv-contrib-python). Falling back to MIL.")
+        create_tracker.warned_about_fallback = True
+    return cv2.TrackerMIL_create()
+
+def _location_to_box(location):
+    top, right, bottom, left = location
+    return (left, top, right - left, bottom - top)
+
+def _box_to_location(box, width, height):
+    # Trackers can report boxes partly outside the frame; face_encodings needs them inside.
+    x, y, w, h = [int(round(v)) for v in box]
+    return (max(0, y), min(width, x + w), min(height, y + h), max(0, x))
+
+
+class _Track:
+    def __init__(self, tracker, location, name):
+        self.tracker = tracker
+        self.location = location
+        self.name = name
+        self.anchor_box = _location_to_box(location) # Box at the last encode
+
+
+class FaceTracker:
+    """
+    Detect-once, track-between face recognition.
+
+    Full HOG detection + encoding runs every FACE_DETECT_EVERY_N_FRAMES updates
+    and at least every FACE_DETECT_MAX_INTERVAL_SECONDS, on a scene change,
+    after a track is lost, or when the previous update is more than
+    FACE_TRACK_MAX_GAP_SECONDS ago (the scheduler runs faces slowly while
+    Nuba sleeps, and trackers can't follow across such gaps). In between,
+    each face is followed by a cheap OpenCV tracker and keeps its name; a
+    track is only re-encoded (without re-detecting) when its box drifts too
+    far from where it was last encoded.
+    """
+    def __init__(self, detect_every_n=config.FACE_DETECT_EVERY_N_FRAMES,
+                 tracker_type=config.FACE_TRACKER_TYPE,
+                 scene_change_threshold=config.FACE_SCENE_CHANGE_THRESHOLD,
+                 drift_threshold=config.FACE_TRACK_DRIFT_THRESHOLD,
+                 max_detect_interval=config.FACE_DETECT_MAX_INTERVAL_SECONDS,
+                 max_gap=config.FACE_TRACK_MAX_GAP_SECONDS):
+        self.detect_every_n = max(1, detect_every_n)
+        self.max_detect_interval = max_detect_interval
+        self.max_gap = max_gap
+        self.tracker_type = tracker_type
+        self.scene_change_threshold = scene_change_threshold
+        self.drift_threshold = drift_threshold
+
+        self.tracks = []
+        self._frames_since_detect = 0
+        self._last_detect_time = 0.0
+        self._last_update_time = 0.0
+        self._force_detect = True
+        self._keyframe_thumb = None
+
+        self.full_detections = 0
+        self.re_encodes = 0
+        self.tracked_frames = 0
+
+    def reset(self):
+        self.tracks = []
+        self._force_detect = True
+        self._keyframe_thumb = None
+
+    def _thumbnail(self, rgb_frame):
+        gray = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2GRAY)
+        return cv2.resize(gray, (32, 24), interpolation=cv2.INTER_AREA)
+
+    def _scene_changed(self, thumb):
+        if self._keyframe_thumb is None:
+            return True
+        return float(cv2.absdiff(thumb, self._keyframe_thumb).mean()) > self.scene_change_threshold
+
+    def _start_track(self, rgb_frame, location, name):
+        tracker = create_tracker(self.tracker_type)
+        tracker.init(rgb_frame, _location_to_box(location))
+        return _Track(tracker, location, name)
+
+    def _full_detect(self, rgb_frame, thumb):
+        recognized_data = face_recognition_module.detect_and_match_faces(rgb_frame)
+        self.tracks = [self._start_track(rgb_frame, location, name) for location, name in recognized_data]
+        self._keyframe_thumb = thumb
+        self._frames_since_detect = 0
+        self._last_detect_time = time.monotonic()
+        self._force_detect = False
+        self.full_detections += 1
+        return recognized_data
+
+    def _drifted(self, track, box):
+        ax, ay, aw, ah = track.anchor_box
+        x, y, w, h = box
+        if aw <= 0 or ah <= 0:
+            return True
+        size_change = abs(w / aw - 1.0)
+        center_shift = np.hypot((x + w / 2) - (ax + aw / 2), (y + h / 2) - (ay + ah / 2)) / aw
+        return size_change > self.drift_threshold or center_shift > self.drift_threshold
+
+    def update(self, rgb_frame):
+        """
+        Returns a list of (face_location, name) tuples for this frame.
+        """
+        thumb = self._thumbnail(rgb_frame)
+        self._frames_since_detect += 1
+        now = time.monotonic()
+        gap, self._last_update_time = now - self._last_update_time, now
+
+        if (self._force_detect or self._frames_since_detect >= self.detect_every_n or
+                gap > self.max_gap or now - self._last_detect_time >= self.max_detect_interval or
+                self._scene_changed(thumb)):
+            return self._full_detect(rgb_frame, thumb)
+
+        height, width = rgb_frame.shape[:2]
+        recognized_data = []
+        surviving_tracks = []
+        for track in self.tracks:
+            ok, box = track.tracker.update(rgb_frame)
+            x, y, w, h = box if ok else (0, 0, 0, 0)
+            if not ok or w <= 0 or h <= 0 or x + w <= 0 or y + h <= 0 or x >= width or y >= height:
+                # Lost track: drop it and run a full detection on the next frame.
+                self._force_detect = True
+                continue
+
+            track.location = _box_to_location(box, width, height)
+            if self._drifted(track, box):
+                relocated = face_recognition_module.detect_and_match_faces(rgb_frame, [track.location])
+                if relocated:
+                    track.name = relocated[0][1]
+                track = self._start_track(rgb_frame, track.location, track.name)
+                self.re_encodes += 1
+
+            surviving_tracks.append(track)
+            recognized_data.append((track.location, track.name))
+
+        self.tracks = surviving_tracks
+        self.tracked_frames += 1
+        return recognized_data
+
+    def get_stats(self):
+        return {
+            "tracks": len(self.tracks),
+            "full_detections": self.full_detections,
+            "re_encodes": self.re_encodes,
+            "tracked_frames": self.tracked_frames,
+        }
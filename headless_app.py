@@ -0,0 +1,121 @@
+# headless_app.py
+#
+# Runs the monitoring core as a daemon: no Tk, and no per-frame drawing or
+# image conversion unless the local viewer is attached.
+#
+#   python -m NubaGuard_AI.headless_app                # headless, stats printed every 60 s
+#   python -m NubaGuard_AI.headless_app --viewer       # with an OpenCV preview window
+#   python -m NubaGuard_AI.headless_app --serve        # with the live view server (http://<host>:8080/)
+#   python -m NubaGuard_AI.headless_app --video crib.mp4  # replay a clip at its frame rate, exit at its end
+#
+# SIGINT/SIGTERM stop it cleanly. Pressing q in the viewer detaches the viewer
+# (monitoring continues); SIGUSR1 attaches it again.
+
+import argparse
+import signal
+import threading
+import time
+
+import cv2
+
+from . import config
+from .utils import initialize_log_file, log_event, shutdown_event_logger
+from .monitor import NubaGuardMonitor
+from .video_pipeline import VideoFileCapture
+
+VIEWER_WINDOW = "NubaGuard"
+
+class HeadlessApp:
+    """
+    Start/stop lifecycle and signal handling around NubaGuardMonitor. The
+    optional viewer runs on the main thread (OpenCV windows need it); the
+    monitor's render stage only runs while it or a live view client is attached.
+    """
+    def __init__(self, monitor, viewer=False, stats_interval=60.0):
+        self.monitor = monitor
+        self.stats_interval = stats_interval
+        self.viewer_attached = viewer
+        self._stop_event = threading.Event()
+
+    def install_signal_handlers(self):
+        signal.signal(signal.SIGINT, self._handle_stop_signal)
+        signal.signal(signal.SIGTERM, self._handle_stop_signal)
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, self._handle_attach_signal)
+
+    def _handle_stop_signal(self, signum, frame):
+        print(f"[{time.strftime('%H:%M:%S')}] Received {signal.Signals(signum).name}, stopping.")
+        self._stop_event.set()
+
+    def _handle_attach_signal(self, signum, frame):
+        self.viewer_attached = True
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        """
+        Blocks until stopped. Returns the process exit code.
+        """
+        if not self.monitor.start():
+            return 1
+        log_event("System_Start", "N/A", "NubaGuard headless monitor started")
+        next_stats = time.monotonic() + self.stats_interval
+        viewer_open = False
+        try:
+            while not self._stop_event.is_set():
+                if not self.monitor.is_running():
+                    print(f"[{time.strftime('%H:%M:%S')}] Video pipeline has stopped (end of clip), stopping.")
+                    break
+                if self.viewer_attached and not viewer_open:
+                    self.monitor.attach_viewer()
+                    viewer_open = True
+                elif not self.viewer_attached and viewer_open:
+                    self.monitor.detach_viewer()
+                    cv2.destroyWindow(VIEWER_WINDOW)
+                    cv2.waitKey(1)
+                    viewer_open = False
+
+                if viewer_open:
+                    frame = self.monitor.get_rendered_frame()
+                    if frame is not None:
+                        cv2.imshow(VIEWER_WINDOW, frame)
+                    if cv2.waitKey(max(1, int(1000 / config.VIDEO_DISPLAY_FPS))) & 0xFF == ord("q"):
+                        print(f"[{time.strftime('%H:%M:%S')}] Viewer detached; monitoring continues (SIGUSR1 re-attaches).")
+                        self.viewer_attached = False
+                else:
+                    self._stop_event.wait(0.5)
+
+                if time.monotonic() >= next_stats:
+                    print(f"[{time.strftime('%H:%M:%S')}] {self.monitor.format_stats()}")
+                    next_stats = time.monotonic() + self.stats_interval
+        finally:
+            if viewer_open:
+                cv2.destroyAllWindows()
+            self.monitor.stop()
+            log_event("System_Stop", config.current_nuba_state, "NubaGuard headless monitor stopped")
+        return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="NubaGuard monitoring daemon (no GUI).")
+    parser.add_argument("--viewer", action="store_true", help="Open a local preview window at startup")
+    parser.add_argument("--no-listen", action="store_true", help="Don't start the microphone listener")
+    parser.add_argument("--serve", action="store_true", help="Start the MJPEG/WebSocket live view server")
+    parser.add_argument("--video", help="Read frames from a recorded clip instead of camera 0")
+    parser.add_argument("--stats-interval", type=float, default=60.0, help="Seconds between stats lines")
+    args = parser.parse_args()
+
+    initialize_log_file()
+    capture = VideoFileCapture(args.video) if args.video else None
+    # The render stage exists (paused while nobody watches) so viewers can attach later.
+    monitor = NubaGuardMonitor(capture=capture, render=True, render_on_demand=True, listen=not args.no_listen,
+                               live_view=args.serve or config.LIVE_VIEW_ENABLED, stop_at_end=capture is not None)
+    app = HeadlessApp(monitor, viewer=args.viewer, stats_interval=args.stats_interval)
+    app.install_signal_handlers()
+    try:
+        return app.run()
+    finally:
+        shutdown_event_logger() # Write and fsync anything still buffered
+
+if __name__ == "__main__":
+    raise SystemExit(main())
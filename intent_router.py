@@ -0,0 +1,101 @@
+# intent_router.py
+
+import threading
+import time
+
+from . import config
+from .utils import normalize_text
+
+class IntentRouter:
+    """
+    Answers common utterances locally from KEYWORD_RESPONSES before anything
+    is sent to the LLM.
+
+    Keywords and aliases are normalized (utils.normalize_text) and compiled
+    once into a trie over word tokens, so a keyword only matches whole words
+    ("no" does not fire on "nose", "মা" not on "মামা") and multi-word phrases
+    ("i love you") work. Matching walks the trie from each token of the
+    utterance: a few dict lookups per word, microseconds for a short phrase.
+    The longest match wins, then the earliest.
+
+    Only short utterances (at most max_words words) are answered locally: a
+    keyword somewhere in a longer sentence ("can you play music") is usually
+    not what it is about, so those escalate to the LLM.
+    """
+    _END = object()
+
+    def __init__(self, responses=None, aliases=None, max_words=None):
+        responses = config.KEYWORD_RESPONSES if responses is None else responses
+        aliases = config.KEYWORD_ALIASES if aliases is None else aliases
+        self.max_words = config.KEYWORD_MAX_UTTERANCE_WORDS if max_words is None else max_words
+
+        self.responses = {normalize_text(keyword): response for keyword, response in responses.items()}
+        self._trie = {}
+        for keyword in responses:
+            self._add(keyword, keyword)
+        for alias, keyword in aliases.items():
+            if keyword in responses:
+                self._add(alias, keyword)
+
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.llm_escalations = 0
+        self.total_match_time = 0.0
+
+    def _add(self, phrase, keyword):
+        tokens = normalize_text(phrase).split()
+        if not tokens:
+            return
+        node = self._trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node[self._END] = normalize_text(keyword)
+
+    def match(self, utterance):
+        """
+        Returns (keyword, response) for the best keyword in the utterance, or
+        None (also for utterances longer than max_words).
+        """
+        tokens = normalize_text(utterance).split()
+        if len(tokens) > self.max_words:
+            return None
+        best = None
+        best_length = 0
+        for start in range(len(tokens)):
+            node = self._trie
+            for end in range(start, len(tokens)):
+                node = node.get(tokens[end])
+                if node is None:
+                    break
+                keyword = node.get(self._END)
+                if keyword is not None and end - start + 1 > best_length:
+                    best, best_length = keyword, end - start + 1
+        if best is None:
+            return None
+        return best, self.responses[best]
+
+    def route(self, utterance):
+        """
+        Returns the local response ({"text", "lang"}) for the utterance, or None
+        if it should escalate to the LLM. Updates the hit/escalation counters.
+        """
+        started = time.perf_counter()
+        result = self.match(utterance)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.total_match_time += elapsed
+            if result is None:
+                self.llm_escalations += 1
+            else:
+                self.local_hits += 1
+        return None if result is None else result[1]
+
+    def get_stats(self):
+        with self._lock:
+            routed = self.local_hits + self.llm_escalations
+            return {
+                "local_hits": self.local_hits,
+                "llm_escalations": self.llm_escalations,
+                "local_hit_rate": round(self.local_hits / routed, 3) if routed else 0.0,
+                "avg_match_us": round(self.total_match_time / routed * 1e6, 2) if routed else 0.0,
+            }
@@ -0,0 +1,306 @@
+# live_view_server.py
+
+import asyncio
+import json
+import threading
+import time
+
+import cv2
+
+from . import config
+from .utils import add_event_listener, remove_event_listener
+from .video_pipeline import StageStats
+
+INDEX_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><meta name="viewport" content="width=device-width">
+<title>NubaGuard Live View</title></head>
+<body style="font-family: sans-serif; background: #222; color: #eee; text-align: center">
+<h2 id="state">Nuba State: ...</h2>
+<img id="video" style="max-width: 100%" alt="live video">
+<ul id="events" style="list-style: none; padding: 0; font-size: small"></ul>
+<script>
+  var width = window.innerWidth < 640 ? 320 : 640;
+  document.getElementById("video").src = "/stream.mjpg?width=" + width;
+  var ws = new WebSocket((location.protocol === "https:" ? "wss://" : "ws://") + location.host + "/ws");
+  ws.onmessage = function (message) {
+    var data = JSON.parse(message.data);
+    if (data.type === "state") {
+      document.getElementById("state").textContent = "Nuba State: " + data.state.toUpperCase();
+    } else if (data.type === "event") {
+      var item = document.createElement("li");
+      item.textContent = data.timestamp + "  " + data.event_type + "  " + data.details;
+      var list = document.getElementById("events");
+      list.insertBefore(item, list.firstChild);
+      while (list.children.length > 20) list.removeChild(list.lastChild);
+    }
+  };
+</script>
+</body></html>
+"""
+
+class LiveViewServer:
+    """
+    aiohttp server on its own event loop thread:
+      /            viewer page
+      /stream.mjpg annotated video as MJPEG (?width= picks an output size)
+      /ws          Nuba's state and monitor stats every few seconds, plus every logged event
+      /stats       server counters as JSON
+
+    The monitor's render thread only hands over a reference to each annotated
+    frame. While anyone is streaming, a sampler takes the newest frame at
+    `fps`, and each sampled frame is JPEG-encoded at most once per output
+    width (in the executor), however many clients share it. Each stream
+    client waits for the socket to drain before taking the newest sampled
+    frame, so a slow client skips frames instead of buffering them.
+    """
+    def __init__(self, monitor, host=config.LIVE_VIEW_HOST, port=config.LIVE_VIEW_PORT,
+                 fps=config.LIVE_VIEW_FPS, widths=config.LIVE_VIEW_WIDTHS,
+                 quality=config.LIVE_VIEW_JPEG_QUALITY, write_buffer=config.LIVE_VIEW_WRITE_BUFFER_BYTES,
+                 state_interval=config.LIVE_VIEW_STATE_INTERVAL_SECONDS,
+                 event_queue_size=config.LIVE_VIEW_EVENT_QUEUE_SIZE):
+        self.monitor = monitor
+        self.host = host
+        self.port = port
+        self.interval = 1.0 / fps if fps > 0 else 0.1
+        self.widths = sorted(widths, reverse=True)
+        self.quality = quality
+        self.write_buffer = write_buffer
+        self.state_interval = state_interval
+        self.event_queue_size = event_queue_size
+
+        # Written by the render thread.
+        self._frame_lock = threading.Lock()
+        self._latest_frame = None
+        self._latest_is_new = False
+
+        # Only touched on the loop thread.
+        self._seq = 0
+        self._frame = None
+        self._jpegs = {}          # width -> future of the JPEG bytes of frame _seq
+        self._next_frame = None   # Resolved when a new frame is sampled
+        self._event_queues = set()
+        self._websockets = set()
+        self._closing = False
+
+        self.jpeg_stats = StageStats("jpeg")
+        self.stream_clients = 0
+        self.frames_sent = 0
+        self.frames_skipped = 0
+        self.events_dropped = 0
+
+        self._loop = None
+        self._thread = None
+        self._runner = None
+        self._started = threading.Event()
+
+    # --- Called from other threads ---
+    def start(self):
+        # Optional dependency, only needed for the live view
+        from aiohttp import web
+
+        self._web = web
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name="live-view", daemon=True)
+        self._thread.start()
+        self._started.wait(5.0)
+        self.monitor.add_frame_listener(self.publish_frame)
+        add_event_listener(self._on_event)
+
+    def stop(self, timeout=2.0):
+        remove_event_listener(self._on_event)
+        self.monitor.remove_frame_listener(self.publish_frame)
+        if self._loop is None or not self._loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout)
+        except Exception as e:
+            print(f"[{time.strftime('%H:%M:%S')}] Error stopping live view server: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        print(f"[{time.strftime('%H:%M:%S')}] Live view server stopped.")
+
+    def publish_frame(self, frame):
+        """
+        Frame listener (render thread): keeps a reference to the newest annotated frame.
+        """
+        with self._frame_lock:
+            self._latest_frame = frame
+            self._latest_is_new = True
+
+    def _on_event(self, row):
+        if self._event_queues:
+            self._loop.call_soon_threadsafe(self._fan_out_event, row)
+
+    # --- Loop thread ---
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._serve())
+            print(f"[{time.strftime('%H:%M:%S')}] Live view server listening on http://{self.host}:{self.port}/")
+        except Exception as e:
+            print(f"[{time.strftime('%H:%M:%S')}] Error starting live view server: {e}")
+            self._started.set()
+            return
+        self._started.set()
+        self._loop.run_forever()
+
+    async def _serve(self):
+        web = self._web
+        app = web.Application()
+        app.router.add_get("/", self._handle_index)
+        app.router.add_get("/stream.mjpg", self._handle_stream)
+        app.router.add_get("/ws", self._handle_websocket)
+        app.router.add_get("/stats", self._handle_stats)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self._next_frame = self._loop.create_future()
+        self._sampler = asyncio.ensure_future(self._sample_frames())
+
+    async def _shutdown(self):
+        self._closing = True
+        self._sampler.cancel()
+        self._next_frame.cancel() # Wakes stream handlers waiting for a frame
+        for ws in list(self._websockets):
+            await ws.close()
+        await self._runner.cleanup()
+
+    async def _sample_frames(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            if not self.stream_clients:
+                continue
+            with self._frame_lock:
+                if not self._latest_is_new:
+                    continue
+                frame = self._latest_frame
+                self._latest_is_new = False
+            self._seq += 1
+            self._frame = frame
+            self._jpegs = {}
+            waiting, self._next_frame = self._next_frame, self._loop.create_future()
+            waiting.set_result(self._seq)
+
+    def _snap_width(self, requested):
+        try:
+            width = int(requested)
+        except (TypeError, ValueError):
+            return self.widths[0]
+        return min(self.widths, key=lambda w: abs(w - width))
+
+    def _encode(self, frame, width):
+        # Executor thread. cv2 releases the GIL while resizing and encoding.
+        started = time.perf_counter()
+        height, frame_width = frame.shape[:2]
+        if width < frame_width:
+            frame = cv2.resize(frame, (width, max(1, round(height * width / frame_width))), interpolation=cv2.INTER_AREA)
+        ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        self.jpeg_stats.record(time.perf_counter() - started)
+        if not ok:
+            raise RuntimeError("JPEG encoding failed")
+        return jpeg.tobytes()
+
+    async def _jpeg(self, width):
+        """
+        (seq, JPEG bytes) of the current sampled frame at `width`; concurrent
+        requests for the same frame and width share one encode.
+        """
+        seq = self._seq
+        encoding = self._jpegs.get(width)
+        if encoding is None:
+            encoding = self._loop.run_in_executor(None, self._encode, self._frame, width)
+            self._jpegs[width] = encoding
+        return seq, await asyncio.shield(encoding)
+
+    async def _handle_index(self, request):
+        return self._web.Response(text=INDEX_PAGE, content_type="text/html")
+
+    async def _handle_stats(self, request):
+        return self._web.json_response(self.get_stats())
+
+    async def _handle_stream(self, request):
+        width = self._snap_width(request.query.get("width"))
+        response = self._web.StreamResponse(headers={
+            "Content-Type": "multipart/x-mixed-replace; boundary=frame",
+            "Cache-Control": "no-cache",
+        })
+        await response.prepare(request)
+        if request.transport is not None:
+            request.transport.set_write_buffer_limits(high=self.write_buffer)
+
+        self.stream_clients += 1
+        self.monitor.attach_viewer()
+        last_seq = 0
+        try:
+            while not self._closing:
+                while self._seq <= last_seq:
+                    await asyncio.shield(self._next_frame)
+                seq, jpeg = await self._jpeg(width)
+                if last_seq and seq > last_seq + 1:
+                    self.frames_skipped += seq - last_seq - 1
+                last_seq = seq
+                await response.write(b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n%s\r\n"
+                                     % (len(jpeg), jpeg))
+                self.frames_sent += 1
+        except (ConnectionError, RuntimeError, asyncio.CancelledError):
+            pass # Client went away or the server is stopping
+        finally:
+            self.stream_clients -= 1
+            self.monitor.detach_viewer()
+        return response
+
+    async def _handle_websocket(self, request):
+        ws = self._web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        queue = asyncio.Queue(maxsize=self.event_queue_size)
+        self._event_queues.add(queue)
+        self._websockets.add(ws)
+        sender = asyncio.ensure_future(self._send_updates(ws, queue))
+        try:
+            async for _ in ws:
+                pass # Nothing is expected from clients; this just waits for the close
+        finally:
+            sender.cancel()
+            self._event_queues.discard(queue)
+            self._websockets.discard(ws)
+        return ws
+
+    async def _send_updates(self, ws, queue):
+        try:
+            next_state = 0.0
+            while not ws.closed:
+                now = time.monotonic()
+                if now >= next_state:
+                    await ws.send_str(json.dumps(self._state_message()))
+                    next_state = now + self.state_interval
+                try:
+                    message = await asyncio.wait_for(queue.get(), max(0.0, next_state - time.monotonic()))
+                except asyncio.TimeoutError:
+                    continue
+                await ws.send_str(json.dumps(message))
+        except (ConnectionError, RuntimeError):
+            pass
+
+    def _state_message(self):
+        return {"type": "state", "state": config.current_nuba_state, "stats": self.monitor.get_stats()}
+
+    def _fan_out_event(self, row):
+        timestamp, event_type, state, details = row
+        message = {"type": "event", "timestamp": timestamp, "event_type": event_type,
+                   "state": state, "details": details}
+        for queue in self._event_queues:
+            if queue.full():
+                queue.get_nowait()
+                self.events_dropped += 1
+            queue.put_nowait(message)
+
+    def get_stats(self):
+        return {
+            "stream_clients": self.stream_clients,
+            "websocket_clients": len(self._websockets),
+            "frames_sampled": self._seq,
+            "frames_sent": self.frames_sent,
+            "frames_skipped": self.frames_skipped,
+            "events_dropped": self.events_dropped,
+            "jpeg": self.jpeg_stats.snapshot(),
+        }
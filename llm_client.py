@@ -0,0 +1,209 @@
+# llm_client.py
+
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from . import config
+from .utils import TokenBucket, normalize_text
+from .video_pipeline import StageStats
+
+FALLBACK_RESPONSES = {
+    "empty": "Hmm, I'm not sure what to say, Nuba.",
+    "blocked": "I can't respond to that right now, Nuba.",
+    "error": "Oops, something went wrong, Nuba.",
+    "busy": "I need a little rest, Nuba! Let's talk soon.",
+}
+
+SYSTEM_INSTRUCTION = (
+    "You are 'NubaGuard', a kind, gentle, and very playful AI friend for an 8-month-old baby named Nuba. "
+    "Your goal is to engage and comfort her. "
+    "Your responses MUST be extremely short (1-5 words maximum), simple, and very positive. "
+    "Use simple baby-friendly vocabulary. "
+    "If Nuba babbles or makes unclear sounds, respond with gentle encouragement, a playful sound (like 'coo' or 'boop'), or a simple question. "
+    "Never ask complex questions or give long explanations. "
+    "If Nuba's speech appears to be English, respond in English. If it appears to be Bengali (like 'Ma', 'Baba', or common Bengali babbling), respond in simple Bengali. "
+    "You can refer to Nuba directly. "
+)
+
+def build_prompt(prompt_text, nuba_state, object_context):
+    context_instruction = ""
+    if object_context:
+        context_instruction = f"I see the following objects nearby: {object_context}. "
+    system_instruction = (
+        f"{SYSTEM_INSTRUCTION}Current Nuba's state is {nuba_state}. "
+        f"{context_instruction}" # <-- Inject object context here
+        f"Always prioritize Nuba's happiness and safety."
+    )
+    return f"System: {system_instruction}\nUser: {prompt_text}"
+
+
+class GeminiBackend:
+    """
+    google.generativeai model created once and reused for every request
+    (one client and connection pool instead of a new chat session per call).
+    Returns None for an empty response.
+    """
+    name = "gemini"
+
+    def __init__(self, api_key=config.GEMINI_API_KEY, model_name=config.GEMINI_MODEL_NAME):
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self._genai = genai
+        self.model = genai.GenerativeModel(model_name)
+
+    async def generate(self, prompt):
+        try:
+            response = await self.model.generate_content_async(prompt)
+        except self._genai.types.BlockedPromptException as e:
+            print(f"[{time.strftime('%H:%M:%S')}] Gemini blocked prompt: {e}")
+            return FALLBACK_RESPONSES["blocked"]
+        if response and response.text:
+            return response.text
+        return None
+
+
+class StubLLMBackend:
+    """
+    Local stand-in for tests and benchmarks: answers after `latency` seconds
+    with a reply derived deterministically from the prompt.
+    """
+    name = "stub"
+
+    def __init__(self, latency=0.3, replies=("Coo! Hi Nuba!", "Boop! So fun!", "Yay, Nuba!", "Peek-a-boo!")):
+        self.latency = latency
+        self.replies = list(replies)
+        self.calls = 0
+
+    async def generate(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        digest = hashlib.sha1(prompt.encode("utf-8")).digest()
+        return self.replies[digest[0] % len(self.replies)]
+
+
+class LLMClient:
+    """
+    LLM requests on a private asyncio event loop thread, so callers get a
+    concurrent.futures.Future back immediately (or block with get_response).
+
+    Responses are memoized for cache_ttl seconds, keyed by the normalized
+    utterance, Nuba's state and the object context; a request identical to
+    one already in flight awaits that request instead of calling the API
+    again; and backend calls go through a token bucket, so bursts are queued
+    briefly instead of being answered with a canned line.
+    """
+    def __init__(self, backend, cache_ttl=config.GEMINI_CACHE_TTL_SECONDS,
+                 cache_size=config.GEMINI_CACHE_MAX_ENTRIES,
+                 rate_per_minute=config.GEMINI_RATE_PER_MINUTE, burst=config.GEMINI_RATE_BURST,
+                 max_wait=config.GEMINI_RATE_MAX_WAIT_SECONDS, timeout=config.GEMINI_REQUEST_TIMEOUT_SECONDS):
+        self.backend = backend
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self._bucket = TokenBucket(rate_per_minute / 60.0, burst)
+
+        # Only touched on the loop thread.
+        self._cache = OrderedDict() # key -> (expires_at, text)
+        self._inflight = {}         # key -> asyncio.Task
+
+        self.latency_stats = StageStats("llm")
+        self.requests = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.backend_calls = 0
+        self.rate_limited = 0
+        self.errors = 0
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-client", daemon=True)
+        self._thread.start()
+
+    def close(self, timeout=2.0):
+        if self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+
+    @staticmethod
+    def cache_key(prompt_text, nuba_state, object_context):
+        objects = ",".join(sorted(label.strip() for label in (object_context or "").split(",") if label.strip()))
+        return (normalize_text(prompt_text), nuba_state, objects)
+
+    def submit(self, prompt_text, nuba_state, object_context=""):
+        """
+        Non-blocking: returns a concurrent.futures.Future resolving to the response text.
+        """
+        return asyncio.run_coroutine_threadsafe(self._respond(prompt_text, nuba_state, object_context), self._loop)
+
+    def get_response(self, prompt_text, nuba_state, object_context=""):
+        return self.submit(prompt_text, nuba_state, object_context).result()
+
+    async def _respond(self, prompt_text, nuba_state, object_context):
+        started = time.perf_counter()
+        self.requests += 1
+        key = self.cache_key(prompt_text, nuba_state, object_context)
+
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            self.latency_stats.record(time.perf_counter() - started)
+            return cached[1]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(self._call_backend(key, build_prompt(prompt_text, nuba_state, object_context)))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        response = await asyncio.shield(task)
+        self.latency_stats.record(time.perf_counter() - started)
+        return response
+
+    async def _call_backend(self, key, prompt):
+        if not await self._bucket.acquire(self.max_wait):
+            self.rate_limited += 1
+            print(f"[{time.strftime('%H:%M:%S')}] LLM rate limit reached. Skipping API call.")
+            return FALLBACK_RESPONSES["busy"]
+
+        self.backend_calls += 1
+        config.LAST_GEMINI_CALL_TIME = time.time()
+        try:
+            text = await asyncio.wait_for(self.backend.generate(prompt), self.timeout)
+        except Exception as e:
+            self.errors += 1
+            print(f"[{time.strftime('%H:%M:%S')}] Error getting {self.backend.name} response: {e!r}")
+            return FALLBACK_RESPONSES["error"]
+
+        if not text:
+            print(f"[{time.strftime('%H:%M:%S')}] {self.backend.name} response was empty or malformed.")
+            return FALLBACK_RESPONSES["empty"]
+
+        self._cache[key] = (time.monotonic() + self.cache_ttl, text)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return text
+
+    def get_stats(self):
+        stats = self.latency_stats.snapshot()
+        stats.update({
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "backend_calls": self.backend_calls,
+            "rate_limited": self.rate_limited,
+            "errors": self.errors,
+        })
+        return stats
+
+
+def create_llm_backend(backend_name=config.GEMINI_BACKEND):
+    if backend_name == "stub":
+        return StubLLMBackend()
+    return GeminiBackend()
@@ -0,0 +1,292 @@
+# log_storage.py
+#
+# Activity log storage: daily/size-based rotation of the CSV log with gzip
+# compression of closed segments, and an indexed SQLite (WAL) copy of every
+# event with a small query API.
+#
+# Command line (run from the directory containing the package):
+#   python -m NubaGuard_AI.log_storage import nuba_activity_log.csv
+#   python -m NubaGuard_AI.log_storage query --type Cry_Detected --since "2025-05-24 00:00:00"
+#   python -m NubaGuard_AI.log_storage wakeups
+#   python -m NubaGuard_AI.log_storage counts
+
+import argparse
+import csv
+import gzip
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+from . import config
+
+# --- CSV rotation ---
+
+def segment_path(log_path, day):
+    """
+    Returns a free path for a closed segment of log_path covering `day`
+    (YYYY-MM-DD), e.g. nuba_activity_log-2025-05-24.csv, then .1.csv, ...
+    """
+    base, ext = os.path.splitext(log_path)
+    index = 0
+    while True:
+        suffix = f"-{day}" if index == 0 else f"-{day}.{index}"
+        candidate = f"{base}{suffix}{ext}"
+        if not os.path.exists(candidate) and not os.path.exists(candidate + ".gz"):
+            return candidate
+        index += 1
+
+def compress_segment(path):
+    """
+    gzips a closed segment in place (path -> path.gz).
+    """
+    try:
+        with open(path, 'rb') as src, gzip.open(path + ".gz", 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(path)
+    except Exception as e:
+        print(f"[{time.strftime('%H:%M:%S')}] Error compressing log segment {path}: {e}")
+
+def rotate_log_file(log_path, day):
+    """
+    Moves the current log file aside as a segment for `day` and compresses it
+    in the background. Returns the segment path (before compression).
+    """
+    if not os.path.exists(log_path) or os.path.getsize(log_path) == 0:
+        return None
+    segment = segment_path(log_path, day)
+    os.replace(log_path, segment)
+    if config.LOG_COMPRESS_SEGMENTS:
+        threading.Thread(target=compress_segment, args=(segment,), name="log-compress", daemon=True).start()
+    print(f"[{time.strftime('%H:%M:%S')}] Rotated activity log to {segment}")
+    return segment
+
+# --- SQLite event store ---
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    event_type TEXT NOT NULL,
+    nuba_state TEXT,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events (timestamp);
+CREATE INDEX IF NOT EXISTS idx_events_type_timestamp ON events (event_type, timestamp);
+DROP INDEX IF EXISTS idx_events_unique;
+CREATE TABLE IF NOT EXISTS log_sources (
+    name TEXT PRIMARY KEY,
+    rows INTEGER NOT NULL
+);
+"""
+
+def log_source_name(path):
+    """
+    Key under which a CSV log file's rows are tracked in the store: the file
+    name without directory or .gz, so a segment is the same source before and
+    after it is compressed.
+    """
+    name = os.path.basename(path)
+    return name[:-3] if name.endswith(".gz") else name
+
+def read_log_rows(f):
+    """
+    Yields each data row of an open CSV log as a [Timestamp, Event_Type,
+    Nuba_State, Details] list, or None for repeated header rows (written by
+    older versions on every restart) and malformed rows.
+    """
+    for row in csv.reader(f):
+        if row == config.LOG_HEADERS or len(row) < 2 or len(row[0]) != 19:
+            yield None
+            continue
+        if len(row) > 4:
+            row = row[:3] + [",".join(row[3:])] # Unquoted commas in Details
+        yield (row + [""] * 4)[:4]
+
+class ActivityLogStore:
+    """
+    SQLite copy of the activity log in WAL mode, indexed on Timestamp and
+    (Event_Type, Timestamp). Timestamps are stored in the CSV's
+    'YYYY-MM-DD HH:MM:SS' form, which sorts chronologically as text.
+
+    A connection belongs to the thread that created the store; the logger's
+    writer thread and query callers each open their own (WAL lets readers run
+    alongside the writer).
+
+    log_sources records, per CSV file (log_source_name), how many of its data
+    rows the store already holds, always a prefix of the file: the live writer
+    counts what it stores and hands the count on to the segment when it rotates
+    the file, and import_csv only imports rows past that count. Re-importing a
+    segment, or one the live writer already stored, adds nothing, while
+    identical events within the same second are all kept.
+    """
+    def __init__(self, db_path=config.LOG_DB_FILE):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def insert_many(self, rows, source=None):
+        """
+        rows are [Timestamp, Event_Type, Nuba_State, Details] lists. With a
+        source (log_source_name), they are counted as that file's next rows in
+        the same transaction.
+        """
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO events (timestamp, event_type, nuba_state, details) VALUES (?, ?, ?, ?)",
+                [tuple(row[:4]) for row in rows],
+            )
+            if source is not None:
+                self.conn.execute(
+                    "INSERT INTO log_sources (name, rows) VALUES (?, ?) "
+                    "ON CONFLICT (name) DO UPDATE SET rows = rows + excluded.rows",
+                    (source, len(rows)),
+                )
+
+    def source_rows(self, source):
+        """
+        Number of leading data rows of the CSV file `source` already in the store.
+        """
+        row = self.conn.execute("SELECT rows FROM log_sources WHERE name = ?", (source,)).fetchone()
+        return row[0] if row else 0
+
+    def rename_source(self, old, new):
+        """
+        Moves the stored-row count of a log file that was renamed (rotated).
+        """
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO log_sources (name, rows) SELECT ?, rows FROM log_sources WHERE name = ?",
+                              (new, old))
+            self.conn.execute("DELETE FROM log_sources WHERE name = ?", (old,))
+
+    def import_csv(self, csv_path, batch_size=5000):
+        """
+        Imports the rows of a CSV log (plain or .gz) that the store doesn't
+        have yet; header and malformed rows are skipped.
+        Returns (imported, skipped, already_stored).
+        """
+        source = log_source_name(csv_path)
+        already_stored = self.source_rows(source)
+        opener = gzip.open if csv_path.endswith(".gz") else open
+        imported = 0
+        skipped = 0
+        seen = 0
+        batch = []
+        with opener(csv_path, 'rt', newline='', encoding='utf-8') as f:
+            for row in read_log_rows(f):
+                if row is None:
+                    skipped += 1
+                    continue
+                seen += 1
+                if seen <= already_stored:
+                    continue
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    self.insert_many(batch, source)
+                    imported += len(batch)
+                    batch = []
+        if batch:
+            self.insert_many(batch, source)
+            imported += len(batch)
+        return imported, skipped, min(seen, already_stored)
+
+    def query(self, event_type=None, start=None, end=None, limit=None):
+        """
+        Events of a type (or all types) with start <= Timestamp < end, oldest first.
+        start/end are 'YYYY-MM-DD HH:MM:SS' strings (or prefixes like 'YYYY-MM-DD').
+        """
+        clauses = []
+        params = []
+        if event_type is not None:
+            clauses.append("event_type = ?")
+            params.append(event_type)
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(end)
+        sql = "SELECT timestamp, event_type, nuba_state, details FROM events"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY timestamp, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self.conn.execute(sql, params).fetchall()
+
+    def count_by_type(self, start=None, end=None):
+        """
+        Returns {event_type: count} for the given window.
+        """
+        sql = "SELECT event_type, COUNT(*) FROM events WHERE timestamp >= ? AND timestamp < ? GROUP BY event_type"
+        rows = self.conn.execute(sql, (start or "", end or "9999")).fetchall()
+        return dict(rows)
+
+    def wake_ups_per_night(self, start=None, end=None,
+                           night_start_hour=config.NIGHT_START_HOUR,
+                           night_end_hour=config.NIGHT_END_HOUR):
+        """
+        Counts Nuba_Woke_Up events per night. A night runs from
+        night_start_hour to night_end_hour the next morning and is labelled by
+        the date it started on. Returns [(night_date, count), ...].
+        """
+        sql = (
+            "SELECT date(timestamp, ?) AS night, COUNT(*) FROM events "
+            "WHERE event_type = 'Nuba_Woke_Up' AND timestamp >= ? AND timestamp < ? "
+            "AND (CAST(strftime('%H', timestamp) AS INTEGER) >= ? OR CAST(strftime('%H', timestamp) AS INTEGER) < ?) "
+            "GROUP BY night ORDER BY night"
+        )
+        params = (f"-{night_end_hour} hours", start or "", end or "9999", night_start_hour, night_end_hour)
+        return self.conn.execute(sql, params).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NubaGuard activity log storage tools.")
+    parser.add_argument("--db", default=config.LOG_DB_FILE)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = sub.add_parser("import", help="Import CSV logs (plain or .gz) into the SQLite store")
+    import_parser.add_argument("csv_files", nargs="+")
+
+    query_parser = sub.add_parser("query", help="List events")
+    query_parser.add_argument("--type")
+    query_parser.add_argument("--since")
+    query_parser.add_argument("--until")
+    query_parser.add_argument("--limit", type=int)
+
+    for name in ("wakeups", "counts"):
+        window_parser = sub.add_parser(name)
+        window_parser.add_argument("--since")
+        window_parser.add_argument("--until")
+
+    args = parser.parse_args()
+    store = ActivityLogStore(args.db)
+    start = time.perf_counter()
+
+    if args.command == "import":
+        for csv_path in args.csv_files:
+            imported, skipped, already_stored = store.import_csv(csv_path)
+            print(f"{csv_path}: imported {imported} events, skipped {skipped} header/malformed rows "
+                  f"and {already_stored} already stored")
+    elif args.command == "query":
+        for row in store.query(args.type, args.since, args.until, args.limit):
+            print(",".join(str(v) for v in row))
+    elif args.command == "wakeups":
+        for night, count in store.wake_ups_per_night(args.since, args.until):
+            print(f"{night}: {count}")
+    else:
+        for event_type, count in sorted(store.count_by_type(args.since, args.until).items(), key=lambda item: -item[1]):
+            print(f"{event_type}: {count}")
+
+    print(f"({(time.perf_counter() - start) * 1000:.1f} ms)")
+    store.close()
+
+if __name__ == "__main__":
+    main()
@@ -7,9 +7,8 @@ import time
 
 # Import modules
 from . import config
-from .utils import initialize_log_file, log_event
+from .utils import initialize_log_file, log_event, shutdown_event_logger
 from .gui_app import NubaGuardGUI
-from . import ai_core # Import ai_core to access its stop_listening_thread and listener_thread
 
 if __name__ == "__main__":
     # Initialize the log file first
@@ -22,12 +21,8 @@ if __name__ == "__main__":
     try:
         root.mainloop()
     finally:
-        # Ensure proper cleanup if GUI is closed or mainloop exits
-        if hasattr(app, 'listener_thread') and app.listener_thread.is_alive():
-            print(f"[{time.strftime('%H:%M:%S')}] Main loop exited. Signalling listener thread to stop.")
-            ai_core.stop_listening_thread = True # Signal the thread in ai_core
-            # Give the listener thread a chance to finish (max AI_LISTEN_DURATION + 2 seconds)
-            app.listener_thread.join(timeout=config.AI_LISTEN_DURATION + 2) 
-            if app.listener_thread.is_alive():
-                print(f"[{time.strftime('%H:%M:%S')}] Warning: Listener thread did not terminate gracefully on mainloop exit.")
-        log_event("System_Stop", config.current_nuba_state, "NubaGuard AI Assistant stopped gracefully")
\ No newline at end of file
+        # Ensure proper cleanup if GUI is closed or mainloop exits (stop() is a no-op if already stopped)
+        if hasattr(app, 'monitor'):
+            app.monitor.stop()
+        log_event("System_Stop", config.current_nuba_state, "NubaGuard AI Assistant stopped gracefully")
+        shutdown_event_logger() # Write and fsync anything still buffered
\ No newline at end of file
@@ -0,0 +1,430 @@
+# monitor.py
+
+import cv2
+import time
+import threading
+import speech_recognition as sr
+import random
+from playsound import playsound
+
+from . import config
+from .utils import log_event
+
+from . import ai_core
+from .ai_core import enqueue_speech
+from .speech_queue import PRIORITY_CHATTER, PRIORITY_RESPONSE
+
+from .face_recognition_module import (
+    load_known_faces,
+    recognize_faces_in_frame,
+)
+
+from . import object_detection_module
+from .video_pipeline import VideoPipeline
+from .face_recognition_service import FaceRecognitionService
+from .face_tracking import FaceTracker
+from .motion_detection import MotionDetector
+from .event_aggregator import EventAggregator
+from .analysis_scheduler import AnalysisScheduler
+from .live_view_server import LiveViewServer
+
+
+class NubaGuardMonitor:
+    """
+    The monitoring core without any UI: camera, video pipeline, motion and
+    Nuba state machine, face/object recognition, background listener, event
+    aggregation and analysis scheduling. The Tk GUI and the headless daemon
+    are both thin front ends over it.
+
+    render=False runs no render stage at all (nothing is drawn or converted
+    per frame). With render=True the render stage draws annotations on a copy
+    of the newest frame, hands it to the frame listeners (e.g. the live view
+    server) and passes it through convert_frame (e.g. to a PIL image for Tk);
+    without convert_frame the annotated BGR frame is returned. With
+    render_on_demand the render stage only runs while at least one viewer
+    is attached (attach_viewer/detach_viewer).
+    """
+    def __init__(self, capture=None, render=True, convert_frame=None, listen=True, load_models=True,
+                 render_on_demand=False, live_view=config.LIVE_VIEW_ENABLED, stop_at_end=False):
+        self.capture = capture
+        self.stop_at_end = stop_at_end
+        self.render = render
+        self.convert_frame = convert_frame
+        self.render_on_demand = render_on_demand
+        self.live_view = live_view
+        self.listen = listen
+        self.load_models = load_models
+
+        self.cap = None
+        self.pipeline = None
+        self.listener_thread = None
+        self.object_worker = None
+        self.face_tracker = None
+        self.face_service = None
+        self.live_server = None
+        self._frame_listeners = []
+        self._viewers = 0
+        self._viewer_lock = threading.Lock()
+        self._started = False
+
+        self.motion_detector = MotionDetector()
+        self.events = EventAggregator()
+        self.motion_start_time = None
+        self.last_motion_time = time.time()
+        self.alert_triggered_by_motion = False
+        self.ai_greeted_nuba_on_wake = False
+        self.last_ai_speech_time = 0
+        self.ai_said_goodnight = False
+        self._motion_lock = threading.Lock()
+        self._tracker_lock = threading.Lock()
+        self.scheduler = AnalysisScheduler()
+        self._last_faces = []
+
+    def start(self):
+        """
+        Opens the camera (unless a capture object was given), loads the models
+        and starts every worker. Returns False if the camera can't be opened.
+        """
+        if self._started:
+            return True
+
+        self.cap = self.capture if self.capture is not None else cv2.VideoCapture(0)
+        if not self.cap.isOpened():
+            print("Error: Could not open camera.")
+            log_event("System_Error", "N/A", "Camera not opened")
+            return False
+        self.last_motion_time = time.time()
+
+        if self.listen:
+            ai_core.stop_listening_thread = False
+            self.recognizer = sr.Recognizer()
+            self.listener_thread = threading.Thread(target=ai_core.listen_in_background, args=(self.recognizer, self.scheduler))
+            self.listener_thread.daemon = True
+            self.listener_thread.start()
+            print(f"[{time.strftime('%H:%M:%S')}] Listening thread started.")
+            log_event("STT_Thread_Start", "N/A", "Speech recognition thread initiated")
+        ai_core.prewarm_speech_cache()
+
+        if self.load_models:
+            load_known_faces() # Call load_known_faces (it's directly imported)
+            object_detection_module.load_yolo_model()
+        self.object_worker = object_detection_module.ObjectDetectionWorker(scheduler=self.scheduler)
+        self.object_worker.start()
+
+        if config.FACE_TRACKING_ENABLED:
+            self.face_tracker = FaceTracker()
+        elif config.FACE_RECOGNITION_USE_PROCESS_POOL:
+            self.face_service = FaceRecognitionService()
+            self.face_service.start()
+
+        self.pipeline = VideoPipeline(self.cap, self.analyze_frame, self.render_frame if self.render else None,
+                                      stop_at_end=self.stop_at_end)
+        self.pipeline.set_render_enabled(not self.render_on_demand or self._viewers > 0)
+        self.pipeline.start()
+        self._started = True
+
+        if self.live_view:
+            if self.render:
+                self.live_server = LiveViewServer(self)
+                self.live_server.start()
+            else:
+                print(f"[{time.strftime('%H:%M:%S')}] Live view not started: the monitor was created with render=False.")
+        return True
+
+    def stop(self, timeout=None):
+        """
+        Stops every worker, writes open event spans and releases the camera.
+        Safe to call more than once.
+        """
+        if not self._started:
+            return
+        self._started = False
+        if self.live_server is not None:
+            self.live_server.stop()
+            self.live_server = None
+        ai_core.stop_listening_thread = True
+        ai_core.stop_speech_output()
+        self.pipeline.stop()
+        if self.face_service is not None:
+            self.face_service.stop()
+        self.object_worker.stop()
+        self.events.flush()
+        self.cap.release()
+
+        if self.listener_thread is not None and self.listener_thread.is_alive():
+            self.listener_thread.join(timeout=config.AI_LISTEN_DURATION + 2 if timeout is None else timeout)
+            if self.listener_thread.is_alive():
+                print(f"[{time.strftime('%H:%M:%S')}] Warning: Listener thread did not terminate gracefully. It might be waiting for microphone input.")
+        print(f"[{time.strftime('%H:%M:%S')}] NubaGuard monitor stopped.")
+
+    def is_running(self):
+        return self._started and self.pipeline.is_running()
+
+    def get_rendered_frame(self):
+        """
+        Non-blocking. The newest rendered frame (see convert_frame), or None.
+        """
+        rendered = self.pipeline.get_rendered_frame()
+        return None if rendered is None else rendered[1]
+
+    def attach_viewer(self):
+        """
+        Registers a viewer; with render_on_demand the render stage runs while any are attached.
+        """
+        with self._viewer_lock:
+            self._viewers += 1
+            if self.pipeline is not None:
+                self.pipeline.set_render_enabled(True)
+
+    def detach_viewer(self):
+        with self._viewer_lock:
+            self._viewers = max(0, self._viewers - 1)
+            if self.pipeline is not None and self.render_on_demand and self._viewers == 0:
+                self.pipeline.set_render_enabled(False)
+
+    def add_frame_listener(self, listener):
+        """
+        listener(frame) gets every annotated BGR frame on the render thread.
+        It must not modify the frame.
+        """
+        self._frame_listeners.append(listener)
+
+    def remove_frame_listener(self, listener):
+        if listener in self._frame_listeners:
+            self._frame_listeners.remove(listener)
+
+    def analyze_frame(self, frame):
+        """
+        Analysis stage (runs on a pipeline worker thread, never on a UI thread).
+        Runs face recognition and motion/state logic on a raw BGR frame and
+        returns the annotations the render stage should draw. Each analyzer
+        only runs when the scheduler says it is due; otherwise the last face
+        result is reused.
+        """
+        now = time.time()
+
+        # Object detection picks up the newest frame at its own low rate.
+        if self.scheduler.should_run("objects", now):
+            self.object_worker.submit_frame(frame)
+
+        # --- Face Detection and Recognition ---
+        # Greetings (enqueue_speech, log_event, cooldowns) are handled inside
+        # face_recognition_module, both for the in-process path and for
+        # results coming back from the process pool.
+        if self.scheduler.should_run("faces", now):
+            started = time.perf_counter()
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            if self.face_tracker is not None:
+                # Tracker state is per-sequence, like the motion state below.
+                with self._tracker_lock:
+                    self._last_faces = recognize_faces_in_frame(rgb_frame, tracker=self.face_tracker)
+                self.scheduler.record("faces", time.perf_counter() - started)
+            elif self.face_service is not None:
+                # Non-blocking: the frame is skipped if every worker is busy, and we
+                # draw the newest finished result. The work happens in the pool, so
+                # its average latency is what the scheduler is charged.
+                if self.face_service.submit(rgb_frame) is not None:
+                    self.scheduler.record("faces", self.face_service.get_stats()["avg_ms"] / 1000)
+                _, self._last_faces = self.face_service.get_latest_result()
+            else:
+                self._last_faces = recognize_faces_in_frame(rgb_frame)
+                self.scheduler.record("faces", time.perf_counter() - started)
+        recognized_faces_data = self._last_faces
+        # --- End Face Detection and Recognition ---
+
+        # Motion diffing and the Nuba state machine depend on frame order,
+        # so they stay serialized even with several analysis workers.
+        motion_boxes = []
+        with self._motion_lock:
+            if self.scheduler.should_run("motion", now):
+                started = time.perf_counter()
+                motion_boxes = self.process_motion(frame)
+                self.scheduler.record("motion", time.perf_counter() - started)
+                self.scheduler.update(config.current_nuba_state, bool(motion_boxes), now)
+            else:
+                self.scheduler.update(config.current_nuba_state, None, now)
+
+        return {"faces": recognized_faces_data, "motion_boxes": motion_boxes}
+
+    def process_motion(self, frame):
+        """
+        Motion detection and Nuba state transitions for one frame.
+        Returns a list of (x, y, w, h) boxes around significant motion.
+        """
+        motion_boxes = self.motion_detector.detect(frame)
+        significant_motion_found = bool(motion_boxes)
+        
+        current_time = time.time()
+
+        if significant_motion_found:
+            # One row per burst of motion (count, duration, peak area), not one per frame.
+            self.events.record("Motion_Detected", config.current_nuba_state,
+                               value=self.motion_detector.last_peak_area, now=current_time)
+            self.last_motion_time = current_time
+            self.ai_said_goodnight = False 
+
+        if significant_motion_found:
+            if self.motion_start_time is None:
+                self.motion_start_time = current_time
+                print(f"[{time.strftime('%H:%M:%S')}] Minor motion detected. Waiting for sustained movement...")
+                self.events.record("Motion_Start", config.current_nuba_state, "Minor motion detected, starting timer")
+
+            if current_time - self.motion_start_time >= config.MOTION_DURATION_THRESHOLD:
+                if config.current_nuba_state == "sleeping":
+                    self.events.flush()
+                    old_state = config.current_nuba_state
+                    config.current_nuba_state = "awake/moving"
+                    print(f"[{time.strftime('%H:%M:%S')}] Nuba state changed from {old_state} to {config.current_nuba_state.upper()}")
+                    self.alert_triggered_by_motion = True
+                    print(f"[{time.strftime('%H:%M:%S')}] !!! ALERT: Nuba is awake and moving! !!!")
+                    print("Consider checking on Nuba now.")
+                    log_event("Nuba_Woke_Up", config.current_nuba_state, "Nuba transitioned to awake/moving")
+                    
+                    try:
+                        playsound(config.ALERT_SOUND_FILE, block=False)
+                        print(f"[{time.strftime('%H:%M:%S')}] Playing alert sound: {config.ALERT_SOUND_FILE}")
+                        log_event("Alert_Sound", config.current_nuba_state, "Played alert chime")
+                    except Exception as e:
+                        print(f"[{time.strftime('%H:%M:%S')}] Error playing alert sound: {e}")
+                        self.events.record("Alert_Sound_Error", config.current_nuba_state, str(e))
+                    
+                    if not self.ai_greeted_nuba_on_wake:
+                        phrase_data = random.choice(config.NUBA_PLAY_PHRASES)
+                        enqueue_speech(phrase_data, priority=PRIORITY_CHATTER)
+                        self.ai_greeted_nuba_on_wake = True
+                        self.last_ai_speech_time = current_time
+                
+                if config.current_nuba_state == "awake/moving" and (current_time - self.last_ai_speech_time) >= config.AI_SPEAK_INTERVAL:
+                    print(f"[{time.strftime('%H:%M:%S')}] AI is ready to speak again (interval met). Time since last speech: {current_time - self.last_ai_speech_time:.2f}s (Interval: {config.AI_SPEAK_INTERVAL}s)")
+                    phrase_data = random.choice(config.NUBA_PLAY_PHRASES)
+                    enqueue_speech(phrase_data, priority=PRIORITY_CHATTER)
+                    self.last_ai_speech_time = current_time
+                
+                detected_phrase = ai_core.take_recognized_speech()
+                if detected_phrase:
+                    print(f"[{time.strftime('%H:%M:%S')}] Main loop detected recognized speech: \"{detected_phrase}\"")
+                    log_event("STT_Recognition", config.current_nuba_state, f"Heard: {detected_phrase}")
+                    
+                    # Common phrases are answered locally; anything else goes to Gemini
+                    # (object context is read from the detection worker's snapshot), whose
+                    # reply arrives on the LLM client's thread and goes straight to the speech queue.
+                    ai_core.respond_to_utterance(detected_phrase, self.speak_response)
+            else:
+                 if self.motion_start_time is not None and (current_time - self.last_motion_time) > config.MOTION_DURATION_THRESHOLD:
+                     self.motion_start_time = None
+        else:
+            if config.current_nuba_state == "awake/moving" and (current_time - self.last_motion_time) >= config.INACTIVITY_SLEEP_THRESHOLD:
+                self.events.flush()
+                if self.alert_triggered_by_motion:
+                    print(f"[{time.strftime('%H:%M:%S')}] Nuba has settled down. Initiating sleep detection.")
+                    log_event("Nuba_Settled", config.current_nuba_state, "Nuba settled after activity")
+                
+                old_state = config.current_nuba_state
+                config.current_nuba_state = "sleeping"
+                print(f"[{time.strftime('%H:%M:%S')}] Nuba state changed from {old_state} to {config.current_nuba_state.upper()}")
+                self.alert_triggered_by_motion = False
+                self.ai_greeted_nuba_on_wake = False
+                self.last_ai_speech_time = 0
+                
+                if not self.ai_said_goodnight:
+                    print(f"[{time.strftime('%H:%M:%S')}] Confirmed Nuba is likely sleeping. Good night, Nuba!")
+                    log_event("Nuba_Asleep", config.current_nuba_state, "Nuba detected as asleep")
+                    enqueue_speech(config.GOODNIGHT_PHRASE, priority=PRIORITY_CHATTER)
+                    self.ai_said_goodnight = True
+            
+            self.motion_start_time = None
+
+        self.events.tick(config.current_nuba_state, now=current_time)
+        return motion_boxes
+
+    @staticmethod
+    def draw_annotations(frame, annotations):
+        """
+        Draws face labels and motion boxes onto a BGR frame in place.
+        """
+        if not annotations:
+            return frame
+
+        # Loop through each recognized face to draw on screen
+        for (top, right, bottom, left), name in annotations.get("faces", []):
+            color = (0, 255, 0) if name != "Unknown" else (0, 0, 255)
+            cv2.rectangle(frame, (left, top), (right, bottom), color, 2)
+            cv2.rectangle(frame, (left, bottom - 35), (right, bottom), color, cv2.FILLED)
+            font = cv2.FONT_HERSHEY_SIMPLEX
+            cv2.putText(frame, name, (left + 6, bottom - 6), font, 1.0, (255, 255, 255), 1)
+
+        for (x, y, w, h) in annotations.get("motion_boxes", []):
+            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+
+        return frame
+
+    def render_frame(self, frame, annotations):
+        """
+        Render stage (pipeline render thread): draws the newest annotations on
+        the newest frame and hands it to convert_frame, if set.
+        """
+        self.draw_annotations(frame, annotations)
+        for listener in list(self._frame_listeners):
+            listener(frame)
+        if self.convert_frame is not None:
+            return self.convert_frame(frame)
+        return frame
+
+    @staticmethod
+    def speak_response(response):
+        if isinstance(response, dict):
+            enqueue_speech(response, priority=PRIORITY_RESPONSE)
+        elif response:
+            enqueue_speech({"text": response, "lang": config.AI_SPEECH_LANG}, priority=PRIORITY_RESPONSE)
+        else:
+            enqueue_speech(config.NO_RESPONSE_PHRASE, priority=PRIORITY_RESPONSE)
+
+    def get_stats(self):
+        return {
+            "state": config.current_nuba_state,
+            "pipeline": self.pipeline.get_stats() if self.pipeline is not None else {},
+            "faces": self.face_service.get_stats() if self.face_service is not None else {},
+            "motion": self.motion_detector.get_stats(),
+            "schedule": self.scheduler.get_stats(),
+            "events": self.events.get_stats(),
+            "live_view": self.live_server.get_stats() if self.live_server is not None else {},
+        }
+
+    def format_stats(self):
+        """
+        One-line summary of the pipeline, analyzer and assistant counters.
+        """
+        stats = self.pipeline.get_stats()
+        text = (
+            f"Capture {stats['capture']['rate_hz']} fps | "
+            f"Analysis {stats['analysis']['rate_hz']} fps, {stats['analysis']['avg_ms']} ms, "
+            f"queue {stats['analysis']['queue_depth']}, dropped {stats['analysis']['dropped']}"
+        )
+        if self.render:
+            text += f" | Render {stats['render']['rate_hz']} fps, {stats['render']['avg_ms']} ms"
+        if self.face_service is not None:
+            face_stats = self.face_service.get_stats()
+            text += f" | Faces {face_stats['avg_ms']} ms, skipped {face_stats['skipped']}"
+        for name, audio_stats in ai_core.get_audio_stats().items():
+            text += f" | Audio {name} {audio_stats['avg_ms']} ms, dropped {audio_stats['dropped']}"
+        router_stats = ai_core.get_router_stats()
+        if router_stats["local_hits"] or router_stats["llm_escalations"]:
+            text += f" | Local answers {router_stats['local_hits']}, to LLM {router_stats['llm_escalations']}"
+        llm_stats = ai_core.get_llm_stats()
+        if llm_stats:
+            text += (f" | LLM {llm_stats['avg_ms']} ms, cached {llm_stats['cache_hits']}, "
+                     f"coalesced {llm_stats['coalesced']}, calls {llm_stats['backend_calls']}")
+        schedule = self.scheduler.get_stats()
+        text += f" | CPU {schedule['cpu_percent']}% ({schedule['activity']}): " + ", ".join(
+            f"{name} {a['target_hz']:g}/{a['rate_hz']} Hz" for name, a in schedule["analyzers"].items())
+        if self.live_server is not None:
+            live_stats = self.live_server.get_stats()
+            text += (f" | Live view {live_stats['stream_clients']}+{live_stats['websocket_clients']} clients, "
+                     f"JPEG {live_stats['jpeg']['rate_hz']}/s, skipped {live_stats['frames_skipped']}")
+        event_stats = self.events.get_stats()
+        text += f" | Events {event_stats['recorded']} -> {event_stats['emitted']} rows"
+        speech_stats = ai_core.get_speech_stats()
+        if speech_stats:
+            text += (f" | Speech queue {speech_stats['queue_depth']}, wait {speech_stats['wait']['avg_ms']} ms, "
+                     f"synth {speech_stats['synthesis']['avg_ms']} ms")
+        return text
@@ -0,0 +1,152 @@
+# motion_detection.py
+
+import cv2
+import numpy as np
+
+from . import config
+
+class MotionDetector:
+    """
+    Frame-differencing motion detector for the crib camera.
+
+    - Works on a downscaled gray copy (scale), with the blur kernel, dilation
+      and area threshold scaled to match; boxes are returned in full-frame pixels.
+    - Only pixels inside the ROI polygons (normalized coordinates) count.
+    - background "frame" diffs against the previous frame (the original
+      behaviour); "running_average" and "mog2" diff against a slowly learned
+      background, so gradual lighting changes don't register as motion.
+    - All intermediate images are preallocated on the first frame and reused;
+      the previous/current buffers are swapped instead of copied.
+    - If fewer pixels changed than could possibly form a significant contour,
+      dilation and findContours are skipped.
+    """
+    def __init__(self, scale=config.MOTION_DETECTION_SCALE, diff_threshold=config.MOTION_DIFF_THRESHOLD,
+                 min_area=config.MOTION_MIN_AREA, background=config.MOTION_BACKGROUND_MODEL,
+                 alpha=config.MOTION_BACKGROUND_ALPHA, roi=config.MOTION_ROI,
+                 static_pixel_ratio=config.MOTION_STATIC_PIXEL_RATIO):
+        self.scale = min(1.0, max(0.05, scale))
+        self.diff_threshold = diff_threshold
+        self.min_area = min_area
+        self.background = background
+        self.alpha = alpha
+        self.roi = roi
+        self.static_pixel_ratio = static_pixel_ratio
+
+        blur = max(3, int(round(21 * self.scale)))
+        self.blur_size = (blur | 1, blur | 1) # Odd kernel, 21x21 at full resolution
+        self.dilate_iterations = max(1, int(round(2 * self.scale)))
+        self.scaled_min_area = min_area * self.scale * self.scale
+
+        self._shape = None
+        self.frames = 0
+        self.static_frames = 0
+        self.last_changed_pixels = 0
+        self.last_peak_area = 0.0 # Largest significant contour of the last frame (full-resolution pixels)
+
+    def reset(self):
+        self._shape = None
+
+    def _allocate(self, shape):
+        height, width = shape[:2]
+        small_w = max(1, int(round(width * self.scale)))
+        small_h = max(1, int(round(height * self.scale)))
+        self._shape = shape
+        self._small_size = (small_w, small_h)
+        self._box_scale = (width / small_w, height / small_h)
+
+        self._small = np.empty((small_h, small_w, 3), dtype=np.uint8)
+        self._gray = np.empty((small_h, small_w), dtype=np.uint8)
+        self._current = np.empty((small_h, small_w), dtype=np.uint8)
+        self._previous = np.empty((small_h, small_w), dtype=np.uint8)
+        self._delta = np.empty((small_h, small_w), dtype=np.uint8)
+        self._thresh = np.empty((small_h, small_w), dtype=np.uint8)
+        self._dilated = np.empty((small_h, small_w), dtype=np.uint8)
+        self._average = None
+        self._mog2 = None
+        if self.background == "mog2":
+            self._mog2 = cv2.createBackgroundSubtractorMOG2(history=500, varThreshold=16, detectShadows=False)
+
+        self._mask = None
+        if self.roi:
+            self._mask = np.zeros((small_h, small_w), dtype=np.uint8)
+            polygons = [np.round(np.array(polygon, dtype=np.float32) * (small_w, small_h)).astype(np.int32)
+                        for polygon in self.roi]
+            cv2.fillPoly(self._mask, polygons, 255)
+
+    def _prepare(self, frame):
+        if frame.shape != self._shape:
+            self._allocate(frame.shape)
+            first = True
+        else:
+            first = False
+        if self._small_size != (frame.shape[1], frame.shape[0]):
+            cv2.resize(frame, self._small_size, dst=self._small, interpolation=cv2.INTER_AREA)
+            small = self._small
+        else:
+            small = frame
+        cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        cv2.GaussianBlur(self._gray, self.blur_size, 0, dst=self._current)
+        return first
+
+    def _foreground(self):
+        """
+        Fills self._thresh with the changed-pixel mask for the current frame.
+        """
+        if self.background == "mog2":
+            self._mog2.apply(self._current, fgmask=self._thresh, learningRate=self.alpha)
+            return
+        if self.background == "running_average":
+            cv2.convertScaleAbs(self._average, dst=self._previous)
+            cv2.absdiff(self._previous, self._current, dst=self._delta)
+            cv2.accumulateWeighted(self._current, self._average, self.alpha)
+        else:
+            cv2.absdiff(self._previous, self._current, dst=self._delta)
+            self._previous, self._current = self._current, self._previous
+        cv2.threshold(self._delta, self.diff_threshold, 255, cv2.THRESH_BINARY, dst=self._thresh)
+
+    def detect(self, frame):
+        """
+        Returns a list of (x, y, w, h) boxes (full-frame pixels) around significant motion.
+        """
+        self.frames += 1
+        self.last_peak_area = 0.0
+        if self._prepare(frame):
+            # First frame of this size: it becomes the background.
+            if self.background == "running_average":
+                self._average = self._current.astype(np.float32)
+            elif self.background == "mog2":
+                self._mog2.apply(self._current, fgmask=self._thresh, learningRate=1.0)
+            else:
+                self._previous, self._current = self._current, self._previous
+            return []
+
+        self._foreground()
+        if self._mask is not None:
+            cv2.bitwise_and(self._thresh, self._mask, dst=self._thresh)
+
+        self.last_changed_pixels = cv2.countNonZero(self._thresh)
+        if self.last_changed_pixels < self.scaled_min_area * self.static_pixel_ratio:
+            self.static_frames += 1
+            return []
+
+        cv2.dilate(self._thresh, None, dst=self._dilated, iterations=self.dilate_iterations)
+        contours, _ = cv2.findContours(self._dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        scale_x, scale_y = self._box_scale
+        boxes = []
+        for contour in contours:
+            area = cv2.contourArea(contour)
+            if area < self.scaled_min_area:
+                continue
+            x, y, w, h = cv2.boundingRect(contour)
+            boxes.append((int(x * scale_x), int(y * scale_y), int(w * scale_x), int(h * scale_y)))
+            self.last_peak_area = max(self.last_peak_area, area * scale_x * scale_y)
+        return boxes
+
+    def get_stats(self):
+        return {
+            "frames": self.frames,
+            "static_frames": self.static_frames,
+            "changed_pixels": self.last_changed_pixels,
+            "peak_area": round(self.last_peak_area),
+        }
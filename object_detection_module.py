@@ -2,92 +2,181 @@
 
 import cv2
 import os
+import threading
 import time
 import numpy as np
 
 from . import config
+from . import ai_core
 from .utils import log_event
 
-# Initialize YOLO network
-net = None
-layer_names = None
-output_layers = None
+# Active detector (set by load_yolo_model)
+detector = None
 
-def load_yolo_model():
+_OPENCV_TARGETS = {
+    "cpu": cv2.dnn.DNN_TARGET_CPU,
+    "opencl": cv2.dnn.DNN_TARGET_OPENCL,
+    "opencl_fp16": cv2.dnn.DNN_TARGET_OPENCL_FP16,
+}
+
+class OpenCVDnnBackend:
     """
-    Loads the YOLO model weights and config from the specified paths.
+    Darknet cfg/weights through cv2.dnn with an explicit backend, target and thread count.
     """
-    global net, layer_names, output_layers
-
-    print(f"[{time.strftime('%H:%M:%S')}] Loading YOLO model from '{config.YOLO_WEIGHTS}' and '{config.YOLO_CONFIG}'...")
-    if not os.path.exists(config.YOLO_WEIGHTS) or not os.path.exists(config.YOLO_CONFIG):
-        print(f"[{time.strftime('%H:%M:%S')}] Error: YOLO model files not found in '{config.MODEL_DATA_DIR}'. Object detection will not work.")
-        net = None
-        return
+    name = "opencv"
 
-    try:
-        net = cv2.dnn.readNet(config.YOLO_WEIGHTS, config.YOLO_CONFIG)
+    def __init__(self, weights_path, config_path, target="cpu", num_threads=0):
+        if num_threads > 0:
+            cv2.setNumThreads(num_threads)
+        self.net = cv2.dnn.readNet(weights_path, config_path)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(_OPENCV_TARGETS.get(target, cv2.dnn.DNN_TARGET_CPU))
 
         # Get the names of all layers in the network
-        layer_names = net.getLayerNames()
+        layer_names = self.net.getLayerNames()
         # Get the names of the output layers (these are the layers that produce the detection results)
         # For YOLO, these are the unconnected output layers
-        output_layers = [layer_names[i - 1] for i in net.getUnconnectedOutLayers()]
+        self.output_layers = [layer_names[i - 1] for i in np.asarray(self.net.getUnconnectedOutLayers()).flatten()]
+
+    def forward(self, blob):
+        self.net.setInput(blob)
+        return self.net.forward(self.output_layers)
+
+
+class OnnxRuntimeBackend:
+    """
+    ONNX Runtime on the CPU execution provider. Expects a YOLO export that keeps
+    the raw head outputs ([cx, cy, w, h, objectness, class scores...] rows) and
+    takes a single NCHW float input scaled to 0..1, i.e. the same contract as
+    the Darknet model under cv2.dnn.
+    """
+    name = "onnxruntime"
+
+    def __init__(self, model_path, num_threads=0):
+        import onnxruntime as ort # Optional dependency, only needed for this backend
+
+        options = ort.SessionOptions()
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def forward(self, blob):
+        return self.session.run(None, {self.input_name: blob.astype(np.float32, copy=False)})
+
+
+class YoloDetector:
+    """
+    Backend-independent YOLO detector: blob creation, forward pass, batched
+    decode and NMS. detect_batch() stacks several frames into one blob so
+    queued frames or multiple cameras share a single forward pass.
+    """
+    def __init__(self, backend, input_size=config.YOLO_INPUT_SIZE):
+        self.backend = backend
+        self.input_size = input_size
+
+    def forward_batch(self, frames):
+        # Create a blob from the frames (scale, size, swap RB); each frame is resized independently
+        blob = cv2.dnn.blobFromImages(frames, 1 / 255.0, (self.input_size, self.input_size), swapRB=True, crop=False)
+        outs = self.backend.forward(blob)
 
+        if len(frames) == 1:
+            return [[out.reshape(-1, out.shape[-1]) for out in outs]]
+        # Batched outputs are (batch, rows, attributes) per output layer.
+        return [[out[i].reshape(-1, out.shape[-1]) for out in outs] for i in range(len(frames))]
+
+    def detect_batch(self, frames):
+        """
+        Returns one list of (class_name, confidence, bbox) tuples per frame.
+        """
+        if not frames:
+            return []
+        results = []
+        for frame, outs in zip(frames, self.forward_batch(frames)):
+            height, width = frame.shape[:2]
+            boxes, confidences, class_ids = decode_yolo_outputs(outs, width, height)
+            results.append(_apply_nms(boxes, confidences, class_ids))
+        return results
+
+    def detect(self, frame):
+        return self.detect_batch([frame])[0]
+
+
+def create_detector(backend_name=config.YOLO_BACKEND, input_size=config.YOLO_INPUT_SIZE,
+                    target=config.YOLO_OPENCV_TARGET, num_threads=config.YOLO_NUM_THREADS):
+    """
+    Builds a YoloDetector for the requested backend ("opencv" or "onnxruntime").
+    """
+    if backend_name == "onnxruntime":
+        backend = OnnxRuntimeBackend(config.YOLO_ONNX_MODEL, num_threads=num_threads)
+    else:
+        backend = OpenCVDnnBackend(config.YOLO_WEIGHTS, config.YOLO_CONFIG, target=target, num_threads=num_threads)
+    return YoloDetector(backend, input_size=input_size)
+
+def load_yolo_model():
+    """
+    Loads the YOLO model for the backend selected in config.YOLO_BACKEND.
+    """
+    global detector
+
+    if config.YOLO_BACKEND == "onnxruntime":
+        model_files = [config.YOLO_ONNX_MODEL]
+    else:
+        model_files = [config.YOLO_WEIGHTS, config.YOLO_CONFIG]
+
+    print(f"[{time.strftime('%H:%M:%S')}] Loading YOLO model ({config.YOLO_BACKEND}, {config.YOLO_INPUT_SIZE}x{config.YOLO_INPUT_SIZE}) from {', '.join(repr(f) for f in model_files)}...")
+    if not all(os.path.exists(f) for f in model_files):
+        print(f"[{time.strftime('%H:%M:%S')}] Error: YOLO model files not found in '{config.MODEL_DATA_DIR}'. Object detection will not work.")
+        detector = None
+        return
+
+    try:
+        detector = create_detector()
         print(f"[{time.strftime('%H:%M:%S')}] YOLO model loaded successfully.")
     except Exception as e:
         print(f"[{time.strftime('%H:%M:%S')}] Error loading YOLO model: {e}")
-        net = None
+        detector = None
 
-def detect_objects_in_frame(frame):
+def decode_yolo_outputs(outs, width, height, confidence_threshold=None):
     """
-    Detects objects in a single frame using the loaded YOLO model.
-    Returns a list of (class_name, confidence, bbox) tuples.
+    Decodes raw YOLO output layers into candidate boxes in one batched NumPy pass.
+    Each row is [cx, cy, w, h, objectness, class scores...] in relative units.
+    Returns (boxes, confidences, class_ids) as Python lists ready for NMSBoxes,
+    with boxes as [x, y, w, h] ints in frame pixels.
     """
-    detected_objects = []
+    if confidence_threshold is None:
+        confidence_threshold = config.YOLO_CONFIDENCE_THRESHOLD
 
-    if net is None:
-        # Model not loaded, log a warning if it hasn't been logged recently
-        if not hasattr(detect_objects_in_frame, 'warned_about_model_not_loaded'):
-            print(f"[{time.strftime('%H:%M:%S')}] Warning: YOLO model not loaded. Skipping object detection.")
-            detect_objects_in_frame.warned_about_model_not_loaded = True
-        return detected_objects
-
-    height, width, channels = frame.shape
-
-    # Create a blob from the frame (scale, size, mean subtraction, swap RB)
-    blob = cv2.dnn.blobFromImage(frame, 1 / 255.0, (416, 416), swapRB=True, crop=False)
-    net.setInput(blob)
-
-    # Forward pass through the network
-    outs = net.forward(output_layers)
-
-    # Post-process the detections
-    class_ids = []
-    confidences = []
-    boxes = []
-
-    for out in outs:
-        for detection in out:
-            scores = detection[5:]
-            class_id = np.argmax(scores)
-            confidence = scores[class_id]
-            if confidence > config.YOLO_CONFIDENCE_THRESHOLD:
-                center_x = int(detection[0] * width)
-                center_y = int(detection[1] * height)
-                w = int(detection[2] * width)
-                h = int(detection[3] * height)
-                x = int(center_x - w / 2)
-                y = int(center_y - h / 2)
-                boxes.append([x, y, w, h])
-                confidences.append(float(confidence))
-                class_ids.append(class_id)
+    detections = np.concatenate([out.reshape(-1, out.shape[-1]) for out in outs], axis=0)
+    scores = detections[:, 5:]
+    confidences = scores.max(axis=1)
+
+    # Threshold first so argmax only runs on the few surviving rows.
+    keep = confidences > confidence_threshold
+    detections = detections[keep]
+    confidences = confidences[keep]
+    class_ids = np.argmax(scores[keep], axis=1)
+
+    # Same int() truncation as the per-row conversion: center/size first, then corner.
+    center_x = (detections[:, 0] * width).astype(np.int64)
+    center_y = (detections[:, 1] * height).astype(np.int64)
+    w = (detections[:, 2] * width).astype(np.int64)
+    h = (detections[:, 3] * height).astype(np.int64)
+    x = (center_x - w / 2).astype(np.int64)
+    y = (center_y - h / 2).astype(np.int64)
+
+    boxes = np.stack([x, y, w, h], axis=1).tolist()
+    return boxes, confidences.astype(float).tolist(), class_ids.tolist()
+
+def _apply_nms(boxes, confidences, class_ids):
+    detected_objects = []
 
     # Apply Non-Maximum Suppression (NMS) to remove overlapping bounding boxes
     indexes = cv2.dnn.NMSBoxes(boxes, confidences, config.YOLO_CONFIDENCE_THRESHOLD, config.YOLO_NMS_THRESHOLD)
 
     if len(indexes) > 0: # Check if indexes is not empty (can be empty array)
-        for i in indexes.flatten(): # Flatten the 2D array of indexes
+        for i in np.asarray(indexes).flatten(): # Flatten the 2D array of indexes
             box = boxes[i]
             x, y, w, h = box[0], box[1], box[2], box[3]
             label = str(config.YOLO_CLASSES[class_ids[i]])
@@ -95,4 +184,136 @@ def detect_objects_in_frame(frame):
 
             detected_objects.append((label, confidence, (x, y, w, h)))
 
-    return detected_objects
\ No newline at end of file
+    return detected_objects
+
+def _model_available(caller):
+    if detector is None:
+        # Model not loaded, log a warning if it hasn't been logged recently
+        if not hasattr(caller, 'warned_about_model_not_loaded'):
+            print(f"[{time.strftime('%H:%M:%S')}] Warning: YOLO model not loaded. Skipping object detection.")
+            caller.warned_about_model_not_loaded = True
+        return False
+    return True
+
+def detect_objects_in_frame(frame):
+    """
+    Detects objects in a single frame using the loaded YOLO model.
+    Returns a list of (class_name, confidence, bbox) tuples.
+    """
+    if not _model_available(detect_objects_in_frame):
+        return []
+    return detector.detect(frame)
+
+def detect_objects_in_frames(frames):
+    """
+    Detects objects in several frames with one batched forward pass.
+    Returns one list of (class_name, confidence, bbox) tuples per frame.
+    """
+    if not _model_available(detect_objects_in_frames):
+        return [[] for _ in frames]
+    return detector.detect_batch(frames)
+
+class ObjectDetectionWorker:
+    """
+    Runs YOLO in a background thread at a low fixed rate on the most recent
+    frame, and publishes a debounced, time-decayed set of object labels to
+    ai_core (read by get_gemini_response).
+
+    Each label keeps a score that decays exponentially with
+    OBJECT_LABEL_DECAY_SECONDS and gains 1 per sighting. A label is published
+    once its score reaches OBJECT_LABEL_MIN_SCORE and withdrawn when it decays
+    below OBJECT_LABEL_DROP_SCORE, so one-off false positives never show up
+    and objects don't flicker in and out between detections.
+    """
+    def __init__(self, rate_hz=config.OBJECT_DETECTION_RATE_HZ, on_update=None, scheduler=None):
+        self.interval = 1.0 / rate_hz if rate_hz > 0 else 1.0
+        self.on_update = on_update
+        self.scheduler = scheduler # Optional AnalysisScheduler charged with each run's latency
+
+        self._frame_lock = threading.Lock()
+        self._latest_frame = None
+        self._frame_is_new = False
+
+        self._scores = {}       # label -> (score, last_update_time)
+        self._active_labels = set()
+        self._published = frozenset()
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self.runs = 0
+        self.last_latency = 0.0
+
+    def start(self):
+        if detector is None:
+            print(f"[{time.strftime('%H:%M:%S')}] Object detection worker not started: YOLO model not loaded.")
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="object-detection", daemon=True)
+        self._thread.start()
+        print(f"[{time.strftime('%H:%M:%S')}] Object detection worker started at {1.0 / self.interval:.1f} Hz.")
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def submit_frame(self, frame):
+        """
+        Non-blocking: only keeps a reference to the newest frame.
+        """
+        with self._frame_lock:
+            self._latest_frame = frame
+            self._frame_is_new = True
+
+    def _take_frame(self):
+        with self._frame_lock:
+            if not self._frame_is_new:
+                return None
+            self._frame_is_new = False
+            return self._latest_frame
+
+    def _update_labels(self, labels, now):
+        decay = config.OBJECT_LABEL_DECAY_SECONDS
+        seen = set(labels)
+        for label in seen | set(self._scores):
+            score, last_time = self._scores.get(label, (0.0, now))
+            score *= np.exp(-(now - last_time) / decay)
+            if label in seen:
+                score += 1.0
+            self._scores[label] = (score, now)
+
+            if score >= config.OBJECT_LABEL_MIN_SCORE:
+                self._active_labels.add(label)
+            elif score < config.OBJECT_LABEL_DROP_SCORE:
+                self._active_labels.discard(label)
+                del self._scores[label]
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            started = time.perf_counter()
+            frame = self._take_frame()
+            if frame is not None:
+                try:
+                    detections = detect_objects_in_frame(frame)
+                    self.runs += 1
+                except Exception as e:
+                    print(f"[{time.strftime('%H:%M:%S')}] Error in object detection worker: {e}")
+                    detections = []
+                self.last_latency = time.perf_counter() - started
+                if self.scheduler is not None:
+                    self.scheduler.record("objects", self.last_latency)
+                self._update_labels([label for label, _, _ in detections], time.time())
+
+                labels = frozenset(self._active_labels)
+                if labels != self._published:
+                    self._published = labels
+                    ai_core.set_detected_objects(labels)
+                    if self.on_update is not None:
+                        self.on_update(sorted(labels))
+
+            self._stop_event.wait(max(0.0, self.interval - (time.perf_counter() - started)))
+
+    def get_labels(self):
+        return sorted(self._published)
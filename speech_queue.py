@@ -0,0 +1,166 @@
+# speech_queue.py
+
+import heapq
+import threading
+import time
+
+from . import config
+from .video_pipeline import StageStats
+
+# Lower value = spoken first.
+PRIORITY_ALERT = 0    # Cry / safety alerts
+PRIORITY_RESPONSE = 1 # Answers to Nuba's speech, GUI buttons
+PRIORITY_CHATTER = 2  # Play phrases, greetings, goodnight
+
+class _SpeechItem:
+    __slots__ = ("priority", "seq", "text", "lang", "enqueued_at", "cancelled")
+
+    def __init__(self, priority, seq, text, lang):
+        self.priority = priority
+        self.seq = seq
+        self.text = text
+        self.lang = lang
+        self.enqueued_at = time.perf_counter()
+        self.cancelled = False
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class SpeechQueue:
+    """
+    Single speech output worker fed by a priority queue, so callers (the Tk
+    loop, the video analysis workers, the audio consumers) never wait on
+    synthesis or playback.
+
+    - Higher priority phrases are spoken first; an alert also cancels any
+      chatter still waiting (the phrase already playing finishes).
+    - A phrase identical to one already queued is not queued twice (the queued
+      copy is upgraded if the new request has a higher priority).
+    - Phrases that waited longer than max_age are dropped instead of spoken late.
+
+    speak_fn(text, lang) synthesizes and plays one phrase, blocking until
+    playback ends, and returns the synthesis time in seconds (or None on error).
+    """
+    def __init__(self, speak_fn, max_age=config.SPEECH_MAX_QUEUE_AGE_SECONDS,
+                 max_size=config.SPEECH_QUEUE_MAX_SIZE):
+        self.speak_fn = speak_fn
+        self.max_age = max_age
+        self.max_size = max(1, max_size)
+
+        self._heap = []
+        self._pending = {} # (text, lang) -> queued _SpeechItem
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self.wait_stats = StageStats("speech-wait")
+        self.synthesis_stats = StageStats("speech-synthesis")
+        self.spoken = 0
+        self.deduplicated = 0
+        self.expired = 0
+        self.preempted = 0
+        self.rejected = 0
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="speech-output", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _cancel(self, item):
+        # Caller holds the lock. Cancelled items are skipped when popped.
+        item.cancelled = True
+        if self._pending.get((item.text, item.lang)) is item:
+            del self._pending[(item.text, item.lang)]
+
+    def enqueue(self, text, lang, priority=PRIORITY_CHATTER):
+        """
+        Non-blocking. Returns False if the phrase was not queued (duplicate or queue full).
+        """
+        key = (text, lang)
+        with self._cond:
+            existing = self._pending.get(key)
+            if existing is not None:
+                self.deduplicated += 1
+                if priority >= existing.priority:
+                    return False
+                self._cancel(existing)
+
+            if priority == PRIORITY_ALERT and config.SPEECH_ALERT_CLEARS_CHATTER:
+                for item in list(self._pending.values()):
+                    if item.priority == PRIORITY_CHATTER:
+                        self._cancel(item)
+                        self.preempted += 1
+
+            if len(self._pending) >= self.max_size:
+                # Make room by dropping the least important, newest phrase if it ranks below this one.
+                worst = max(self._pending.values(), key=lambda item: (item.priority, item.seq))
+                if worst.priority <= priority:
+                    self.rejected += 1
+                    return False
+                self._cancel(worst)
+                self.rejected += 1
+
+            self._seq += 1
+            item = _SpeechItem(priority, self._seq, text, lang)
+            self._pending[key] = item
+            heapq.heappush(self._heap, item)
+            self._cond.notify()
+            return True
+
+    def _next_item(self, timeout):
+        with self._cond:
+            while not self._stop_event.is_set():
+                while self._heap and self._heap[0].cancelled:
+                    heapq.heappop(self._heap)
+                if self._heap:
+                    item = heapq.heappop(self._heap)
+                    del self._pending[(item.text, item.lang)]
+                    return item
+                self._cond.wait(timeout)
+            return None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            item = self._next_item(timeout=0.5)
+            if item is None:
+                continue
+            waited = time.perf_counter() - item.enqueued_at
+            if waited > self.max_age:
+                self.expired += 1
+                print(f"[{time.strftime('%H:%M:%S')}] Dropped stale speech after {waited:.1f}s in queue: '{item.text}'")
+                continue
+            self.wait_stats.record(waited)
+
+            synthesis_time = self.speak_fn(item.text, item.lang)
+            if synthesis_time is not None:
+                self.synthesis_stats.record(synthesis_time)
+                self.spoken += 1
+
+    def depth(self):
+        with self._cond:
+            return len(self._pending)
+
+    def get_stats(self):
+        return {
+            "queue_depth": self.depth(),
+            "spoken": self.spoken,
+            "deduplicated": self.deduplicated,
+            "expired": self.expired,
+            "preempted": self.preempted,
+            "rejected": self.rejected,
+            "wait": self.wait_stats.snapshot(),
+            "synthesis": self.synthesis_stats.snapshot(),
+        }
@@ -0,0 +1,103 @@
+# stt_backends.py
+
+import json
+import time
+
+import numpy as np
+import speech_recognition as sr
+
+from . import config
+
+# Every backend exposes transcribe(audio_data) -> text for a speech_recognition
+# AudioData and, like the speech_recognition recognizers, raises
+# sr.UnknownValueError when nothing intelligible was said and sr.RequestError
+# when the engine itself failed. Models are loaded once in __init__.
+
+class GoogleSTTBackend:
+    """
+    Google Web Speech API through speech_recognition (network round trip per utterance).
+    """
+    name = "google"
+
+    def __init__(self, recognizer=None, language=config.STT_LANGUAGE):
+        self.recognizer = recognizer or sr.Recognizer()
+        self.language = language
+
+    def transcribe(self, audio_data):
+        return self.recognizer.recognize_google(audio_data, language=self.language)
+
+
+class VoskSTTBackend:
+    """
+    Offline recognition with a Vosk (Kaldi) CPU model. The model is loaded once;
+    each utterance only creates a lightweight KaldiRecognizer.
+    """
+    name = "vosk"
+
+    def __init__(self, model_dir=config.STT_VOSK_MODEL_DIR, sample_rate=config.AUDIO_SAMPLE_RATE):
+        import vosk # Optional dependency, only needed for this backend
+
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        self.model = vosk.Model(model_dir)
+        self.sample_rate = sample_rate
+
+    def transcribe(self, audio_data):
+        try:
+            recognizer = self._vosk.KaldiRecognizer(self.model, self.sample_rate)
+            recognizer.AcceptWaveform(audio_data.get_raw_data(convert_rate=self.sample_rate, convert_width=2))
+            text = json.loads(recognizer.FinalResult()).get("text", "")
+        except Exception as e:
+            raise sr.RequestError(f"Vosk recognition failed: {e}")
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+class FakeSTTBackend:
+    """
+    Deterministic stand-in for tests and benchmarks. Silent audio (RMS below
+    silence_rms) is "not understood"; other utterances get the scripted
+    responses in order (cycling), or a description of the audio if none are given.
+    latency simulates a slow engine.
+    """
+    name = "fake"
+
+    def __init__(self, responses=None, latency=0.0, silence_rms=0.01):
+        self.responses = list(responses or [])
+        self.latency = latency
+        self.silence_rms = silence_rms
+        self.calls = 0
+
+    def transcribe(self, audio_data):
+        if self.latency > 0:
+            time.sleep(self.latency)
+        raw = audio_data.get_raw_data(convert_width=2)
+        samples = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+        rms = float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0
+        if rms < self.silence_rms:
+            raise sr.UnknownValueError()
+
+        self.calls += 1
+        if self.responses:
+            return self.responses[(self.calls - 1) % len(self.responses)]
+        duration = len(samples) / audio_data.sample_rate
+        return f"utterance {self.calls} {duration:.1f} seconds"
+
+
+def create_stt_backend(backend_name=config.STT_BACKEND, recognizer=None):
+    """
+    Builds the configured STT backend. A local backend that fails to load
+    (missing package or model) falls back to Google so listening keeps working.
+    """
+    if backend_name == "fake":
+        return FakeSTTBackend()
+    if backend_name == "vosk":
+        try:
+            started = time.perf_counter()
+            backend = VoskSTTBackend()
+            print(f"[{time.strftime('%H:%M:%S')}] Vosk STT model loaded from {config.STT_VOSK_MODEL_DIR} in {time.perf_counter() - started:.1f}s.")
+            return backend
+        except Exception as e:
+            print(f"[{time.strftime('%H:%M:%S')}] Error loading Vosk STT model ({e}); falling back to Google STT.")
+    return GoogleSTTBackend(recognizer)
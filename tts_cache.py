@@ -0,0 +1,164 @@
+# tts_cache.py
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+from gtts import gTTS
+
+from . import config
+
+def synthesize_to_file(text, lang, voice, path):
+    tts = gTTS(text=text, lang=lang, tld=voice, slow=False)
+    tts.save(path)
+
+class PhraseCache:
+    """
+    Content-addressed store of synthesized speech. Each phrase lives in
+    <cache_dir>/<sha1 of lang, voice, text>.mp3, so the same (text, lang, voice)
+    is synthesized once and then played straight from disk.
+
+    Recency is the file's mtime (touched on every hit), so the LRU order
+    survives restarts; files beyond max_bytes are evicted oldest first.
+    Files are written to a unique temp name and renamed into place, so
+    concurrent synthesis of the same phrase never exposes a partial file.
+    """
+    def __init__(self, cache_dir=config.TTS_CACHE_DIR, max_bytes=config.TTS_CACHE_MAX_BYTES,
+                 synthesize=synthesize_to_file):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.synthesize = synthesize
+        self._lock = threading.Lock()
+        self._entries = {} # key -> [size, last_used]
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        for filename in os.listdir(cache_dir):
+            if filename.endswith(".mp3"):
+                stat = os.stat(os.path.join(cache_dir, filename))
+                self._entries[filename[:-4]] = [stat.st_size, stat.st_mtime]
+            elif filename.endswith(".tmp"):
+                os.remove(os.path.join(cache_dir, filename)) # Left over from an interrupted synthesis
+
+    @staticmethod
+    def key(text, lang, voice):
+        return hashlib.sha1(f"{lang}\0{voice}\0{text}".encode("utf-8")).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, key + ".mp3")
+
+    def lookup(self, text, lang, voice=config.AI_SPEECH_VOICE):
+        """
+        Returns the cached file for the phrase (marking it recently used), or None.
+        """
+        key = self.key(text, lang, voice)
+        path = self.path_for(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if not os.path.exists(path):
+                del self._entries[key]
+                return None
+            entry[1] = time.time()
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def get(self, text, lang, voice=config.AI_SPEECH_VOICE):
+        """
+        Returns (path, was_cached), synthesizing the phrase on a miss.
+        """
+        path = self.lookup(text, lang, voice)
+        if path is not None:
+            self.hits += 1
+            return path, True
+
+        self.misses += 1
+        key = self.key(text, lang, voice)
+        path = self.path_for(key)
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.cache_dir)
+        os.close(fd)
+        try:
+            self.synthesize(text, lang, voice, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        with self._lock:
+            self._entries[key] = [os.path.getsize(path), time.time()]
+        self._evict(keep=key)
+        return path, False
+
+    def _evict(self, keep=None):
+        with self._lock:
+            total = sum(size for size, _ in self._entries.values())
+            if total <= self.max_bytes:
+                return
+            victims = []
+            for key, (size, _) in sorted(self._entries.items(), key=lambda item: item[1][1]):
+                if total <= self.max_bytes:
+                    break
+                if key == keep:
+                    continue
+                victims.append(key)
+                total -= size
+            for key in victims:
+                del self._entries[key]
+        for key in victims:
+            try:
+                os.remove(self.path_for(key))
+                self.evicted += 1
+            except OSError:
+                pass
+
+    def prewarm(self, phrases, voice=config.AI_SPEECH_VOICE):
+        """
+        Synthesizes every {"text", "lang"} phrase that isn't cached yet, in a
+        background thread. Returns the thread.
+        """
+        def run():
+            started = time.perf_counter()
+            synthesized = 0
+            for phrase in phrases:
+                try:
+                    _, cached = self.get(phrase["text"], phrase["lang"], voice)
+                    synthesized += not cached
+                except Exception as e:
+                    print(f"[{time.strftime('%H:%M:%S')}] TTS cache pre-warm failed for '{phrase['text']}': {e}")
+            print(f"[{time.strftime('%H:%M:%S')}] TTS cache pre-warmed {len(phrases)} phrases "
+                  f"({synthesized} synthesized) in {time.perf_counter() - started:.1f}s.")
+
+        thread = threading.Thread(target=run, name="tts-prewarm", daemon=True)
+        thread.start()
+        return thread
+
+    def get_stats(self):
+        with self._lock:
+            total = sum(size for size, _ in self._entries.values())
+            count = len(self._entries)
+        return {"entries": count, "bytes": total, "hits": self.hits, "misses": self.misses, "evicted": self.evicted}
+
+
+def fixed_phrases():
+    """
+    Every phrase the app says verbatim: play phrases, keyword responses, GUI
+    buttons, face greetings and the alert/goodnight lines.
+    """
+    phrases = list(config.NUBA_PLAY_PHRASES)
+    phrases += list(config.KEYWORD_RESPONSES.values())
+    phrases += [phrase for _, phrase in config.GUI_SPEECH_BUTTONS]
+    phrases += [{"text": text, "lang": "en"} for texts in config.FACE_GREETING_PHRASES.values() for text in texts]
+    phrases += [config.CRY_ALERT_PHRASE, config.GOODNIGHT_PHRASE, config.NO_RESPONSE_PHRASE]
+
+    unique = {}
+    for phrase in phrases:
+        unique.setdefault((phrase["text"], phrase["lang"]), phrase)
+    return list(unique.values())
@@ -1,37 +1,236 @@
 # utils.py
 
+import asyncio
+import atexit
 import csv
 import os
+import queue
+import threading
 import time
+import unicodedata
 # Remove email imports:
 # import smtplib
 # from email.mime.text import MIMEText
 # from email.mime.multipart import MIMEMultipart
 
 from . import config # Import config from the same package
+from . import log_storage
 
-# This global flag will be managed by the log_event function
-_log_file_initialized = False
+# --- Buffered background event logger ---
+# log_event only enqueues the row; a single writer thread owns the file, writes
+# rows in batches (size or time threshold) and fsyncs after important events
+# and on shutdown. Having one writer means rows from the GUI, listener and TTS
+# threads can never interleave. Event listeners are also called from the writer
+# thread, as each row is dequeued, so they never run on (or slow down) the
+# capture, analysis or audio threads that log events.
+_log_queue = queue.Queue()
+_log_writer_thread = None
+_log_writer_lock = threading.Lock()
+_STOP = object()
+_FLUSH = object()
+_event_listeners = [] # Called with each logged row, e.g. to push events to live view clients
 
-def log_event(event_type, nuba_state_for_log, details=""):
+class _LogSink:
     """
-    Logs an event to the CSV file.
+    Owned by the writer thread: the open CSV segment (rotated by day/size) and,
+    if enabled, the SQLite store. Rows are stored under the current file's
+    source name, and the stored-row count follows the file when it is rotated,
+    so importing the segment later doesn't store its rows twice.
     """
-    global _log_file_initialized # Use the internal flag for this module
+    def __init__(self):
+        self.f = None
+        self.writer = None
+        self.day = None
+        self.store = None
+        if config.LOG_SQLITE_ENABLED:
+            try:
+                self.store = log_storage.ActivityLogStore(config.LOG_DB_FILE)
+            except Exception as e:
+                print(f"[{time.strftime('%H:%M:%S')}] Error opening log database {config.LOG_DB_FILE}: {e}")
+
+    def _open(self, day):
+        if config.LOG_ROTATE_DAILY and os.path.exists(config.LOG_FILE) and os.path.getsize(config.LOG_FILE) > 0:
+            # A file left over from an earlier day becomes that day's segment.
+            file_day = time.strftime('%Y-%m-%d', time.localtime(os.path.getmtime(config.LOG_FILE)))
+            if file_day != day:
+                self._rotate_file(file_day)
+        if self.store is not None and os.path.exists(config.LOG_FILE):
+            # Rows the store doesn't have yet: a log from before SQLite was
+            # enabled, or a batch lost when the process died mid-write.
+            try:
+                imported, _, _ = self.store.import_csv(config.LOG_FILE)
+                if imported:
+                    print(f"[{time.strftime('%H:%M:%S')}] Stored {imported} earlier rows of {config.LOG_FILE} in the log database.")
+            except Exception as e:
+                print(f"[{time.strftime('%H:%M:%S')}] Error importing {config.LOG_FILE} into the log database: {e}")
+        self.f = open(config.LOG_FILE, 'a', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.f)
+        if self.f.tell() == 0:
+            self.writer.writerow(config.LOG_HEADERS) # Ensure headers are written if file is new or empty
+        self.day = day
+
+    def close(self):
+        if self.f is not None:
+            self.f.close()
+        self.f, self.writer, self.day = None, None, None
+
+    def _rotate_file(self, day):
+        segment = log_storage.rotate_log_file(config.LOG_FILE, day)
+        if segment is not None and self.store is not None:
+            self.store.rename_source(log_storage.log_source_name(config.LOG_FILE), log_storage.log_source_name(segment))
+
+    def _rotate(self):
+        day = self.day
+        self.close()
+        self._rotate_file(day)
+
+    def _store(self, rows):
+        if self.store is not None and rows:
+            self.store.insert_many(rows, log_storage.log_source_name(config.LOG_FILE))
+
+    def write(self, rows, sync):
+        unstored = []
+        for row in rows:
+            day = row[0][:10]
+            if self.f is not None and ((config.LOG_ROTATE_DAILY and day != self.day) or
+                                       self.f.tell() >= config.LOG_MAX_BYTES):
+                # Rows written to the old file are stored under its name before it moves.
+                self.f.flush()
+                self._store(unstored)
+                unstored = []
+                self._rotate()
+            if self.f is None:
+                self._open(day)
+            self.writer.writerow(row)
+            unstored.append(row)
+
+        if self.f is not None:
+            self.f.flush()
+            if sync:
+                os.fsync(self.f.fileno())
+
+        self._store(unstored)
+
+def _log_writer_loop():
+    sink = _LogSink()
+    pending = []
+    sync_requested = False
+    flush_waiters = []
+    last_flush = time.monotonic()
+    stopping = False
+
+    while not stopping:
+        timeout = max(0.0, config.LOG_FLUSH_INTERVAL_SECONDS - (time.monotonic() - last_flush))
+        try:
+            items = [_log_queue.get(timeout=timeout)]
+        except queue.Empty:
+            items = []
 
+        # Drain whatever else is already queued into this batch.
+        while items and len(items) < config.LOG_FLUSH_BATCH_SIZE:
+            try:
+                items.append(_log_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        for item in items:
+            if item is _STOP:
+                stopping = True
+                sync_requested = True
+            elif item[0] is _FLUSH:
+                flush_waiters.append(item[1])
+                sync_requested = True
+            else:
+                row, important = item
+                pending.append(row)
+                sync_requested = sync_requested or important
+                _notify_event_listeners(row)
+
+        due = (len(pending) >= config.LOG_FLUSH_BATCH_SIZE or sync_requested or
+               time.monotonic() - last_flush >= config.LOG_FLUSH_INTERVAL_SECONDS)
+        if not due:
+            continue
+
+        if pending or sync_requested:
+            try:
+                sink.write(pending, sync_requested)
+            except Exception as e:
+                print(f"[{time.strftime('%H:%M:%S')}] Error writing to log file {config.LOG_FILE}: {e}")
+                sink.close()
+            pending = []
+            sync_requested = False
+
+        last_flush = time.monotonic()
+        for waiter in flush_waiters:
+            waiter.set()
+        flush_waiters = []
+
+    sink.close()
+    if sink.store is not None:
+        sink.store.close()
+
+def _notify_event_listeners(row):
+    for listener in list(_event_listeners):
+        try:
+            listener(row)
+        except Exception as e:
+            print(f"[{time.strftime('%H:%M:%S')}] Error in event listener: {e}")
+
+def _ensure_log_writer():
+    global _log_writer_thread
+    if _log_writer_thread is not None and _log_writer_thread.is_alive():
+        return
+    with _log_writer_lock:
+        if _log_writer_thread is None or not _log_writer_thread.is_alive():
+            _log_writer_thread = threading.Thread(target=_log_writer_loop, name="event-logger", daemon=True)
+            _log_writer_thread.start()
+
+def log_event(event_type, nuba_state_for_log, details=""):
+    """
+    Queues an event for the CSV log and returns immediately.
+    Events listed in config.LOG_FSYNC_EVENTS are flushed and fsynced right away.
+    """
     timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
     log_data = [timestamp, event_type, nuba_state_for_log, details]
 
-    file_exists = os.path.exists(config.LOG_FILE)
-    if not file_exists or os.path.getsize(config.LOG_FILE) == 0:
-        _log_file_initialized = False # Ensure headers are written if file is new or empty
+    _ensure_log_writer()
+    _log_queue.put((log_data, event_type in config.LOG_FSYNC_EVENTS))
 
-    with open(config.LOG_FILE, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        if not _log_file_initialized:
-            writer.writerow(config.LOG_HEADERS)
-            _log_file_initialized = True
-        writer.writerow(log_data)
+def add_event_listener(listener):
+    """
+    listener([timestamp, event_type, state, details]) is called for every event
+    on the event logger's writer thread (not the thread that logged it), as
+    soon as the row is dequeued. A slow listener delays the log writes, so it
+    should return quickly.
+    """
+    _event_listeners.append(listener)
+
+def remove_event_listener(listener):
+    if listener in _event_listeners:
+        _event_listeners.remove(listener)
+
+def flush_log(timeout=5.0):
+    """
+    Blocks until everything queued so far is written and fsynced.
+    """
+    if _log_writer_thread is None or not _log_writer_thread.is_alive():
+        return
+    done = threading.Event()
+    _log_queue.put((_FLUSH, done))
+    done.wait(timeout)
+
+def shutdown_event_logger(timeout=5.0):
+    """
+    Writes and fsyncs all pending events, then stops the writer thread.
+    """
+    global _log_writer_thread
+    if _log_writer_thread is None or not _log_writer_thread.is_alive():
+        return
+    _log_queue.put(_STOP)
+    _log_writer_thread.join(timeout)
+    _log_writer_thread = None
+
+atexit.register(shutdown_event_logger)
 
 def initialize_log_file():
     """
@@ -44,6 +243,59 @@ def initialize_log_file():
             writer.writerow(config.LOG_HEADERS)
         print(f"[{time.strftime('%H:%M:%S')}] Initialized new log file: {config.LOG_FILE}")
 
+def normalize_text(text):
+    """
+    Canonical form of an utterance for matching and caching: NFC, case-folded,
+    punctuation/symbols removed, whitespace collapsed. Combining marks are kept,
+    so Bengali vowel signs survive (a word-character regex would split on them).
+    """
+    text = unicodedata.normalize("NFC", text).casefold().replace("'", "").replace("\u2019", "")
+    text = "".join(" " if unicodedata.category(ch)[0] in "PSZ" else ch for ch in text)
+    return " ".join(text.split())
+
+class TokenBucket:
+    """
+    rate tokens per second, up to `burst` saved up. try_acquire() refuses when
+    empty; acquire() waits for a token instead. Not thread-safe: callers lock
+    or use it from a single thread/event loop.
+    """
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self._last = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def wait_time(self):
+        self._refill()
+        if self.tokens >= 1.0:
+            return 0.0
+        return (1.0 - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def try_acquire(self):
+        if self.wait_time() == 0.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+    async def acquire(self, max_wait):
+        """
+        Takes a token, waiting up to max_wait seconds. Returns False if that isn't enough.
+        """
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self.wait_time()
+            if wait == 0.0:
+                self.tokens -= 1.0
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
 # Remove email sending function:
 # def send_email_alert(subject, body):
 #     global config
@@ -0,0 +1,311 @@
+# video_pipeline.py
+
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from . import config
+from .utils import log_event
+
+
+class StageStats:
+    """
+    Thread-safe latency counters for a single pipeline stage.
+    """
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_latency = 0.0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self._window_start = time.time()
+        self._window_count = 0
+        self.rate = 0.0
+
+    def record(self, latency):
+        with self._lock:
+            self.count += 1
+            self.total_latency += latency
+            self.last_latency = latency
+            if latency > self.max_latency:
+                self.max_latency = latency
+
+            self._window_count += 1
+            now = time.time()
+            elapsed = now - self._window_start
+            if elapsed >= 1.0:
+                self.rate = self._window_count / elapsed
+                self._window_start = now
+                self._window_count = 0
+
+    def snapshot(self):
+        with self._lock:
+            avg = (self.total_latency / self.count) if self.count else 0.0
+            return {
+                "count": self.count,
+                "rate_hz": round(self.rate, 1),
+                "avg_ms": round(avg * 1000, 2),
+                "last_ms": round(self.last_latency * 1000, 2),
+                "max_ms": round(self.max_latency * 1000, 2),
+            }
+
+
+class FrameQueue:
+    """
+    Bounded frame queue. When full, the oldest frame is dropped so consumers
+    always work on the most recent frames instead of falling further behind.
+    """
+    def __init__(self, maxsize):
+        self._items = deque()
+        self._maxsize = max(1, maxsize)
+        self._cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self._maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """
+        Returns the oldest queued item, or None if nothing arrived within timeout.
+        """
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def depth(self):
+        with self._cond:
+            return len(self._items)
+
+
+class VideoFileCapture:
+    """
+    cv2.VideoCapture over a recorded clip, read at the clip's own frame rate
+    (CAP_PROP_FPS, or `fps` if given) instead of as fast as it decodes.
+    read() returns (False, None) once the clip has ended.
+    """
+    def __init__(self, path, fps=None):
+        self.capture = cv2.VideoCapture(path)
+        fps = fps or self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+        self.interval = 1.0 / fps
+        self._next = time.perf_counter()
+
+    def isOpened(self):
+        return self.capture.isOpened()
+
+    def read(self):
+        delay = self._next - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self._next = max(self._next + self.interval, time.perf_counter() - self.interval)
+        return self.capture.read()
+
+    def release(self):
+        self.capture.release()
+
+
+class VideoPipeline:
+    """
+    Multi-stage video pipeline:
+      capture thread -> FrameQueue -> analysis workers -> render thread -> output slot
+
+    analyze_fn(frame) runs on the analysis workers and returns annotation data.
+    render_fn(frame, annotations) runs on the render thread at the display rate,
+    always drawing the newest captured frame with the newest finished annotations,
+    so display FPS does not depend on how fast analysis keeps up.
+
+    With stop_at_end (a recorded clip rather than a camera) a failed read means
+    the clip is over: the pipeline stops and has_ended() returns True.
+    """
+    def __init__(self, capture, analyze_fn, render_fn=None,
+                 num_workers=config.VIDEO_ANALYSIS_WORKERS,
+                 queue_size=config.VIDEO_FRAME_QUEUE_SIZE,
+                 display_fps=config.VIDEO_DISPLAY_FPS,
+                 stop_at_end=False):
+        self.capture = capture
+        self.stop_at_end = stop_at_end
+        self.analyze_fn = analyze_fn
+        self.render_fn = render_fn
+        self.num_workers = max(1, num_workers)
+        self.display_interval = 1.0 / display_fps if display_fps > 0 else 0
+
+        self.frame_queue = FrameQueue(queue_size)
+        self.output_queue = FrameQueue(1)
+
+        self.capture_stats = StageStats("capture")
+        self.analysis_stats = StageStats("analysis")
+        self.render_stats = StageStats("render")
+
+        self._lock = threading.Lock()
+        self._latest_frame = None
+        self._latest_seq = -1
+        self._latest_annotations = None
+        self._annotations_seq = -1
+        self._rendered_seq = -1
+        self.stale_results = 0
+
+        self._stop_event = threading.Event()
+        self._ended = threading.Event()
+        self._render_enabled = threading.Event()
+        self._render_enabled.set()
+        self._threads = []
+
+    def start(self):
+        self._stop_event.clear()
+        self._ended.clear()
+        self._threads = [threading.Thread(target=self._capture_loop, name="capture", daemon=True)]
+        for i in range(self.num_workers):
+            self._threads.append(threading.Thread(target=self._analysis_loop, name=f"analysis-{i}", daemon=True))
+        if self.render_fn is not None:
+            self._threads.append(threading.Thread(target=self._render_loop, name="render", daemon=True))
+        for t in self._threads:
+            t.start()
+        print(f"[{time.strftime('%H:%M:%S')}] Video pipeline started with {self.num_workers} analysis worker(s).")
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        for t in self._threads:
+            t.join(timeout=timeout)
+        self._threads = []
+        print(f"[{time.strftime('%H:%M:%S')}] Video pipeline stopped.")
+
+    def set_render_enabled(self, enabled):
+        """
+        Pauses or resumes the render stage, e.g. while no viewer is attached.
+        """
+        if enabled:
+            self._render_enabled.set()
+        else:
+            self._render_enabled.clear()
+
+    def is_running(self):
+        return not self._stop_event.is_set() and any(t.is_alive() for t in self._threads)
+
+    def has_ended(self):
+        """
+        True once a stop_at_end pipeline has read the last frame of its clip.
+        """
+        return self._ended.is_set()
+
+    def _capture_loop(self):
+        seq = 0
+        failed_reads = 0
+        retry_delay = config.VIDEO_READ_RETRY_SECONDS
+        while not self._stop_event.is_set():
+            start = time.perf_counter()
+            ret, frame = self.capture.read()
+            if not ret and self.stop_at_end:
+                print(f"[{time.strftime('%H:%M:%S')}] End of video clip reached.")
+                self._ended.set()
+                self._stop_event.set()
+                break
+            if not ret:
+                # Back off while the camera is gone and report the outage once,
+                # not on every retry (System_Error is fsynced).
+                if failed_reads == 0:
+                    print(f"[{time.strftime('%H:%M:%S')}] Error: Could not read frame from camera. Retrying...")
+                    log_event("System_Error", config.current_nuba_state, "Failed to read camera frame in video pipeline")
+                failed_reads += 1
+                self._stop_event.wait(retry_delay)
+                retry_delay = min(retry_delay * 2, config.VIDEO_READ_MAX_RETRY_SECONDS)
+                continue
+            if failed_reads:
+                print(f"[{time.strftime('%H:%M:%S')}] Camera frames resumed after {failed_reads} failed read(s).")
+                log_event("Camera_Recovered", config.current_nuba_state, f"Frames resumed after {failed_reads} failed read(s)")
+                failed_reads = 0
+                retry_delay = config.VIDEO_READ_RETRY_SECONDS
+
+            with self._lock:
+                self._latest_frame = frame
+                self._latest_seq = seq
+            self.frame_queue.put((seq, frame))
+            self.capture_stats.record(time.perf_counter() - start)
+            seq += 1
+
+    def _analysis_loop(self):
+        while not self._stop_event.is_set():
+            item = self.frame_queue.get(timeout=0.1)
+            if item is None:
+                continue
+            seq, frame = item
+
+            start = time.perf_counter()
+            try:
+                annotations = self.analyze_fn(frame)
+            except Exception as e:
+                print(f"[{time.strftime('%H:%M:%S')}] Error in video analysis stage: {e}")
+                continue
+            self.analysis_stats.record(time.perf_counter() - start)
+
+            with self._lock:
+                # With several workers results can finish out of order; never
+                # replace newer annotations with ones from an older frame.
+                if seq > self._annotations_seq:
+                    self._latest_annotations = annotations
+                    self._annotations_seq = seq
+                else:
+                    self.stale_results += 1
+
+    def _render_loop(self):
+        next_tick = time.perf_counter()
+        while not self._stop_event.is_set():
+            if not self._render_enabled.wait(timeout=0.1):
+                next_tick = time.perf_counter()
+                continue
+            with self._lock:
+                frame = self._latest_frame
+                seq = self._latest_seq
+                annotations = self._latest_annotations
+
+            if frame is not None and seq != self._rendered_seq:
+                start = time.perf_counter()
+                try:
+                    # Draw on a copy; the capture thread may hand the same frame to analysis.
+                    rendered = self.render_fn(frame.copy(), annotations)
+                    self.output_queue.put((seq, rendered))
+                    self._rendered_seq = seq
+                except Exception as e:
+                    print(f"[{time.strftime('%H:%M:%S')}] Error in video render stage: {e}")
+                self.render_stats.record(time.perf_counter() - start)
+
+            next_tick += self.display_interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.perf_counter()
+
+    def get_rendered_frame(self):
+        """
+        Non-blocking. Returns the newest finished (seq, rendered) pair, or None.
+        """
+        return self.output_queue.get(timeout=0)
+
+    def get_latest_annotations(self):
+        with self._lock:
+            return self._annotations_seq, self._latest_annotations
+
+    def get_stats(self):
+        """
+        Returns queue depths, drop counts and per-stage latency counters.
+        """
+        return {
+            "capture": self.capture_stats.snapshot(),
+            "analysis": dict(self.analysis_stats.snapshot(),
+                             queue_depth=self.frame_queue.depth(),
+                             dropped=self.frame_queue.dropped,
+                             stale=self.stale_results),
+            "render": dict(self.render_stats.snapshot(),
+                           queue_depth=self.output_queue.depth(),
+                           dropped=self.output_queue.dropped),
+        }